@@ -1,49 +1,35 @@
 import os
 import logging
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
-from flask_mail import Mail
-from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from extensions import Base, db, login_manager, mail
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Extensions live in extensions.py so that importing models or services doesn't
+# build an app; they are re-exported here for existing `from app import db` code.
+__all__ = ['Base', 'db', 'login_manager', 'mail', 'create_app', 'init_database']
 
-class Base(DeclarativeBase):
-    pass
+def configure_logging(app):
+    """Set the root log level from LOG_LEVEL"""
+    level = getattr(logging, str(app.config.get('LOG_LEVEL', 'INFO')).upper(), logging.INFO)
+    logging.basicConfig(level=level)
+    logging.getLogger().setLevel(level)
 
-# Initialize extensions
-db = SQLAlchemy(model_class=Base)
-login_manager = LoginManager()
-mail = Mail()
-
-def create_app():
+def create_app(config_name=None):
+    """Create the app with a config.py configuration (FLASK_CONFIG, 'default' if unset)"""
+    from config import config, build_engine_options
+    
+    from storage import UploadRequest
+    
     app = Flask(__name__)
+    app.request_class = UploadRequest
     
     # Configuration
-    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    config_name = config_name or os.environ.get('FLASK_CONFIG', 'default')
+    app.config.from_object(config[config_name])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     
-    # Database configuration
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///placementhub.db")
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-        "pool_recycle": 300,
-        "pool_pre_ping": True,
-    }
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    
-    # File upload configuration
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
-    
-    # Mail configuration
-    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'localhost')
-    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
-    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
-    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
-    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
-    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@placementhub.com')
+    configure_logging(app)
     
     # Initialize extensions with app
     db.init_app(app)
@@ -57,44 +43,106 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        from models import User
-        return User.query.get(int(user_id))
+        from profiles import load_user_with_profile
+        return load_user_with_profile(int(user_id))
     
-    # Create upload directory
+    # Create upload directories
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['STORAGE_FOLDER'], exist_ok=True)
     
-    with app.app_context():
-        # Import models and routes
-        import models
-        import routes
-        import auth
-        
-        # Register blueprints
-        app.register_blueprint(auth.bp)
-        app.register_blueprint(routes.bp)
-        
-        # Create database tables
-        db.create_all()
+    # Import models, the modules that keep derived data in sync through mapper
+    # events, and routes. Nothing here touches the database: schema creation
+    # and seeding are done once by `flask init-db`.
+    import models
+    import database
+    import placement_stats
+    import changefeed
+    import search
+    import eligibility
+    import matching
+    import outbox
+    import profiles
+    import notifications
+    import events
+    import storage
+    import resumes
+    import routes
+    import auth
+    from commands import register_commands
+    from instrumentation import init_instrumentation
+    
+    # Register blueprints
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(routes.bp)
+    
+    # Register CLI commands
+    register_commands(app)
+    
+    # Per-request query and latency metrics, served at /metrics
+    init_instrumentation(app)
+    
+    # Deliver queued emails in the background. The thread starts with the
+    # first request, so CLI commands don't run one and each forked server
+    # worker gets its own.
+    if app.config['OUTBOX_WORKER_ENABLED']:
+        from outbox import start_outbox_worker
         
-        # Create default admin user if not exists
-        from models import User
-        from werkzeug.security import generate_password_hash
+        @app.before_request
+        def ensure_outbox_worker():
+            start_outbox_worker(app)
+    
+    # Build match scores and follow the change feed off the request path
+    if app.config['MATCH_REFRESH_ENABLED']:
+        from matching import start_match_refresher
         
-        admin = User.query.filter_by(email='admin@placementhub.com').first()
-        if not admin:
-            admin = User(
-                email='admin@placementhub.com',
-                username='admin',
-                password_hash=generate_password_hash('admin123'),
-                role='tpo',
-                is_active=True,
-                is_verified=True
-            )
-            db.session.add(admin)
-            db.session.commit()
-            logging.info('Default admin user created: admin@placementhub.com / admin123')
+        @app.before_request
+        def ensure_match_refresher():
+            start_match_refresher(app)
     
     return app
 
-# Create the app instance
-app = create_app()
+def init_database():
+    """Create the schema and derived data and seed the default admin (idempotent)"""
+    import search
+    import placement_stats
+    import eligibility
+    from models import User
+    from index_audit import create_missing_indexes
+    from sqlalchemy.exc import IntegrityError
+    from werkzeug.security import generate_password_hash
+    
+    # Create database tables
+    db.create_all()
+    
+    # create_all() skips indexes declared after their table was created
+    try:
+        for name in create_missing_indexes():
+            logging.info(f'Created index {name}')
+    except IntegrityError as e:
+        logging.error(f"Could not create a unique index, remove duplicate rows and rerun init-db: {e.orig}")
+    
+    # Set up the search index before any request can write to it
+    search.init_search_index()
+    
+    # Seed the materialized statistics before incremental updates start
+    placement_stats.ensure_stat_counters()
+    
+    # Jobs from before the normalized eligibility tables have no rows in them
+    migrated = eligibility.migrate_job_eligibility(only_missing=True)
+    if migrated:
+        logging.info(f'Migrated eligibility for {migrated} jobs')
+    
+    # Create default admin user if not exists
+    admin = User.query.filter_by(email='admin@placementhub.com').first()
+    if not admin:
+        admin = User(
+            email='admin@placementhub.com',
+            username='admin',
+            password_hash=generate_password_hash('admin123'),
+            role='tpo',
+            is_active=True,
+            is_verified=True
+        )
+        db.session.add(admin)
+        db.session.commit()
+        logging.info('Default admin user created: admin@placementhub.com / admin123')
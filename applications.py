@@ -0,0 +1,119 @@
+from datetime import datetime
+from sqlalchemy import insert
+from extensions import db
+from models import User, StudentProfile, Job, Application, Notification, PlacementRecord, EmailOutbox
+from stats import invalidate_user_stats, APPLICATION_STATUSES
+from utils import render_notification_email
+from profiles import invalidate_user
+from notifications import notifications_created
+from events import publish, user_channel, company_channel
+from fragments import invalidate_application_fragments
+
+CURRENT_ACADEMIC_YEAR = '2024-25'
+MAX_BULK_APPLICATIONS = 1000
+
+def is_duplicate_application(error):
+    """Tell whether an IntegrityError came from the one-application-per-job unique index"""
+    message = str(getattr(error, 'orig', error))
+    # SQLite names the columns instead of the index
+    return 'uq_applications_user_job' in message or 'applications.user_id, applications.job_id' in message
+
+def update_application_statuses(company_id, application_ids, new_status):
+    """Move a set of a company's applications to a new status in one transaction
+
+    Ownership is checked with a single query; the status change, notifications,
+    queued emails and placement records are written with bulk statements.
+    Returns {application_id: result} where result is one of 'updated',
+    'unchanged', 'not_found' or 'forbidden'.
+    """
+    if new_status not in APPLICATION_STATUSES:
+        raise ValueError(f"Invalid status: {new_status}")
+
+    application_ids = list(dict.fromkeys(int(i) for i in application_ids))
+    rows = db.session.query(
+        Application.id, Application.user_id, Application.job_id, Application.status,
+        Job.title, Job.company_id, User.email
+    ).join(Job, Application.job_id == Job.id)\
+     .join(User, Application.user_id == User.id)\
+     .filter(Application.id.in_(application_ids)).all()
+
+    results = {application_id: 'not_found' for application_id in application_ids}
+    to_update = []
+    for row in rows:
+        if row.company_id != company_id:
+            results[row.id] = 'forbidden'
+        elif row.status == new_status:
+            results[row.id] = 'unchanged'
+        else:
+            results[row.id] = 'updated'
+            to_update.append(row)
+
+    if not to_update:
+        return results
+
+    now = datetime.utcnow()
+    db.session.query(Application)\
+        .filter(Application.id.in_([row.id for row in to_update]))\
+        .update({'status': new_status, 'updated_at': now}, synchronize_session='fetch')
+
+    # Notify students and queue their emails
+    title = 'Application Status Updated'
+    notifications, emails = [], []
+    for row in to_update:
+        message = f'Your application for {row.title} has been {new_status}.'
+        notifications.append({'user_id': row.user_id, 'title': title, 'message': message,
+                              'type': 'info', 'is_read': False, 'created_at': now})
+        if row.email:
+            emails.append({'recipient': row.email, 'subject': title,
+                           'html_body': render_notification_email(title, message),
+                           'status': 'pending', 'attempts': 0, 'next_attempt_at': now, 'created_at': now})
+    db.session.execute(insert(Notification), notifications)
+    if emails:
+        db.session.execute(insert(EmailOutbox), emails)
+
+    # Push the change to the students and the company's recruiters once committed
+    for row, notification in zip(to_update, notifications):
+        publish(user_channel(row.user_id), 'application',
+                {'id': row.id, 'job_id': row.job_id, 'job_title': row.title, 'status': new_status})
+        publish(user_channel(row.user_id), 'notification', {
+            'title': notification['title'], 'message': notification['message'],
+            'type': notification['type'], 'is_read': False, 'created_at': now.isoformat()
+        })
+    publish(company_channel(company_id), 'applications',
+            {'ids': [row.id for row in to_update], 'status': new_status})
+
+    # If selected, create placement records that don't exist yet
+    if new_status == 'selected':
+        pairs = {(row.user_id, row.job_id): row for row in to_update}
+        existing = set(db.session.query(PlacementRecord.student_id, PlacementRecord.job_id).filter(
+            PlacementRecord.student_id.in_([user_id for user_id, _ in pairs]),
+            PlacementRecord.job_id.in_([job_id for _, job_id in pairs])
+        ).all())
+        new_pairs = [pair for pair in pairs if pair not in existing]
+
+        # ORM inserts so the placement statistics hooks see each record
+        db.session.add_all([
+            PlacementRecord(
+                student_id=user_id,
+                company_id=pairs[(user_id, job_id)].company_id,
+                job_id=job_id,
+                academic_year=CURRENT_ACADEMIC_YEAR
+            )
+            for user_id, job_id in new_pairs
+        ])
+
+        if new_pairs:
+            db.session.query(StudentProfile)\
+                .filter(StudentProfile.user_id.in_({user_id for user_id, _ in new_pairs}))\
+                .update({'placement_status': 'placed'}, synchronize_session='fetch')
+
+    db.session.commit()
+    notifications_created([row.user_id for row in to_update])
+    invalidate_application_fragments(company_id)
+
+    for user_id in {row.user_id for row in to_update}:
+        invalidate_user_stats(user_id)
+        if new_status == 'selected':
+            invalidate_user(user_id)
+
+    return results
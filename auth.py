@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, session
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash
-from app import db
+from extensions import db
 from models import User, StudentProfile, RecruiterProfile, Company
+from fragments import invalidate_fragment, TPO_SCOPE
 import logging
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -92,6 +93,7 @@ def register():
             user.set_password(password)
             db.session.add(user)
             db.session.flush()  # Get the user ID
+            new_company = False
             
             # Create role-specific profile
             if role == 'student':
@@ -135,6 +137,7 @@ def register():
                     company = Company(name=company_name, is_approved=False)
                     db.session.add(company)
                     db.session.flush()
+                    new_company = True
                 
                 recruiter_profile = RecruiterProfile(
                     user_id=user.id,
@@ -147,6 +150,8 @@ def register():
                 db.session.add(recruiter_profile)
             
             db.session.commit()
+            if new_company:
+                invalidate_fragment('pending_companies', TPO_SCOPE)
             flash('Registration successful! Please log in.', 'success')
             return redirect(url_for('auth.login'))
             
@@ -0,0 +1,295 @@
+"""Benchmark the main pages and reports against a synthetic campus
+
+    python -m benchmarks.run                        # run and compare with benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline        # run and store the results as the new baseline
+    python -m benchmarks.run --students 10000 --iterations 50
+
+Each scenario is timed over several iterations after a warm-up request, with
+the garbage collector paused, and reports p50/p95 latency, the number of SQL statements issued and the peak
+Python memory allocated (measured in a separate tracemalloc pass so the
+tracing overhead doesn't skew the timings). A run fails when a scenario
+issues more queries, allocates more memory or returns a different status
+than the baseline; slowdowns are reported, and fail the run only with
+--fail-on-latency since timings vary between machines.
+"""
+import gc
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# Page scenarios: (name, role to log in as, url). Each page is measured warm
+# and again as <name>_cold with the in-process caches emptied before every
+# request, so cache hits can't hide a slow query path.
+PAGE_SCENARIOS = [
+    ('student_dashboard', 'student', '/student/dashboard'),
+    ('student_jobs', 'student', '/student/jobs'),
+    ('student_jobs_search', 'student', '/student/jobs?search=python'),
+    ('tpo_dashboard', 'tpo', '/tpo/dashboard'),
+    ('tpo_reports', 'tpo', '/tpo/reports'),
+    ('tpo_students', 'tpo', '/tpo/students'),
+    ('tpo_students_filtered', 'tpo', '/tpo/students?branch=Electronics&status=placed'),
+    ('recruiter_dashboard', 'recruiter', '/recruiter/dashboard'),
+    ('recruiter_jobs', 'recruiter', '/recruiter/jobs')
+]
+
+REPORT_SCENARIOS = [
+    ('report_placement', 'generate_placement_report'),
+    ('report_student', 'generate_student_report'),
+    ('report_company', 'generate_company_report')
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='PlacementHub performance benchmarks')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--jobs', type=int, default=400)
+    parser.add_argument('--applications-per-student', type=int, default=8)
+    parser.add_argument('--notifications-per-student', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--only', nargs='*', help='Run only these scenarios')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    parser.add_argument('--fail-on-latency', action='store_true',
+                        help='Treat slowdowns as regressions (use on a quiet, dedicated machine)')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed relative slowdown/memory growth over the baseline')
+    parser.add_argument('--min-slowdown-ms', type=float, default=2.0,
+                        help='Ignore p95 slowdowns smaller than this many milliseconds')
+    parser.add_argument('--keep-templates', action='store_true',
+                        help='Fail on missing templates instead of rendering them blank')
+    return parser.parse_args(argv)
+
+def create_benchmark_app(database_path):
+    """Create an app bound to a fresh SQLite file with background work disabled"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    os.environ['MAIL_TRANSPORT'] = 'memory'
+    os.environ['OUTBOX_WORKER_ENABLED'] = 'false'
+    os.environ['MATCH_REFRESH_ENABLED'] = 'false'
+    os.environ.setdefault('QUERY_BUDGET', '0')
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+    import logging
+    logging.disable(logging.WARNING)
+    from app import create_app, init_database
+    app = create_app('production')
+    with app.app_context():
+        init_database()
+    return app
+
+def blank_missing_templates(app):
+    """Render templates that aren't in the tree as empty pages
+
+    The route code (queries, aggregation) is what's being measured; without
+    this every page would end in a TemplateNotFound 500.
+    """
+    from jinja2 import ChoiceLoader, FunctionLoader
+    app.jinja_loader = ChoiceLoader([app.jinja_loader, FunctionLoader(lambda name: '')])
+    app.jinja_env.loader = app.create_global_jinja_loader()
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'after_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+def pick_users(app):
+    """Choose representative users: the busiest student and recruiter, and the admin"""
+    from extensions import db
+    from models import User, RecruiterProfile, Job, Application
+    with app.app_context():
+        student_id = db.session.query(Application.user_id)\
+            .group_by(Application.user_id).order_by(db.func.count().desc()).limit(1).scalar()
+        company_id = db.session.query(Job.company_id)\
+            .group_by(Job.company_id).order_by(db.func.count().desc()).limit(1).scalar()
+        recruiter_id = db.session.query(RecruiterProfile.user_id)\
+            .filter(RecruiterProfile.company_id == company_id).limit(1).scalar()
+        return {
+            'student': db.session.get(User, student_id).email,
+            'recruiter': db.session.get(User, recruiter_id).email,
+            'tpo': 'admin@placementhub.com'
+        }
+
+def login(client, email):
+    from benchmarks.seed import BENCHMARK_PASSWORD
+    client.get('/auth/logout')
+    password = 'admin123' if email == 'admin@placementhub.com' else BENCHMARK_PASSWORD
+    response = client.post('/auth/login', data={'email': email, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'Could not log in as {email}')
+
+def measure(call, counter, iterations, cold=False):
+    """Time a callable; returns latency percentiles, query count and peak memory
+
+    With cold=True every cache is emptied before each call (outside the timing).
+    """
+    from cache import clear_all_caches
+    status = call()  # warm-up
+    timings = []
+    queries = 0
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            if cold:
+                clear_all_caches()
+            before = counter.count
+            start = time.perf_counter()
+            status = call()
+            timings.append((time.perf_counter() - start) * 1000)
+            queries = counter.count - before
+    finally:
+        gc.enable()
+
+    if cold:
+        clear_all_caches()
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'status': status,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1)
+    }
+
+def print_result(name, result):
+    print(f'  {name:<28} {result["p50_ms"]:>9.2f} ms p50  {result["p95_ms"]:>9.2f} ms p95  '
+          f'{result["queries"]:>4} queries  {result["peak_kb"]:>10.1f} KiB  [{result["status"]}]')
+
+def run_scenarios(app, users, iterations, only=None):
+    import utils
+    from extensions import db
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    results = {}
+    client = app.test_client()
+    current_role = None
+    for name, role, url in PAGE_SCENARIOS:
+        for scenario, cold in ((name, False), (f'{name}_cold', True)):
+            if only and scenario not in only:
+                continue
+            if role != current_role:
+                login(client, users[role])
+                current_role = role
+            results[scenario] = measure(lambda: client.get(url).status_code, counter, iterations, cold)
+            print_result(scenario, results[scenario])
+
+    for name, function in REPORT_SCENARIOS:
+        if only and name not in only:
+            continue
+
+        def call(function=getattr(utils, function)):
+            with app.app_context():
+                function()
+                db.session.remove()
+            return 200
+        results[name] = measure(call, counter, max(3, iterations // 5))
+        print_result(name, results[name])
+    return results
+
+def compare(results, baseline, tolerance, min_slowdown_ms):
+    """Compare results with the baseline scenarios
+
+    Returns (regressions, slowdowns). Query counts, memory and status codes
+    are deterministic for a given dataset, so any increase is a regression;
+    latency depends on the machine and is reported separately.
+    """
+    regressions, slowdowns = [], []
+    for name, base in baseline.get('scenarios', {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(f'{name}: {current["queries"]} queries vs baseline {base["queries"]}')
+        if current['peak_kb'] > base['peak_kb'] * (1 + tolerance) + 64:
+            regressions.append(f'{name}: peak {current["peak_kb"]:.0f} KiB vs baseline {base["peak_kb"]:.0f} KiB')
+        if current['status'] != base['status']:
+            regressions.append(f'{name}: status {current["status"]} vs baseline {base["status"]}')
+        # p95 is noisier than the median, so it gets twice the headroom
+        for key, allowed in (('p50_ms', tolerance), ('p95_ms', 2 * tolerance)):
+            if current[key] - base[key] > min_slowdown_ms and current[key] > base[key] * (1 + allowed):
+                slowdowns.append(f'{name}: {key[:3]} {current[key]:.2f} ms vs baseline {base[key]:.2f} ms')
+    return regressions, slowdowns
+
+def main(argv=None):
+    args = parse_args(argv)
+    dataset = {
+        'students': args.students, 'companies': args.companies, 'jobs': args.jobs,
+        'applications_per_student': args.applications_per_student,
+        'notifications_per_student': args.notifications_per_student, 'seed': args.seed
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app(os.path.join(tmp, 'benchmark.db'))
+        if not args.keep_templates:
+            blank_missing_templates(app)
+
+        from benchmarks.seed import seed_campus
+        print('Seeding synthetic campus...')
+        start = time.perf_counter()
+        with app.app_context():
+            counts = seed_campus(**dataset)
+        print(f'  {counts} in {time.perf_counter() - start:.1f}s')
+
+        users = pick_users(app)
+        print(f'Running scenarios ({args.iterations} iterations)...')
+        results = run_scenarios(app, users, args.iterations, args.only)
+
+    report = {'dataset': dataset, 'rows': counts, 'scenarios': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare against; run with --save-baseline to create one.')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('dataset') != dataset:
+        print('Warning: the baseline was recorded with a different dataset; comparing anyway.')
+
+    regressions, slowdowns = compare(results, baseline, args.tolerance, args.min_slowdown_ms)
+    if slowdowns:
+        print('Slower than baseline:')
+        for line in slowdowns:
+            print(f'  {line}')
+        if args.fail_on_latency:
+            regressions.extend(slowdowns)
+    if regressions:
+        print('Regressions against baseline:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('No regressions against baseline.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
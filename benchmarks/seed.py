@@ -0,0 +1,179 @@
+import json
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import (User, StudentProfile, RecruiterProfile, Company, Job, Application,
+                    Notification, PlacementRecord)
+
+# Synthetic campus data
+#
+# Fills the models.py schema with a deterministic campus: the same seed and
+# sizes always produce the same rows. Rows go in through bulk inserts, which
+# skip the mapper hooks, so the derived tables (eligibility, search index,
+# statistics) are rebuilt from scratch at the end, as after a data import.
+
+BENCHMARK_PASSWORD = 'benchmark'
+
+BRANCHES = ['Computer Science', 'Information Technology', 'Electronics', 'Electrical', 'Mechanical', 'Civil']
+SKILLS = ['Python', 'Java', 'C++', 'JavaScript', 'React', 'Node.js', 'SQL', 'PostgreSQL', 'Docker',
+          'AWS', 'Machine Learning', 'Go', 'TypeScript', 'Kubernetes', 'Excel', 'AutoCAD', 'MATLAB']
+ROLES = ['Software Engineer', 'Data Analyst', 'Backend Developer', 'Frontend Developer', 'DevOps Engineer',
+         'Embedded Engineer', 'Design Engineer', 'Business Analyst', 'ML Engineer', 'QA Engineer']
+INDUSTRIES = ['Software', 'Finance', 'Consulting', 'Manufacturing', 'Telecom', 'E-commerce']
+CITIES = ['Bengaluru', 'Hyderabad', 'Pune', 'Chennai', 'Gurugram', 'Mumbai', 'Remote']
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Ananya', 'Kabir', 'Meera', 'Rohan', 'Saanvi', 'Vivaan', 'Zara']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Singh', 'Iyer', 'Reddy', 'Nair', 'Mehta', 'Kaur', 'Das']
+APPLICATION_STATUS_WEIGHTS = {'applied': 50, 'shortlisted': 20, 'interviewed': 12, 'rejected': 13, 'selected': 5}
+
+DEFAULT_SIZES = {
+    'students': 2000,
+    'companies': 50,
+    'jobs': 400,
+    'applications_per_student': 8,
+    'notifications_per_student': 10
+}
+
+def _bulk_insert(model, rows, chunk_size=2000):
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(model), rows[start:start + chunk_size])
+
+def _next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+def seed_campus(students=None, companies=None, jobs=None, applications_per_student=None,
+                notifications_per_student=None, seed=42):
+    """Insert a synthetic campus and rebuild the derived tables; returns row counts"""
+    sizes = dict(DEFAULT_SIZES)
+    sizes.update({key: value for key, value in {
+        'students': students, 'companies': companies, 'jobs': jobs,
+        'applications_per_student': applications_per_student,
+        'notifications_per_student': notifications_per_student
+    }.items() if value is not None})
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+
+    def days_ago(limit):
+        return now - timedelta(days=rng.randint(0, limit), seconds=rng.randint(0, 86399))
+
+    # Companies, each with one recruiter
+    company_id = _next_id(Company)
+    user_id = _next_id(User)
+    company_rows, recruiter_users, recruiter_rows = [], [], []
+    for i in range(sizes['companies']):
+        cid = company_id + i
+        company_rows.append({
+            'id': cid, 'name': f'Company {i:04d}', 'industry': rng.choice(INDUSTRIES),
+            'location': rng.choice(CITIES), 'is_approved': rng.random() < 0.9, 'created_at': days_ago(365)
+        })
+        recruiter_users.append({
+            'id': user_id, 'email': f'recruiter{i}@bench.example', 'username': f'recruiter{i}',
+            'password_hash': password_hash, 'role': 'recruiter', 'is_active': True, 'created_at': days_ago(365)
+        })
+        recruiter_rows.append({
+            'user_id': user_id, 'company_id': cid, 'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES), 'designation': 'Talent Acquisition', 'created_at': now
+        })
+        user_id += 1
+
+    # Students
+    student_users, profile_rows, student_ids = [], [], []
+    for i in range(sizes['students']):
+        created_at = days_ago(365)
+        student_users.append({
+            'id': user_id, 'email': f'student{i}@bench.example', 'username': f'student{i}',
+            'password_hash': password_hash, 'role': 'student', 'is_active': True, 'created_at': created_at
+        })
+        profile_rows.append({
+            'user_id': user_id, 'roll_number': f'BENCH{i:06d}', 'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES), 'branch': rng.choice(BRANCHES),
+            'graduation_year': rng.choice([2025, 2026, 2027]), 'cgpa': round(rng.uniform(5.5, 9.9), 2),
+            'tenth_percentage': round(rng.uniform(60, 99), 1), 'twelfth_percentage': round(rng.uniform(60, 99), 1),
+            'skills': ', '.join(rng.sample(SKILLS, rng.randint(2, 6))), 'placement_status': 'available',
+            'is_placement_eligible': True, 'created_at': created_at, 'updated_at': created_at
+        })
+        student_ids.append(user_id)
+        user_id += 1
+
+    # Jobs
+    job_id = _next_id(Job)
+    job_rows = []
+    for i in range(sizes['jobs']):
+        salary = rng.randrange(300000, 2500000, 50000)
+        restricted = rng.random() < 0.6
+        job_rows.append({
+            'id': job_id + i, 'company_id': company_id + rng.randrange(sizes['companies']),
+            'title': rng.choice(ROLES), 'description': f'{rng.choice(ROLES)} role working with {rng.choice(SKILLS)}.',
+            'location': rng.choice(CITIES), 'job_type': rng.choice(['full-time', 'full-time', 'internship']),
+            'salary_min': salary, 'salary_max': salary + 200000,
+            'eligible_branches': json.dumps(rng.sample(BRANCHES, rng.randint(1, 3))) if restricted else None,
+            'min_cgpa': rng.choice([None, 6.0, 7.0, 7.5, 8.0]),
+            'skills_required': ', '.join(rng.sample(SKILLS, rng.randint(2, 5))),
+            'application_deadline': now + timedelta(days=rng.randint(-30, 60)),
+            'is_active': rng.random() < 0.85, 'created_at': days_ago(180)
+        })
+    company_of_job = {row['id']: row['company_id'] for row in job_rows}
+    package_of_job = {row['id']: row['salary_min'] for row in job_rows}
+
+    # Applications, notifications and placements
+    statuses = list(APPLICATION_STATUS_WEIGHTS)
+    weights = list(APPLICATION_STATUS_WEIGHTS.values())
+    application_rows, notification_rows, placement_rows = [], [], []
+    placed = set()
+    job_ids = list(company_of_job)
+    for student_id in student_ids:
+        count = min(len(job_ids), rng.randint(0, 2 * sizes['applications_per_student']))
+        for jid in rng.sample(job_ids, count):
+            status = rng.choices(statuses, weights)[0]
+            applied_at = days_ago(120)
+            application_rows.append({
+                'user_id': student_id, 'job_id': jid, 'status': status,
+                'applied_at': applied_at, 'updated_at': applied_at
+            })
+            if status == 'selected':
+                placed.add(student_id)
+                placement_rows.append({
+                    'student_id': student_id, 'company_id': company_of_job[jid], 'job_id': jid,
+                    'package_amount': package_of_job[jid], 'placement_type': 'campus',
+                    'academic_year': rng.choice(['2023-24', '2024-25']), 'created_at': applied_at
+                })
+        for _ in range(rng.randint(0, 2 * sizes['notifications_per_student'])):
+            notification_rows.append({
+                'user_id': student_id, 'title': 'Application Status Updated',
+                'message': 'Your application status has changed.', 'type': 'info',
+                'is_read': rng.random() < 0.6, 'created_at': days_ago(90)
+            })
+    for row in profile_rows:
+        if row['user_id'] in placed:
+            row['placement_status'] = 'placed'
+
+    _bulk_insert(Company, company_rows)
+    _bulk_insert(User, recruiter_users + student_users)
+    _bulk_insert(RecruiterProfile, recruiter_rows)
+    _bulk_insert(StudentProfile, profile_rows)
+    _bulk_insert(Job, job_rows)
+    _bulk_insert(Application, application_rows)
+    _bulk_insert(Notification, notification_rows)
+    _bulk_insert(PlacementRecord, placement_rows)
+    db.session.commit()
+
+    # Derived tables
+    from eligibility import migrate_job_eligibility
+    from placement_stats import rebuild_stat_counters
+    from search import get_search_index
+    migrate_job_eligibility()
+    get_search_index().rebuild()
+    rebuild_stat_counters()
+
+    return {
+        'companies': len(company_rows),
+        'recruiters': len(recruiter_rows),
+        'students': len(profile_rows),
+        'jobs': len(job_rows),
+        'applications': len(application_rows),
+        'notifications': len(notification_rows),
+        'placements': len(placement_rows)
+    }
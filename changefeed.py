@@ -0,0 +1,145 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.engine import Engine
+from extensions import db
+from models import Job, StudentProfile, Company, IndexChange
+
+# Change feed for in-process copies of the data
+#
+# The in-memory search index and the match engine hold copies of job and
+# profile rows in every worker process. Writes record which rows changed in
+# index_changes, in the same transaction as the change itself, so a write that
+# rolls back leaves nothing behind. Each copy reads the feed at most every
+# CHANGE_POLL_INTERVAL seconds (and as soon as its own process commits a
+# change) and reloads just the rows named there, so all workers converge on
+# committed data whichever of them made the write.
+#
+# Rows are read again for CHANGE_OVERLAP_SECONDS after they appear: an id
+# handed out early can commit after later ones, and applying a change twice
+# only reloads a row. A copy that hasn't read the feed for longer than
+# CHANGE_RETENTION_SECONDS may have missed pruned rows and rebuilds instead.
+
+JOB = 'job'
+STUDENT = 'student'
+COMPANY = 'company'
+
+def record_changes(connection, entity, entity_ids):
+    """Record changed rows on the writing transaction's connection"""
+    now = datetime.utcnow()
+    rows = [{'entity': entity, 'entity_id': entity_id, 'created_at': now} for entity_id in entity_ids]
+    if rows:
+        connection.execute(insert(IndexChange), rows)
+        connection.info['index_changes_written'] = True
+
+def record_change(connection, entity, entity_id):
+    record_changes(connection, entity, [entity_id])
+
+class ChangeReader:
+    """Position of one in-process copy in the change feed"""
+
+    def __init__(self):
+        self._since = None
+        self._seen = {}
+        self._last_read = None
+        self._pending = False
+        self._lock = threading.Lock()
+        _readers.append(self)
+
+    def notify(self):
+        """Read on the next call to changes(), without waiting for the poll interval"""
+        self._pending = True
+
+    def reset(self):
+        """Start reading from now; call right before loading a full copy"""
+        with self._lock:
+            self._since = datetime.utcnow()
+            self._seen.clear()
+            self._last_read = time.monotonic()
+            self._pending = False
+
+    def changes(self, force=False):
+        """Get {entity: {ids}} changed since the last read
+
+        Returns an empty dict between polls and None when the copy has to be
+        rebuilt because changes may have been pruned before it read them.
+        """
+        config = current_app.config
+        interval = config.get('CHANGE_POLL_INTERVAL', 2)
+        overlap = timedelta(seconds=config.get('CHANGE_OVERLAP_SECONDS', 60))
+        retention = config.get('CHANGE_RETENTION_SECONDS', 3600)
+
+        with self._lock:
+            now = time.monotonic()
+            if self._since is None or now - self._last_read > retention - overlap.total_seconds():
+                return None
+            if not (force or self._pending or now - self._last_read >= interval):
+                return {}
+            self._pending = False
+            self._last_read = now
+            started = datetime.utcnow()
+            rows = db.session.query(IndexChange.id, IndexChange.entity, IndexChange.entity_id, IndexChange.created_at)\
+                .filter(IndexChange.created_at >= self._since - overlap)\
+                .order_by(IndexChange.id).all()
+
+            changed = {}
+            for row in rows:
+                if row.id not in self._seen:
+                    self._seen[row.id] = row.created_at
+                    changed.setdefault(row.entity, set()).add(row.entity_id)
+            self._since = started
+            cutoff = started - 2 * overlap
+            for change_id in [i for i, created_at in self._seen.items() if created_at < cutoff]:
+                del self._seen[change_id]
+
+        _prune(retention)
+        return changed
+
+_readers = []
+_last_prune = 0
+_prune_lock = threading.Lock()
+
+def _prune(retention):
+    global _last_prune
+    if time.monotonic() - _last_prune < 60 or not _prune_lock.acquire(blocking=False):
+        return
+    try:
+        _last_prune = time.monotonic()
+        # Own transaction, so the caller's session isn't committed
+        with db.engine.begin() as connection:
+            connection.execute(IndexChange.__table__.delete()
+                               .where(IndexChange.created_at < datetime.utcnow() - timedelta(seconds=retention)))
+    finally:
+        _prune_lock.release()
+
+@event.listens_for(Engine, 'commit')
+def _connection_committed(connection):
+    if connection.info.pop('index_changes_written', False):
+        for reader in _readers:
+            reader.notify()
+
+@event.listens_for(Engine, 'rollback')
+def _connection_rolled_back(connection):
+    connection.info.pop('index_changes_written', None)
+
+# Recording hooks
+
+@event.listens_for(Job, 'after_insert')
+@event.listens_for(Job, 'after_update')
+@event.listens_for(Job, 'after_delete')
+def _job_changed(mapper, connection, target):
+    record_change(connection, JOB, target.id)
+
+@event.listens_for(StudentProfile, 'after_insert')
+@event.listens_for(StudentProfile, 'after_update')
+@event.listens_for(StudentProfile, 'after_delete')
+def _student_changed(mapper, connection, target):
+    record_change(connection, STUDENT, target.id)
+
+@event.listens_for(Company, 'after_update')
+def _company_changed(mapper, connection, target):
+    # Approval decides whether a company's jobs can be recommended
+    if inspect(target).attrs.is_approved.history.has_changes():
+        record_change(connection, COMPANY, target.id)
@@ -0,0 +1,111 @@
+import click
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create tables, missing indexes and the search index, migrate job eligibility, seed statistics and the default admin."""
+        from app import init_database
+        init_database()
+        click.echo('Database initialized.')
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recompute the materialized placement statistics from source tables."""
+        from placement_stats import rebuild_stat_counters
+        count = rebuild_stat_counters()
+        click.echo(f'Rebuilt {count} statistic counters.')
+
+    @app.cli.command('search-reindex')
+    def search_reindex():
+        """Rebuild the job and student search index."""
+        from search import init_search_index
+        index = init_search_index()
+        index.rebuild()
+        click.echo(f'Rebuilt {index.name} search index.')
+
+    @app.cli.command('migrate-eligibility')
+    def migrate_eligibility():
+        """Parse eligible_branches/skills_required into the job_branches and job_skills tables."""
+        from eligibility import migrate_job_eligibility
+        count = migrate_job_eligibility()
+        click.echo(f'Migrated eligibility for {count} jobs.')
+
+    @app.cli.command('outbox-worker')
+    @click.option('--once', is_flag=True, help='Send one batch and exit.')
+    def outbox_worker(once):
+        """Deliver queued emails from the outbox."""
+        import time
+        from outbox import deliver_pending
+        while True:
+            processed = deliver_pending()
+            if processed:
+                click.echo(f'Processed {processed} queued emails.')
+            if once:
+                break
+            if not processed:
+                time.sleep(app.config.get('OUTBOX_POLL_INTERVAL', 2))
+
+    @app.cli.command('create-indexes')
+    def create_indexes():
+        """Create declared indexes missing from tables that already exist."""
+        from sqlalchemy.exc import IntegrityError
+        from index_audit import create_missing_indexes
+        try:
+            created = create_missing_indexes()
+        except IntegrityError as e:
+            raise click.ClickException(f'Could not create a unique index, remove duplicate rows first: {e.orig}')
+        for name in created:
+            click.echo(f'Created index {name}')
+        click.echo(f'Created {len(created)} missing indexes.')
+
+    @app.cli.command('index-audit')
+    @click.option('--verbose', '-v', is_flag=True, help='Print the full plan for every query.')
+    @click.option('--strict', is_flag=True, help='Exit with an error if any query does a full table scan.')
+    @click.argument('names', nargs=-1)
+    def index_audit(verbose, strict, names):
+        """EXPLAIN the registered hot queries and flag full table scans."""
+        from index_audit import audit_hot_queries
+        flagged = 0
+        for name, plan, full_scans, temp_sort in audit_hot_queries(names):
+            if full_scans:
+                flagged += 1
+                click.echo(f'FULL SCAN  {name}')
+                for line in full_scans:
+                    click.echo(f'    {line}')
+            elif temp_sort:
+                click.echo(f'SORT       {name}')
+            else:
+                click.echo(f'ok         {name}')
+            if verbose:
+                for line in plan:
+                    click.echo(f'    | {line}')
+        click.echo(f'{flagged} queries with full table scans.')
+        if strict and flagged:
+            raise SystemExit(1)
+
+    @app.cli.command('storage-gc')
+    @click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting it.')
+    @click.option('--grace', type=int, default=None, help='Seconds an unreferenced file is kept (default STORAGE_GC_GRACE_SECONDS).')
+    def storage_gc(dry_run, grace):
+        """Fix stored file reference counts and delete unreferenced uploads."""
+        from storage import collect_garbage
+        stats = collect_garbage(grace_seconds=grace, dry_run=dry_run)
+        verb = 'Would delete' if dry_run else 'Deleted'
+        click.echo(f'Corrected {stats["corrected"]} reference counts.')
+        click.echo(f'{verb} {stats["deleted"]} unreferenced files ({stats["bytes"]} bytes), '
+                   f'{stats["untracked"]} untracked objects and {stats["temp"]} temporary files.')
+
+    @app.cli.command('resume-index')
+    @click.option('--force', is_flag=True, help='Re-extract every resume, not just new or changed ones.')
+    @click.option('--retry-failed', is_flag=True, help='Also retry resumes whose extraction failed.')
+    @click.option('--workers', type=int, default=None, help='Worker processes (default RESUME_INDEX_WORKERS or CPU count).')
+    def resume_index(force, retry_failed, workers):
+        """Extract text and skills from uploaded resumes into the resume index."""
+        from resumes import index_resumes
+        counts = index_resumes(force=force, retry_failed=retry_failed,
+                               max_workers=workers or app.config.get('RESUME_INDEX_WORKERS') or None,
+                               max_chars=app.config.get('RESUME_TEXT_MAX_CHARS', 100000))
+        for status, count in sorted(counts.items()):
+            click.echo(f'{status}: {count}')
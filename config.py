@@ -3,7 +3,7 @@ from datetime import timedelta
 
 class Config:
     # Basic Flask configuration
-    SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+    SECRET_KEY = os.environ.get('SECRET_KEY') or os.environ.get('SESSION_SECRET', 'dev-secret-key-change-in-production')
     
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///placementhub.db')
@@ -13,9 +13,27 @@ class Config:
         'pool_pre_ping': True,
     }
     
+    # Connection pool sizing, per process (ignored for SQLite)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 300))  # seconds
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
+    
     # File upload configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
+    STORAGE_FOLDER = os.environ.get('STORAGE_FOLDER') or os.path.join(UPLOAD_FOLDER, 'store')  # content-addressed uploads
+    STORAGE_CHUNK_SIZE = 64 * 1024  # bytes per read when copying stored files
+    STORAGE_GC_GRACE_SECONDS = int(os.environ.get('STORAGE_GC_GRACE_SECONDS', 86400))  # keep unreferenced files this long
+    STORED_FILE_MAX_AGE = int(os.environ.get('STORED_FILE_MAX_AGE', 365 * 86400))  # stored files never change
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() in ['true', 'on', '1']  # Apache/lighttpd
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX')  # nginx internal location for UPLOAD_FOLDER
+    
+    # Resume text extraction and skill indexing
+    RESUME_INDEX_ON_UPLOAD = os.environ.get('RESUME_INDEX_ON_UPLOAD', 'true').lower() in ['true', 'on', '1']
+    RESUME_INDEX_WORKERS = int(os.environ.get('RESUME_INDEX_WORKERS', 0))  # processes for resume-index, 0 = CPU count
+    RESUME_TEXT_MAX_CHARS = int(os.environ.get('RESUME_TEXT_MAX_CHARS', 100000))
     
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
@@ -31,22 +49,64 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@placementhub.com')
+    MAIL_TRANSPORT = os.environ.get('MAIL_TRANSPORT', 'smtp')  # smtp, memory (local stand-in for tests)
+    
+    # Email outbox configuration
+    OUTBOX_WORKER_ENABLED = os.environ.get('OUTBOX_WORKER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 2))  # seconds
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_SECONDS', 30))
+    OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 300))
+    
+    # Live updates (server-sent events)
+    EVENT_BROKER = os.environ.get('EVENT_BROKER', 'memory')  # memory (one process), database (relayed between workers; gunicorn.conf.py default with several workers)
+    EVENT_STREAM_KEEPALIVE = int(os.environ.get('EVENT_STREAM_KEEPALIVE', 15))  # seconds between keepalive comments
+    EVENT_STREAM_TIMEOUT = int(os.environ.get('EVENT_STREAM_TIMEOUT', 300))  # seconds before the client reconnects
+    EVENT_STREAM_MAX_CLIENTS = int(os.environ.get('EVENT_STREAM_MAX_CLIENTS', 200))  # open streams per process; gunicorn.conf.py lowers it to fit gthread threads
+    EVENT_STREAM_RETRY_AFTER = int(os.environ.get('EVENT_STREAM_RETRY_AFTER', 30))  # seconds a client turned away at capacity polls /api/events before retrying
+    EVENT_POLL_INTERVAL = float(os.environ.get('EVENT_POLL_INTERVAL', 1))  # seconds, database broker only
+    EVENT_RETENTION_SECONDS = int(os.environ.get('EVENT_RETENTION_SECONDS', 3600))  # database broker only
+    EVENT_OVERLAP_SECONDS = int(os.environ.get('EVENT_OVERLAP_SECONDS', 30))  # window re-read for late commits, database broker only
     
     # Application-specific configuration
     ITEMS_PER_PAGE = 20
+    MAX_ITEMS_PER_PAGE = 100
+    COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 60))  # seconds
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 5))  # seconds; invalidation is per process, so other workers lag by up to this
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 0))  # seconds, 0 disables the current user cache
+    NOTIFICATION_COUNT_CACHE_TTL = int(os.environ.get('NOTIFICATION_COUNT_CACHE_TTL', 30))  # seconds; per process, other workers' writes show up within this
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')  # memory (per process), filesystem (shared by a host's workers), none
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 60))  # seconds, 0 keeps fragments until invalidated
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'fragments')
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')  # auto, fts5, memory
+    CHANGE_POLL_INTERVAL = int(os.environ.get('CHANGE_POLL_INTERVAL', 2))  # seconds between change feed reads
+    CHANGE_OVERLAP_SECONDS = int(os.environ.get('CHANGE_OVERLAP_SECONDS', 60))  # window re-read for late commits
+    CHANGE_RETENTION_SECONDS = int(os.environ.get('CHANGE_RETENTION_SECONDS', 3600))  # older feed rows are pruned
+    MATCH_REFRESH_ENABLED = os.environ.get('MATCH_REFRESH_ENABLED', 'true').lower() in ['true', 'on', '1']  # background match engine build
+    MATCH_REBUILD_INTERVAL = int(os.environ.get('MATCH_REBUILD_INTERVAL', 3600))  # seconds between full rebuilds by the background thread
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'csv', 'xlsx'}
     
     # Security configuration
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = None
     
+    # Instrumentation configuration
+    INSTRUMENTATION_ENABLED = True
+    METRICS_ENDPOINT_ENABLED = os.environ.get('METRICS_ENDPOINT_ENABLED', 'false').lower() in ['true', 'on', '1']
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # when set, /metrics requires 'Authorization: Bearer <token>'
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 30))  # queries per request, 0 disables the warning
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))  # identical statements per request
+    QUERY_COUNT_HEADER = False
+    
     # Logging configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FILE = os.environ.get('LOG_FILE', 'placementhub.log')
 
 class DevelopmentConfig(Config):
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    QUERY_COUNT_HEADER = True
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', 'false').lower() in ['true', 'on', '1']  # log every statement
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -56,6 +116,20 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    MAIL_TRANSPORT = 'memory'
+    OUTBOX_WORKER_ENABLED = False
+    MATCH_REFRESH_ENABLED = False
+
+def build_engine_options(app_config):
+    """Get SQLALCHEMY_ENGINE_OPTIONS with the pool settings applied for the configured database"""
+    options = dict(app_config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options['pool_pre_ping'] = app_config.get('DB_POOL_PRE_PING', True)
+    options['pool_recycle'] = app_config.get('DB_POOL_RECYCLE', 300)
+    if not app_config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        options['pool_size'] = app_config.get('DB_POOL_SIZE', 5)
+        options['max_overflow'] = app_config.get('DB_MAX_OVERFLOW', 10)
+        options['pool_timeout'] = app_config.get('DB_POOL_TIMEOUT', 30)
+    return options
 
 config = {
     'development': DevelopmentConfig,
@@ -1,17 +1,86 @@
-import mysql.connector
-from mysql.connector import Error
+import logging
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+from extensions import db
+from instrumentation import registry
+
+# Raw SQL access
+#
+# Code that needs a DB-API connection borrows one from the SQLAlchemy engine
+# pool instead of opening its own, so raw SQL and the ORM share DATABASE_URL,
+# the DB_POOL_* limits and pre-ping. Closing a borrowed connection returns it
+# to the pool. Pool utilization is exported at /metrics.
 
 def get_db_connection():
-    db_config = {
-        'host': 'localhost',
-        'user': 'your_username',  # Replace with your MySQL username
-        'password': 'your_password',  # Replace with your MySQL password
-        'database': 'placementhub'
-    }
+    """Borrow a DB-API connection from the engine pool; close() gives it back"""
     try:
-        connection = mysql.connector.connect(**db_config)
-        if connection.is_connected():
-            return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
+        return db.engine.raw_connection()
+    except Exception as e:
+        logging.error(f"Error connecting to database: {str(e)}")
         return None
+
+@contextmanager
+def db_cursor(commit=False):
+    """Yield a cursor on a pooled connection, committing or rolling back at the end"""
+    connection = db.engine.raw_connection()
+    cursor = connection.cursor()
+    try:
+        yield cursor
+        if commit:
+            connection.commit()
+        else:
+            connection.rollback()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+def get_pool_stats():
+    """Get utilization of each engine's connection pool"""
+    stats = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        entry = {'pool': type(pool).__name__}
+        # SQLite's single-connection pools don't track these
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if method is not None:
+                entry[name] = method()
+        stats[bind or 'default'] = entry
+    return stats
+
+# Pool metrics
+
+POOL_CONNECTIONS = registry.counter('db_pool_connections_created_total', 'New DB-API connections opened by the pool.')
+POOL_CHECKOUTS = registry.counter('db_pool_checkouts_total', 'Connections handed out by the pool.')
+POOL_INVALIDATED = registry.counter('db_pool_invalidated_total', 'Pooled connections discarded as broken or stale.')
+POOL_SIZE = registry.gauge('db_pool_size', 'Configured number of persistent connections.', ('bind',))
+POOL_CHECKED_OUT = registry.gauge('db_pool_checked_out', 'Connections currently in use.', ('bind',))
+POOL_CHECKED_IN = registry.gauge('db_pool_checked_in', 'Idle connections held by the pool.', ('bind',))
+POOL_OVERFLOW = registry.gauge('db_pool_overflow', 'Connections open beyond pool_size (negative while below it).',
+                               ('bind',))
+
+@event.listens_for(Pool, 'connect')
+def _pool_connect(dbapi_connection, connection_record):
+    POOL_CONNECTIONS.inc()
+
+@event.listens_for(Pool, 'checkout')
+def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKOUTS.inc()
+
+@event.listens_for(Pool, 'invalidate')
+def _pool_invalidate(dbapi_connection, connection_record, exception):
+    POOL_INVALIDATED.inc()
+
+def _collect_pool_stats():
+    gauges = {'size': POOL_SIZE, 'checkedout': POOL_CHECKED_OUT, 'checkedin': POOL_CHECKED_IN,
+              'overflow': POOL_OVERFLOW}
+    for bind, entry in get_pool_stats().items():
+        for name, gauge in gauges.items():
+            if name in entry:
+                gauge.set(entry[name], bind=bind)
+
+registry.register_collector(_collect_pool_stats)
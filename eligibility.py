@@ -0,0 +1,187 @@
+import re
+import json
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import Job, Company, Skill, JobSkill, JobBranch
+
+# Normalized job eligibility
+#
+# Job.eligible_branches and Job.skills_required stay as entered by the
+# recruiter; the job_branches and job_skills tables hold their parsed,
+# normalized form so eligibility filters are exact, indexed lookups rather
+# than substring scans. A job with no branch rows is open to every branch.
+
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'nodejs': 'node.js',
+    'node': 'node.js',
+    'golang': 'go',
+    'py': 'python',
+    'postgres': 'postgresql',
+    'ml': 'machine learning',
+    'c plus plus': 'c++',
+    'cpp': 'c++'
+}
+
+_SPLIT_RE = re.compile(r'[,;|\n]+')
+_SPACE_RE = re.compile(r'\s+')
+
+def parse_list(value):
+    """Parse a JSON array or a comma/semicolon separated string into a list of strings"""
+    if not value:
+        return []
+    value = value.strip()
+    if value.startswith('['):
+        try:
+            items = json.loads(value)
+            if isinstance(items, list):
+                return [str(item) for item in items if item is not None and str(item).strip()]
+        except ValueError:
+            pass
+    return [item for item in _SPLIT_RE.split(value) if item.strip()]
+
+def normalize_branch(branch):
+    return _SPACE_RE.sub(' ', (branch or '').strip()).lower()
+
+def normalize_skill(skill):
+    skill = _SPACE_RE.sub(' ', (skill or '').strip().strip('.')).lower()
+    return SKILL_ALIASES.get(skill, skill)
+
+def parse_branches(value):
+    return sorted({normalize_branch(b) for b in parse_list(value)} - {''})
+
+def parse_skills(value):
+    """Split free-text skills into a sorted list of normalized skill names"""
+    return sorted({normalize_skill(s) for s in parse_list(value)} - {''})
+
+def skill_ids(connection, names):
+    """Get skill ids for the given names, creating missing skills
+
+    Another transaction may insert the same new skill first. The insert then
+    fails on the unique name inside a savepoint, so only it is undone, and
+    the names are read again with a locking read, which sees rows committed
+    after this transaction's snapshot.
+    """
+    if not names:
+        return {}
+    skills = Skill.__table__
+    found = dict(connection.execute(
+        db.select(skills.c.name, skills.c.id).where(skills.c.name.in_(names))
+    ).all())
+    for _ in range(3):
+        missing = [name for name in names if name not in found]
+        if not missing:
+            return found
+        try:
+            with connection.begin_nested():
+                connection.execute(skills.insert(), [{'name': name} for name in missing])
+        except IntegrityError:
+            pass
+        found.update(connection.execute(
+            db.select(skills.c.name, skills.c.id).where(skills.c.name.in_(missing)).with_for_update(read=True)
+        ).all())
+    missing = [name for name in names if name not in found]
+    if missing:
+        raise RuntimeError(f"Could not create skills {missing}")
+    return found
+
+def sync_job_eligibility(connection, job_id, eligible_branches, skills_required):
+    """Replace the normalized branch and skill rows for a job"""
+    branches_table = JobBranch.__table__
+    job_skills_table = JobSkill.__table__
+
+    connection.execute(branches_table.delete().where(branches_table.c.job_id == job_id))
+    branches = parse_branches(eligible_branches)
+    if branches:
+        connection.execute(branches_table.insert(), [{'job_id': job_id, 'branch': b} for b in branches])
+
+    connection.execute(job_skills_table.delete().where(job_skills_table.c.job_id == job_id))
+    ids = skill_ids(connection, parse_skills(skills_required))
+    if ids:
+        connection.execute(job_skills_table.insert(),
+                           [{'job_id': job_id, 'skill_id': skill_id} for skill_id in ids.values()])
+
+def migrate_job_eligibility(only_missing=False):
+    """Populate job_branches and job_skills from the existing free-text columns
+
+    With only_missing=True just the jobs that list branches or skills but have
+    no rows for either yet are migrated, which is cheap enough for init-db.
+    """
+    connection = db.session.connection()
+    count = 0
+    query = db.session.query(Job.id, Job.eligible_branches, Job.skills_required)
+    if only_missing:
+        query = query.filter(
+            db.or_(db.func.coalesce(Job.eligible_branches, '') != '', db.func.coalesce(Job.skills_required, '') != ''),
+            ~db.exists().where(JobBranch.job_id == Job.id),
+            ~db.exists().where(JobSkill.job_id == Job.id)
+        )
+    rows = query.all() if only_missing else query.yield_per(1000)
+    for job_id, eligible_branches, skills_required in rows:
+        sync_job_eligibility(connection, job_id, eligible_branches, skills_required)
+        count += 1
+    db.session.commit()
+    return count
+
+def open_to_branch(branch):
+    """Filter clause for jobs open to a branch (exact match, or no restriction)"""
+    branch = normalize_branch(branch)
+    restricted = db.exists().where(JobBranch.job_id == Job.id)
+    matches = db.exists().where(JobBranch.job_id == Job.id, JobBranch.branch == branch)
+    return db.or_(~restricted, matches)
+
+def skill_filter(skill):
+    """Filter clause for jobs that list a given skill"""
+    return db.exists().where(
+        JobSkill.job_id == Job.id,
+        JobSkill.skill_id == Skill.id,
+        Skill.name == normalize_skill(skill)
+    )
+
+def eligible_jobs_query(student, now=None):
+    """Get a query of open jobs the student qualifies for by branch, CGPA and deadline"""
+    now = now or datetime.utcnow()
+    query = Job.query.filter_by(is_active=True)\
+        .join(Company).filter(Company.is_approved==True)\
+        .filter(open_to_branch(student.branch))\
+        .filter(db.or_(Job.application_deadline.is_(None), Job.application_deadline >= now))
+
+    if student.cgpa is not None:
+        query = query.filter(db.or_(Job.min_cgpa.is_(None), Job.min_cgpa <= student.cgpa))
+    else:
+        query = query.filter(db.or_(Job.min_cgpa.is_(None), Job.min_cgpa <= 0))
+    return query
+
+def is_eligible(student, job, now=None):
+    """Check a single job against a student without touching the database"""
+    now = now or datetime.utcnow()
+    branches = parse_branches(job.eligible_branches)
+    if branches and normalize_branch(student.branch) not in branches:
+        return False
+    if job.min_cgpa and (student.cgpa or 0) < job.min_cgpa:
+        return False
+    if job.application_deadline and job.application_deadline < now:
+        return False
+    return True
+
+# Maintenance hooks
+
+@event.listens_for(Job, 'after_insert')
+def _job_inserted(mapper, connection, target):
+    sync_job_eligibility(connection, target.id, target.eligible_branches, target.skills_required)
+
+@event.listens_for(Job, 'after_update')
+def _job_updated(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.eligible_branches.history.has_changes() or state.attrs.skills_required.history.has_changes():
+        sync_job_eligibility(connection, target.id, target.eligible_branches, target.skills_required)
+
+@event.listens_for(Job, 'after_delete')
+def _job_deleted(mapper, connection, target):
+    connection.execute(JobBranch.__table__.delete().where(JobBranch.__table__.c.job_id == target.id))
+    connection.execute(JobSkill.__table__.delete().where(JobSkill.__table__.c.job_id == target.id))
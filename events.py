@@ -0,0 +1,320 @@
+import json
+import time
+import queue
+import logging
+import itertools
+import threading
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from extensions import db
+from models import StreamEvent
+from instrumentation import registry
+
+# Live updates
+#
+# Browsers keep one server-sent events connection open at /api/stream and get
+# small deltas (new notifications, application status changes) pushed to them
+# instead of polling the dashboards. Routes publish to per-user and
+# per-company channels, and an event is only delivered once the transaction
+# that published it commits.
+#
+# With EVENT_BROKER=memory (the default outside a multi-worker Gunicorn) events
+# stay inside the process, which is enough for the development server or a
+# single worker. With
+# EVENT_BROKER=database they are written to stream_events as part of the
+# publishing transaction and one relay thread per process polls that table:
+# a local stand-in for a broker such as Redis pub/sub, so clients see every
+# event whichever worker they are connected to.
+
+HISTORY_SIZE = 100
+HISTORY_SECONDS = 600  # channels without events for this long drop their history
+SUBSCRIBER_QUEUE_SIZE = 100
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+def company_channel(company_id):
+    return f'company:{company_id}'
+
+class Subscription:
+    """One client's queue of events from a set of channels"""
+
+    def __init__(self, hub, channels, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.hub = hub
+        self.channels = channels
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # A client this far behind has to refetch instead
+            self.overflowed = True
+
+    def get(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+class EventHub:
+    """Fans events out to the subscriptions of this process
+
+    The last HISTORY_SIZE events of each channel are kept so a client that
+    reconnects with Last-Event-ID gets what it missed in between. Channels
+    are kept in order of their last event, and those idle for history_seconds
+    are dropped, so a channel per user doesn't pile up for good.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE, history_seconds=HISTORY_SECONDS):
+        self.history_size = history_size
+        self.history_seconds = history_seconds
+        self._subscriptions = defaultdict(set)
+        self._history = OrderedDict()  # channel -> (last event time, deque of events)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len({subscription for subscriptions in self._subscriptions.values()
+                        for subscription in subscriptions})
+
+    def subscribe(self, channels, last_event_id=None):
+        subscription = Subscription(self, list(channels))
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+            if last_event_id is not None:
+                for item in self._missed(subscription.channels, last_event_id):
+                    subscription.put(item)
+        return subscription
+
+    def _missed(self, channels, last_event_id):
+        return sorted(item for channel in channels
+                      for item in self._history.get(channel, (0, ()))[1] if item[0] > last_event_id)
+
+    def history(self, channels, last_event_id=None):
+        """Events after last_event_id still in history, and the id to ask from next time"""
+        with self._lock:
+            if last_event_id is None:
+                latest = [events[-1][0] for channel in channels
+                          for events in [self._history.get(channel, (0, ()))[1]] if events]
+                return [], max(latest, default=0)
+            missed = self._missed(channels, last_event_id)
+        return missed, missed[-1][0] if missed else last_event_id
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[channel]
+
+    def dispatch(self, channel, event_name, data, event_id=None):
+        now = time.monotonic()
+        with self._lock:
+            item = (event_id if event_id is not None else next(self._ids), event_name, data)
+            entry = self._history.pop(channel, None)
+            events = entry[1] if entry is not None else deque(maxlen=self.history_size)
+            events.append(item)
+            self._history[channel] = (now, events)
+            while True:
+                oldest = next(iter(self._history.values()))
+                if now - oldest[0] <= self.history_seconds:
+                    break
+                self._history.popitem(last=False)
+            for subscription in self._subscriptions.get(channel, ()):
+                subscription.put(item)
+
+    @property
+    def history_channels(self):
+        with self._lock:
+            return len(self._history)
+
+_hub = EventHub()
+
+def _broker():
+    return current_app.config.get('EVENT_BROKER', 'memory')
+
+def publish(channels, event_name, data):
+    """Publish an event on the current session; it is delivered after the caller commits"""
+    if isinstance(channels, str):
+        channels = [channels]
+    payload = json.dumps(data, default=str, separators=(',', ':'))
+    if _broker() == 'database':
+        now = datetime.utcnow()
+        db.session.execute(insert(StreamEvent), [
+            {'channel': channel, 'event': event_name, 'data': payload, 'created_at': now}
+            for channel in channels
+        ])
+        db.session.info['stream_events_written'] = True
+    else:
+        db.session.info.setdefault('pending_stream_events', []).extend(
+            (channel, event_name, payload) for channel in channels
+        )
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for channel, event_name, payload in session.info.pop('pending_stream_events', ()):
+        _hub.dispatch(channel, event_name, payload)
+    if session.info.pop('stream_events_written', False):
+        wake_event_relay()
+
+@event.listens_for(Session, 'after_rollback')
+def _session_rolled_back(session):
+    session.info.pop('pending_stream_events', None)
+    session.info.pop('stream_events_written', None)
+
+def subscribe(channels, last_event_id=None):
+    """Open a subscription for the current request, or None when this process is at capacity"""
+    if _hub.subscriber_count >= current_app.config.get('EVENT_STREAM_MAX_CLIENTS', 200):
+        return None
+    if _broker() == 'database':
+        start_event_relay(current_app._get_current_object())
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    return _hub.subscribe(channels, last_event_id)
+
+def recent_events(channels, last_event_id=None):
+    """Events a client without a stream missed since last_event_id, for polling instead"""
+    if _broker() == 'database':
+        start_event_relay(current_app._get_current_object())
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    return _hub.history(channels, last_event_id)
+
+def format_event(event_id, event_name, data):
+    return f'id: {event_id}\nevent: {event_name}\ndata: {data}\n\n'
+
+def event_stream(subscription, keepalive=15, timeout=300):
+    """Yield a subscription as server-sent events until timeout, then let the client reconnect"""
+    deadline = time.monotonic() + timeout
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            item = subscription.get(timeout=min(keepalive, remaining))
+            if subscription.overflowed:
+                yield 'event: resync\ndata: {}\n\n'
+                return
+            if item is None:
+                yield ': keepalive\n\n'
+            else:
+                yield format_event(*item)
+    finally:
+        subscription.close()
+
+# Database relay
+
+class EventRelay(threading.Thread):
+    """Background thread that moves events from stream_events into this process's hub"""
+
+    def __init__(self, app, hub, poll_interval=None):
+        super().__init__(name='event-relay', daemon=True)
+        self.app = app
+        self.hub = hub
+        self.poll_interval = poll_interval or app.config.get('EVENT_POLL_INTERVAL', 1)
+        self.retention = timedelta(seconds=app.config.get('EVENT_RETENTION_SECONDS', 3600))
+        self.overlap = timedelta(seconds=app.config.get('EVENT_OVERLAP_SECONDS', 30))
+        self.since = None
+        self._seen = {}
+        self._last_prune = 0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def wake(self):
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def poll(self):
+        """Relay events committed since the last poll; returns how many were new
+
+        Ids are handed out before commit, so a lower id can commit after a
+        higher one was relayed. Each poll therefore re-reads the last
+        EVENT_OVERLAP_SECONDS of events and skips the ids it already sent.
+        """
+        started = datetime.utcnow()
+        if self.since is None:
+            # Start from now; history before this process subscribed isn't replayed
+            self.since = started
+            return 0
+        rows = db.session.query(StreamEvent.id, StreamEvent.channel, StreamEvent.event,
+                                StreamEvent.data, StreamEvent.created_at)\
+            .filter(StreamEvent.created_at >= self.since - self.overlap)\
+            .order_by(StreamEvent.id).all()
+        relayed = 0
+        for row in rows:
+            if row.id not in self._seen:
+                self._seen[row.id] = row.created_at
+                self.hub.dispatch(row.channel, row.event, row.data, event_id=row.id)
+                relayed += 1
+        self.since = started
+        cutoff = started - 2 * self.overlap
+        for event_id in [i for i, created_at in self._seen.items() if created_at < cutoff]:
+            del self._seen[event_id]
+
+        if time.monotonic() - self._last_prune > 60:
+            self._last_prune = time.monotonic()
+            db.session.query(StreamEvent)\
+                .filter(StreamEvent.created_at < datetime.utcnow() - self.retention)\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        return relayed
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with self.app.app_context():
+                try:
+                    self.poll()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Event relay error: {str(e)}")
+                finally:
+                    db.session.remove()
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+
+_relay = None
+_relay_lock = threading.Lock()
+
+def start_event_relay(app):
+    """Start the stream_events relay thread once per process (again after a fork)"""
+    global _relay
+    if _relay is not None and _relay.is_alive():
+        return _relay
+    with _relay_lock:
+        if _relay is None or not _relay.is_alive():
+            _relay = EventRelay(app, _hub)
+            _relay.start()
+    return _relay
+
+def wake_event_relay():
+    if _relay is not None:
+        _relay.wake()
+
+# Stream metrics
+
+STREAM_CLIENTS = registry.gauge('event_stream_clients', 'Open server-sent event streams in this process.')
+HISTORY_CHANNELS = registry.gauge('event_history_channels', 'Channels with replay history in this process.')
+
+registry.register_collector(lambda: STREAM_CLIENTS.set(_hub.subscriber_count))
+registry.register_collector(lambda: HISTORY_CHANNELS.set(_hub.history_channels))
@@ -0,0 +1,15 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+from flask_mail import Mail
+from sqlalchemy.orm import DeclarativeBase
+
+# Extensions are created unbound and attached to an app in create_app(), so
+# models and services can be imported by CLI tools and workers without
+# building the web app.
+
+class Base(DeclarativeBase):
+    pass
+
+db = SQLAlchemy(model_class=Base)
+login_manager = LoginManager()
+mail = Mail()
@@ -0,0 +1,203 @@
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import uuid
+from flask import current_app
+from markupsafe import Markup
+from cache import TTLCache
+from instrumentation import registry
+
+# Dashboard fragment cache
+#
+# The dashboard widgets (recent applications, pending companies, a company's
+# jobs) look the same for everyone who shares their scope: all TPOs, or all
+# recruiters of one company. Each widget is rendered once into HTML and kept
+# under "<widget>:<scope>"; the dashboards only query and render a widget on a
+# miss. The routes that change what a widget shows invalidate it right after
+# they commit, and FRAGMENT_CACHE_TTL bounds how stale anything else can be.
+#
+# FRAGMENT_CACHE_BACKEND=memory (the default) keeps an LRU in each process, so
+# an invalidation only reaches the worker that made it and other workers catch
+# up within the TTL. FRAGMENT_CACHE_BACKEND=filesystem keeps one file per
+# fragment under FRAGMENT_CACHE_DIR: a local stand-in for a shared cache such
+# as memcached, so every worker on the host sees invalidations at once.
+# FRAGMENT_CACHE_BACKEND=none renders every time.
+#
+# Widgets render from partial templates next to the page templates:
+# tpo/_recent_applications.html, tpo/_pending_companies.html,
+# recruiter/_company_jobs.html and recruiter/_recent_applications.html.
+
+TPO_SCOPE = 'role:tpo'
+
+def company_scope(company_id):
+    return f'company:{company_id}'
+
+def fragment_key(widget, scope):
+    return f'{widget}:{scope}'
+
+class MemoryFragmentStore(TTLCache):
+    """Fragment store local to this process"""
+
+    def __init__(self, maxsize=1000):
+        super().__init__(maxsize=maxsize)
+        self._generations = {}
+
+    def generation(self, key):
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def bump(self, key):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def set(self, key, value, ttl=None, generation=None):
+        if generation is not None and self.generation(key) != generation:
+            return
+        super().set(key, value, ttl=ttl)
+        # An invalidation between the check and the write would be lost; look again
+        if generation is not None and self.generation(key) != generation:
+            self.delete(key)
+
+class FileFragmentStore:
+    """Fragment store shared by the processes of one host, one file per key
+
+    Next to each fragment a "<name>.gen" file holds a token that every
+    invalidation replaces, so any process can tell that the fragment it
+    just rendered was invalidated in the meantime.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _write(self, path, text):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            # Readers see the old file or the new one, never a partial write
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+    def get(self, key, default=None):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                expires_at = float(f.readline())
+                if expires_at and expires_at < time.time():
+                    return default
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return default
+
+    def generation(self, key):
+        try:
+            with open(self._path(key) + '.gen', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return ''
+
+    def bump(self, key):
+        self._write(self._path(key) + '.gen', uuid.uuid4().hex)
+
+    def set(self, key, value, ttl=None, generation=None):
+        expires_at = time.time() + ttl if ttl else 0
+        if generation is not None and self.generation(key) != generation:
+            return
+        self._write(self._path(key), f'{expires_at}\n{value}')
+        # An invalidation between the check and the write would be lost; look again
+        if generation is not None and self.generation(key) != generation:
+            self.delete(key)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+_memory_store = MemoryFragmentStore(maxsize=1000)
+_file_stores = {}
+_file_stores_lock = threading.Lock()
+
+def _store():
+    backend = current_app.config.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    if backend == 'none':
+        return None
+    if backend == 'filesystem':
+        directory = current_app.config['FRAGMENT_CACHE_DIR']
+        store = _file_stores.get(directory)
+        if store is None:
+            with _file_stores_lock:
+                store = _file_stores.setdefault(directory, FileFragmentStore(directory))
+        return store
+    return _memory_store
+
+def cached_fragment(widget, scope, render):
+    """Get a widget's HTML for a scope from the cache, calling render() to build it on a miss"""
+    store = _store()
+    if store is None:
+        return Markup(render())
+
+    key = fragment_key(widget, scope)
+    try:
+        html = store.get(key)
+    except OSError as e:
+        logging.error(f"Fragment cache read error for {key}: {str(e)}")
+        html = None
+    if html is not None:
+        FRAGMENT_REQUESTS.inc(widget=widget, result='hit')
+        return Markup(html)
+
+    FRAGMENT_REQUESTS.inc(widget=widget, result='miss')
+    try:
+        # A render that started before an invalidation isn't stored
+        generation = store.generation(key)
+    except OSError as e:
+        logging.error(f"Fragment cache read error for {key}: {str(e)}")
+        return Markup(render())
+    html = str(render())
+    try:
+        store.set(key, html, ttl=current_app.config.get('FRAGMENT_CACHE_TTL', 60), generation=generation)
+    except OSError as e:
+        logging.error(f"Fragment cache write error for {key}: {str(e)}")
+    return Markup(html)
+
+def invalidate_fragment(widget, *scopes):
+    """Drop a widget's cached HTML for the given scopes; call after the change commits"""
+    store = _store()
+    for scope in scopes:
+        key = fragment_key(widget, scope)
+        if store is not None:
+            try:
+                store.bump(key)
+                store.delete(key)
+            except OSError as e:
+                logging.error(f"Fragment cache invalidation error for {key}: {str(e)}")
+
+def invalidate_application_fragments(company_id):
+    """Invalidate the widgets an application change shows up in
+
+    Besides the recent application lists this is the company's job list,
+    which shows per-job application counts.
+    """
+    invalidate_fragment('recent_applications', TPO_SCOPE, company_scope(company_id))
+    invalidate_fragment('company_jobs', company_scope(company_id))
+
+# Cache metrics
+
+FRAGMENT_REQUESTS = registry.counter('fragment_cache_requests_total', 'Dashboard fragment cache lookups.',
+                                     ('widget', 'result'))
@@ -0,0 +1,51 @@
+import os
+import multiprocessing
+
+# Gunicorn settings for serving wsgi:app
+#
+# The app is imported once in the master (preload_app) and forked into the
+# workers, so code and read-only data are shared copy-on-write and workers
+# start quickly. Database connections must not cross the fork: each worker
+# drops the pool it inherited and opens its own connections on first use.
+
+# Serve the production configuration unless told otherwise, also when the app
+# is given as app:create_app() rather than wsgi:app
+os.environ.setdefault('FLASK_CONFIG', 'production')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ['true', 'on', '1']
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Each open /api/stream holds one of a gthread worker's threads for its whole
+# life, so by default half the threads stay free for ordinary requests. Async
+# workers (gevent, eventlet) aren't limited this way and keep the app default.
+if worker_class == 'gthread':
+    os.environ.setdefault('EVENT_STREAM_MAX_CLIENTS', str(max(threads // 2, 1)))
+
+# Workers only see each other's live events through the database broker
+if workers > 1:
+    os.environ.setdefault('EVENT_BROKER', 'database')
+
+def post_fork(server, worker):
+    """Discard database connections inherited from the master process"""
+    if not server.cfg.preload_app:
+        # The app is loaded after the fork, so nothing was inherited
+        return
+    from extensions import db
+    # The app the master preloaded, whatever the app target; importing
+    # wsgi here would build a second app with its own engines
+    app = server.app.wsgi()
+    with app.app_context():
+        # close=False leaves the parent's sockets alone and just stops this
+        # process from reusing them
+        for engine in db.engines.values():
+            engine.dispose(close=False)
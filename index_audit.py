@@ -0,0 +1,171 @@
+from datetime import datetime
+from sqlalchemy import inspect
+from extensions import db
+from models import (User, StudentProfile, Company, Job, Application, Notification, PlacementRecord, Event,
+                    Skill, ResumeSkill)
+
+# Query plan audit
+#
+# The queries behind the dashboards and list pages are registered here in the
+# same shape routes.py and stats.py build them. The index-audit command runs
+# EXPLAIN on each one and flags plans that read a whole table, so a missing
+# or unused index shows up before it shows up as a slow page.
+
+HOT_QUERIES = {}
+
+def hot_query(name):
+    """Register a function returning a query to check with index-audit"""
+    def decorator(func):
+        HOT_QUERIES[name] = func
+        return func
+    return decorator
+
+@hot_query('auth.login_by_email')
+def _login_by_email():
+    return User.query.filter_by(email='student@example.com').limit(1)
+
+@hot_query('student_dashboard.recent_applications')
+def _recent_applications():
+    return Application.query.filter_by(user_id=1).order_by(Application.applied_at.desc()).limit(5)
+
+@hot_query('student_dashboard.unread_notifications')
+def _unread_notifications():
+    return Notification.query.filter_by(user_id=1, is_read=False)\
+        .order_by(Notification.created_at.desc()).limit(5)
+
+@hot_query('notifications.feed')
+def _notification_feed():
+    return Notification.query.filter(Notification.user_id == 1)\
+        .order_by(Notification.created_at.desc(), Notification.id.desc()).limit(21)
+
+@hot_query('notifications.unread_count')
+def _unread_count():
+    return db.session.query(db.func.count(Notification.id))\
+        .filter(Notification.user_id == 1, Notification.is_read == False)
+
+@hot_query('student_dashboard.available_jobs')
+def _available_jobs():
+    return Job.query.filter_by(is_active=True)\
+        .join(Company).filter(Company.is_approved==True)\
+        .order_by(Job.created_at.desc()).limit(5)
+
+@hot_query('apply_job.existing_application')
+def _existing_application():
+    return Application.query.filter_by(user_id=1, job_id=1).limit(1)
+
+@hot_query('stats.application_status_counts')
+def _application_status_counts():
+    return db.session.query(Application.status, db.func.count(Application.id))\
+        .filter(Application.user_id == 1).group_by(Application.status)
+
+@hot_query('stats.company_job_stats')
+def _company_job_stats():
+    return db.session.query(Application.job_id, Application.status, db.func.count(Application.id))\
+        .join(Job, Application.job_id == Job.id).filter(Job.company_id == 1)\
+        .group_by(Application.job_id, Application.status)
+
+@hot_query('tpo_dashboard.recent_applications')
+def _tpo_recent_applications():
+    return Application.query.order_by(Application.applied_at.desc()).limit(10)
+
+@hot_query('tpo_dashboard.pending_companies')
+def _pending_companies():
+    return Company.query.filter_by(is_approved=False).order_by(Company.created_at.desc()).limit(5)
+
+@hot_query('tpo_dashboard.upcoming_events')
+def _upcoming_events():
+    return Event.query.filter(Event.event_date >= datetime.utcnow()).order_by(Event.event_date.asc()).limit(5)
+
+@hot_query('tpo_students.page')
+def _tpo_students():
+    return User.query.filter_by(role='student', is_active=True)\
+        .join(StudentProfile).filter(StudentProfile.branch == 'CSE')\
+        .order_by(StudentProfile.created_at.desc(), StudentProfile.id.desc()).limit(21)
+
+@hot_query('recruiter_dashboard.company_jobs')
+def _company_jobs():
+    return Job.query.filter_by(company_id=1)
+
+@hot_query('recruiter_dashboard.recent_applications')
+def _recruiter_recent_applications():
+    return Application.query.join(Job).filter(Job.company_id == 1)\
+        .order_by(Application.applied_at.desc()).limit(10)
+
+@hot_query('recruiter_jobs.page')
+def _recruiter_jobs():
+    return Job.query.filter_by(company_id=1).order_by(Job.created_at.desc(), Job.id.desc()).limit(21)
+
+@hot_query('resume_search.skill_matches')
+def _resume_skill_matches():
+    matches = db.func.count(ResumeSkill.skill_id).label('matches')
+    return db.session.query(ResumeSkill.student_id, matches)\
+        .join(Skill, Skill.id == ResumeSkill.skill_id)\
+        .filter(Skill.name.in_(['python', 'sql']))\
+        .group_by(ResumeSkill.student_id)\
+        .order_by(matches.desc(), ResumeSkill.student_id).limit(20)
+
+@hot_query('update_application_status.existing_placement')
+def _existing_placement():
+    return PlacementRecord.query.filter_by(student_id=1, job_id=1).limit(1)
+
+def _explain(connection, statement):
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = {key: value.isoformat(' ') if isinstance(value, datetime) else value
+              for key, value in compiled.construct_params().items()}
+    if compiled.positional:
+        params = tuple(params[key] for key in compiled.positiontup)
+
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = connection.exec_driver_sql(prefix + str(compiled), params).all()
+    if dialect.name == 'sqlite':
+        return [row[-1] for row in rows]
+    return [' '.join(str(value) for value in row) for row in rows]
+
+def _full_scans(dialect_name, plan):
+    """Get the plan lines that read a whole table"""
+    if dialect_name == 'sqlite':
+        # "SCAN t USING INDEX ..." walks an index; a bare "SCAN t" reads the table
+        return [line for line in plan
+                if line.startswith('SCAN ') and 'USING' not in line and 'CONSTANT ROW' not in line]
+    if dialect_name == 'postgresql':
+        return [line for line in plan if 'Seq Scan' in line]
+    if dialect_name in ('mysql', 'mariadb'):
+        return [line for line in plan if ' ALL ' in f' {line} ']
+    return []
+
+def audit_hot_queries(names=None):
+    """Run EXPLAIN for the registered hot queries
+
+    Returns a list of (name, plan_lines, full_scan_lines, temp_sort) tuples.
+    """
+    connection = db.session.connection()
+    dialect_name = connection.dialect.name
+    results = []
+    for name, build in HOT_QUERIES.items():
+        if names and name not in names:
+            continue
+        plan = _explain(connection, build().statement)
+        temp_sort = any('TEMP B-TREE' in line for line in plan)
+        results.append((name, plan, _full_scans(dialect_name, plan), temp_sort))
+    db.session.rollback()
+    return results
+
+def create_missing_indexes():
+    """Create declared indexes that don't exist yet on already-created tables
+
+    db.create_all() only creates indexes together with new tables, so
+    databases created before an index was declared need this to pick it up.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    return created
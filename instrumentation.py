@@ -0,0 +1,234 @@
+import re
+import hmac
+import time
+import logging
+import threading
+from collections import Counter
+from flask import g, request, current_app, has_request_context, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request instrumentation
+#
+# SQLAlchemy engine hooks count every statement and its time against the
+# request that issued it. When the request finishes, its latency and query
+# totals are folded into per-endpoint metrics served at /metrics in the
+# Prometheus text format. Requests that go over QUERY_BUDGET, or that repeat
+# the same statement N_PLUS_ONE_THRESHOLD times (the usual sign of a lazy
+# load in a loop), are logged as warnings. Metrics are per process.
+# The endpoint is off unless METRICS_ENDPOINT_ENABLED is set, and should be
+# guarded with METRICS_TOKEN wherever it is reachable from outside.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class Metric:
+    """A labelled metric holding one value (or histogram) per label combination"""
+
+    def __init__(self, name, help_text, kind, labels=(), buckets=None):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labels = labels
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][i] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def samples(self):
+        with self._lock:
+            return [(key, dict(value) if isinstance(value, dict) else value)
+                    for key, value in sorted(self._values.items())]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Metric(name, help_text, 'counter', labels)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labels=()):
+        metric = Metric(name, help_text, 'gauge', labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Metric(name, help_text, 'histogram', labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """Add a function that refreshes gauges right before metrics are rendered"""
+        self._collectors.append(collect)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                logging.error(f"Metrics collector failed: {str(e)}")
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for key, value in metric.samples():
+                if metric.kind != 'histogram':
+                    lines.append(f'{metric.name}{_format_labels(metric.labels, key)} {value}')
+                    continue
+                for bound, count in zip(metric.buckets, value['buckets']):
+                    labels = _format_labels(metric.labels, key, [('le', bound)])
+                    lines.append(f'{metric.name}_bucket{labels} {count}')
+                labels = _format_labels(metric.labels, key, [('le', '+Inf')])
+                lines.append(f'{metric.name}_bucket{labels} {value["count"]}')
+                lines.append(f'{metric.name}_sum{_format_labels(metric.labels, key)} {value["sum"]}')
+                lines.append(f'{metric.name}_count{_format_labels(metric.labels, key)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter('http_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status'))
+REQUEST_LATENCY = registry.histogram('http_request_duration_seconds', 'Time spent handling a request.',
+                                     ('endpoint',))
+REQUEST_QUERIES = registry.histogram('http_request_db_queries', 'Database queries issued per request.',
+                                     ('endpoint',), buckets=QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = registry.counter('http_request_db_seconds_total', 'Time spent in SQL per endpoint.',
+                                   ('endpoint',))
+DB_QUERIES = registry.counter('db_queries_total', 'Database queries issued, in or outside requests.')
+BUDGET_EXCEEDED = registry.counter('http_request_query_budget_exceeded_total',
+                                   'Requests that issued more queries than QUERY_BUDGET.', ('endpoint',))
+N_PLUS_ONE = registry.counter('http_request_repeated_queries_total',
+                              'Requests that repeated one statement N_PLUS_ONE_THRESHOLD times or more.',
+                              ('endpoint',))
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+class RequestMetrics:
+    """Query statistics for the request in progress"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold):
+        return [(statement, count) for statement, count in self.statements.most_common()
+                if count >= threshold]
+
+def get_request_metrics():
+    """Get the metrics of the current request, or None outside a request"""
+    if has_request_context():
+        return g.get('_request_metrics')
+    return None
+
+# Engine hooks
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    DB_QUERIES.inc()
+    metrics = get_request_metrics()
+    if metrics is not None:
+        metrics.query_count += 1
+        metrics.query_time += elapsed
+        metrics.statements[statement] += 1
+
+@event.listens_for(Engine, 'handle_error')
+def _cursor_execute_failed(context):
+    starts = context.connection.info.get('query_start_time') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+# Request hooks
+
+def _start_request():
+    g._request_metrics = RequestMetrics()
+
+def _finish_request(response):
+    metrics = get_request_metrics()
+    if metrics is None or request.endpoint == 'metrics':
+        return response
+
+    endpoint = request.endpoint or 'unmatched'
+    elapsed = time.perf_counter() - metrics.started
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    REQUEST_LATENCY.observe(elapsed, endpoint=endpoint)
+    REQUEST_QUERIES.observe(metrics.query_count, endpoint=endpoint)
+    REQUEST_DB_TIME.inc(metrics.query_time, endpoint=endpoint)
+
+    budget = current_app.config.get('QUERY_BUDGET', 0)
+    if budget and metrics.query_count > budget:
+        BUDGET_EXCEEDED.inc(endpoint=endpoint)
+        logging.warning(f"Query budget exceeded on {endpoint}: {metrics.query_count} queries "
+                        f"(budget {budget}), {metrics.query_time * 1000:.1f}ms in SQL")
+
+    repeated = metrics.repeated(current_app.config.get('N_PLUS_ONE_THRESHOLD', 10))
+    if repeated:
+        N_PLUS_ONE.inc(endpoint=endpoint)
+        statement, count = repeated[0]
+        logging.warning(f"Possible N+1 on {endpoint}: statement ran {count} times: "
+                        f"{_WHITESPACE_RE.sub(' ', statement)[:300]}")
+
+    if current_app.config.get('QUERY_COUNT_HEADER'):
+        response.headers['X-Query-Count'] = str(metrics.query_count)
+        response.headers['Server-Timing'] = f'db;dur={metrics.query_time * 1000:.1f}, app;dur={elapsed * 1000:.1f}'
+    return response
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def init_instrumentation(app):
+    """Install the request hooks and the /metrics endpoint on an app"""
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if app.config.get('METRICS_ENDPOINT_ENABLED', False):
+        app.add_url_rule('/metrics', 'metrics', metrics_view)
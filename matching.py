@@ -0,0 +1,482 @@
+import time
+import threading
+import logging
+from datetime import datetime
+import numpy as np
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models import Job, Company, StudentProfile
+from eligibility import parse_skills, parse_branches, normalize_branch
+from changefeed import ChangeReader, JOB, STUDENT, COMPANY
+
+# Student-job match scoring
+#
+# Skills are encoded as a sparse bag-of-skills: each student is a row of skill
+# indices, each job a column of a dense (skills x jobs) weight matrix in which
+# a required skill carries 1/len(required skills). Students are densified a
+# batch at a time and multiplied by that matrix, giving for every job the
+# fraction of its required skills the student has.
+#
+#   score = SKILL_WEIGHT * coverage + CGPA_WEIGHT * cgpa / 10, 0 if ineligible
+#
+# The engine keeps the top MATCH_TOP_N jobs per student and candidates per
+# job. A full rebuild scores students in batches; a new or edited job only
+# recomputes its own column, and a profile edit only recomputes its own row.
+#
+# Every worker holds its own engine. Committed changes reach it through the
+# change feed (see changefeed.py), which a background thread reads after
+# building the engine at startup, so requests neither pay for the build nor
+# see another worker's changes late or a rolled back write at all.
+
+SKILL_WEIGHT = 0.8
+CGPA_WEIGHT = 0.2
+NO_SKILLS_COVERAGE = 0.5  # jobs that list no skills are a neutral match
+MATCH_TOP_N = 50
+BATCH_SIZE = 512
+REBUILD_THRESHOLD = 100  # changed rows in one refresh above which a rebuild is cheaper
+NO_DEADLINE = np.inf
+
+def _timestamp(value):
+    return NO_DEADLINE if value is None else (value - datetime(1970, 1, 1)).total_seconds()
+
+class MatchEngine:
+    def __init__(self, top_n=MATCH_TOP_N):
+        self.top_n = top_n
+        self.loaded = False
+        self.built_at = None
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._changes = ChangeReader()
+        self._reset()
+
+    def _reset(self):
+        self.vocabulary = {}
+        self.branches = {}
+
+        self.student_ids = np.zeros(0, dtype=np.int64)
+        self.student_index = {}
+        self.student_skills = []
+        self.student_cgpa = np.zeros(0, dtype=np.float32)
+        self.student_branch = np.zeros(0, dtype=np.int32)
+        self.student_active = np.zeros(0, dtype=bool)
+
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.job_index = {}
+        self.job_weights = np.zeros((0, 0), dtype=np.float32)
+        self.job_no_skills = np.zeros(0, dtype=bool)
+        self.job_min_cgpa = np.zeros(0, dtype=np.float32)
+        self.job_open = np.zeros(0, dtype=bool)
+        self.job_branch_mask = np.zeros((0, 0), dtype=bool)
+        self.job_active = np.zeros(0, dtype=bool)
+        self.job_deadline = np.zeros(0, dtype=np.float64)  # seconds since the epoch, NO_DEADLINE if none
+
+        self.top_jobs = np.zeros((0, self.top_n), dtype=np.int32)
+        self.top_job_scores = np.zeros((0, self.top_n), dtype=np.float32)
+        self.top_candidates = np.zeros((0, self.top_n), dtype=np.int32)
+        self.top_candidate_scores = np.zeros((0, self.top_n), dtype=np.float32)
+
+    # Encoding
+
+    def _skill_index(self, name):
+        index = self.vocabulary.get(name)
+        if index is None:
+            index = self.vocabulary[name] = len(self.vocabulary)
+            if self.job_weights.shape[0] < len(self.vocabulary):
+                grow = np.zeros((len(self.vocabulary) - self.job_weights.shape[0], self.job_weights.shape[1]),
+                                dtype=np.float32)
+                self.job_weights = np.vstack([self.job_weights, grow])
+        return index
+
+    def _branch_index(self, branch):
+        branch = normalize_branch(branch)
+        index = self.branches.get(branch)
+        if index is None:
+            index = self.branches[branch] = len(self.branches)
+            grow = np.zeros((1, self.job_branch_mask.shape[1]), dtype=bool)
+            self.job_branch_mask = np.vstack([self.job_branch_mask, grow])
+        return index
+
+    def _encode_student(self, skills):
+        return np.array(sorted({self._skill_index(s) for s in parse_skills(skills)}), dtype=np.int32)
+
+    def _job_column(self, job):
+        skills = [self._skill_index(s) for s in parse_skills(job.skills_required)]
+        column = np.zeros(self.job_weights.shape[0], dtype=np.float32)
+        if skills:
+            column[skills] = 1.0 / len(skills)
+        branches = [self._branch_index(b) for b in parse_branches(job.eligible_branches)]
+        branch_column = np.zeros(self.job_branch_mask.shape[0], dtype=bool)
+        branch_column[branches] = True
+        return column, not skills, not branches, branch_column
+
+    # Scoring
+
+    def _score_students(self, rows, job_slice=slice(None)):
+        """Score a set of student rows against jobs, returning a (students x jobs) array"""
+        weights = self.job_weights[:, job_slice]
+        n_jobs = weights.shape[1]
+        scores = np.zeros((len(rows), n_jobs), dtype=np.float32)
+
+        # Densify the batch's sparse skill rows and let BLAS do the sums
+        lengths = np.array([len(self.student_skills[r]) for r in rows], dtype=np.int64)
+        if lengths.sum() and n_jobs:
+            batch = np.zeros((len(rows), weights.shape[0]), dtype=np.float32)
+            batch[np.repeat(np.arange(len(rows)), lengths),
+                  np.concatenate([self.student_skills[r] for r in rows])] = 1.0
+            scores = batch @ weights
+
+        scores[:, self.job_no_skills[job_slice]] = NO_SKILLS_COVERAGE
+        scores *= SKILL_WEIGHT
+
+        cgpa = self.student_cgpa[rows]
+        scores += (CGPA_WEIGHT * np.clip(cgpa, 0, 10) / 10)[:, None]
+
+        eligible = (cgpa[:, None] >= self.job_min_cgpa[job_slice][None, :])
+        branch_ok = self.job_branch_mask[self.student_branch[rows]][:, job_slice] | self.job_open[job_slice][None, :]
+        eligible &= branch_ok & self.job_active[job_slice][None, :] & self.student_active[rows][:, None]
+        scores[~eligible] = 0
+        return scores
+
+    @staticmethod
+    def _top_n(scores, n, axis):
+        """Get (indices, scores) of the n best entries along an axis, best first"""
+        size = scores.shape[axis]
+        if size == 0:
+            shape = list(scores.shape)
+            shape[axis] = n
+            return np.full(shape, -1, dtype=np.int32), np.zeros(shape, dtype=np.float32)
+        k = min(n, size)
+        part = np.argpartition(-scores, k - 1, axis=axis).take(range(k), axis=axis)
+        part_scores = np.take_along_axis(scores, part, axis=axis)
+        order = np.argsort(-part_scores, axis=axis, kind='stable')
+        top = np.take_along_axis(part, order, axis=axis).astype(np.int32)
+        top_scores = np.take_along_axis(part_scores, order, axis=axis)
+        if k < n:
+            pad = list(scores.shape)
+            pad[axis] = n - k
+            top = np.concatenate([top, np.full(pad, -1, dtype=np.int32)], axis=axis)
+            top_scores = np.concatenate([top_scores, np.zeros(pad, dtype=np.float32)], axis=axis)
+        return top, top_scores
+
+    @staticmethod
+    def _merge_top(indices_a, scores_a, indices_b, scores_b, n):
+        """Merge two best-first top lists row-wise"""
+        indices = np.concatenate([indices_a, indices_b], axis=1)
+        scores = np.concatenate([scores_a, scores_b], axis=1)
+        scores = np.where(indices < 0, -1.0, scores).astype(np.float32)
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :n]
+        return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+    # Building
+
+    def rebuild(self):
+        """Load all profiles and open jobs and compute the full score matrix"""
+        started = datetime.utcnow()
+        # Changes committed while loading are applied by the next refresh
+        self._changes.reset()
+        students = db.session.query(StudentProfile.id, StudentProfile.skills, StudentProfile.cgpa,
+                                    StudentProfile.branch).order_by(StudentProfile.id).all()
+        jobs = db.session.query(Job.id, Job.skills_required, Job.eligible_branches, Job.min_cgpa,
+                                Job.application_deadline)\
+            .filter(Job.is_active==True)\
+            .join(Company).filter(Company.is_approved==True)\
+            .filter(db.or_(Job.application_deadline.is_(None), Job.application_deadline >= datetime.utcnow()))\
+            .order_by(Job.id).all()
+
+        with self._lock:
+            self._reset()
+            self.student_ids = np.array([s.id for s in students], dtype=np.int64)
+            self.student_index = {s.id: row for row, s in enumerate(students)}
+            self.student_skills = [self._encode_student(s.skills) for s in students]
+            self.student_cgpa = np.array([s.cgpa or 0 for s in students], dtype=np.float32)
+            self.student_branch = np.array([self._branch_index(s.branch) for s in students], dtype=np.int32)
+            self.student_active = np.ones(len(students), dtype=bool)
+
+            # Register every skill and branch first so all job columns have the same length
+            for job in jobs:
+                for skill in parse_skills(job.skills_required):
+                    self._skill_index(skill)
+                for branch in parse_branches(job.eligible_branches):
+                    self._branch_index(branch)
+            self.job_weights = np.zeros((len(self.vocabulary), 0), dtype=np.float32)
+            self.job_branch_mask = np.zeros((len(self.branches), 0), dtype=bool)
+
+            columns = [self._job_column(job) for job in jobs]
+            n_jobs = len(jobs)
+            self.job_ids = np.array([job.id for job in jobs], dtype=np.int64)
+            self.job_index = {job.id: col for col, job in enumerate(jobs)}
+            self.job_min_cgpa = np.array([job.min_cgpa or 0 for job in jobs], dtype=np.float32)
+            self.job_active = np.ones(n_jobs, dtype=bool)
+            self.job_deadline = np.array([_timestamp(job.application_deadline) for job in jobs], dtype=np.float64)
+            if columns:
+                self.job_weights = np.stack([c[0] for c in columns], axis=1)
+                self.job_no_skills = np.array([c[1] for c in columns], dtype=bool)
+                self.job_open = np.array([c[2] for c in columns], dtype=bool)
+                self.job_branch_mask = np.stack([c[3] for c in columns], axis=1)
+
+            n_students = len(students)
+            self.top_jobs = np.full((n_students, self.top_n), -1, dtype=np.int32)
+            self.top_job_scores = np.zeros((n_students, self.top_n), dtype=np.float32)
+            self.top_candidates = np.full((n_jobs, self.top_n), -1, dtype=np.int32)
+            self.top_candidate_scores = np.zeros((n_jobs, self.top_n), dtype=np.float32)
+
+            for start in range(0, n_students, BATCH_SIZE):
+                rows = list(range(start, min(start + BATCH_SIZE, n_students)))
+                scores = self._score_students(rows)
+                self.top_jobs[rows], self.top_job_scores[rows] = self._top_n(scores, self.top_n, axis=1)
+
+                candidates, candidate_scores = self._top_n(scores.T, self.top_n, axis=1)
+                candidates = np.where(candidates >= 0, candidates + start, -1).astype(np.int32)
+                self.top_candidates, self.top_candidate_scores = self._merge_top(
+                    self.top_candidates, self.top_candidate_scores, candidates, candidate_scores, self.top_n
+                )
+            self.loaded = True
+            self.built_at = time.monotonic()
+
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        logging.info(f"Match engine rebuilt: {len(students)} students x {len(jobs)} jobs in {elapsed:.2f}s")
+
+    def _append_job(self, job):
+        column, no_skills, is_open, branch_column = self._job_column(job)
+        self.job_index[job.id] = len(self.job_ids)
+        self.job_ids = np.append(self.job_ids, job.id)
+        self.job_weights = np.hstack([self.job_weights, column[:, None]])
+        self.job_no_skills = np.append(self.job_no_skills, no_skills)
+        self.job_min_cgpa = np.append(self.job_min_cgpa, np.float32(job.min_cgpa or 0))
+        self.job_open = np.append(self.job_open, is_open)
+        self.job_branch_mask = np.hstack([self.job_branch_mask, branch_column[:, None]])
+        self.job_active = np.append(self.job_active, True)
+        self.job_deadline = np.append(self.job_deadline, _timestamp(job.application_deadline))
+        return self.job_index[job.id]
+
+    # Incremental updates
+
+    def update_job(self, job):
+        """Score a single new or edited job against every student"""
+        with self._lock:
+            if not self.loaded:
+                return
+            is_open = job.is_active and job.company is not None and job.company.is_approved and \
+                (job.application_deadline is None or job.application_deadline >= datetime.utcnow())
+            col = self.job_index.get(job.id)
+            if col is None:
+                if not is_open:
+                    return
+                col = self._append_job(job)
+                self.top_candidates = np.vstack([self.top_candidates, np.full((1, self.top_n), -1, dtype=np.int32)])
+                self.top_candidate_scores = np.vstack([self.top_candidate_scores,
+                                                       np.zeros((1, self.top_n), dtype=np.float32)])
+            else:
+                column, no_skills, open_to_all, branch_column = self._job_column(job)
+                self.job_weights[:, col] = column
+                self.job_no_skills[col] = no_skills
+                self.job_min_cgpa[col] = job.min_cgpa or 0
+                self.job_open[col] = open_to_all
+                self.job_branch_mask[:, col] = branch_column
+                self.job_active[col] = bool(is_open)
+                self.job_deadline[col] = _timestamp(job.application_deadline)
+
+            rows = list(range(len(self.student_ids)))
+            scores = self._score_students(rows, slice(col, col + 1))[:, 0] if rows else np.zeros(0, dtype=np.float32)
+
+            # Candidates for this job
+            candidates, candidate_scores = self._top_n(scores[None, :], self.top_n, axis=1)
+            self.top_candidates[col], self.top_candidate_scores[col] = candidates[0], candidate_scores[0]
+
+            # Drop the job's old entries from every student list, then merge the new scores
+            stale = self.top_jobs == col
+            self.top_jobs[stale] = -1
+            self.top_job_scores[stale] = 0
+            if rows:
+                self.top_jobs, self.top_job_scores = self._merge_top(
+                    self.top_jobs, self.top_job_scores,
+                    np.full((len(rows), 1), col, dtype=np.int32), scores[:, None], self.top_n
+                )
+                self.top_jobs[self.top_job_scores <= 0] = -1
+
+    def update_student(self, student):
+        """Score a single new or edited profile against every job"""
+        with self._lock:
+            if not self.loaded:
+                return
+            row = self.student_index.get(student.id)
+            if row is None:
+                row = self.student_index[student.id] = len(self.student_ids)
+                self.student_ids = np.append(self.student_ids, student.id)
+                self.student_skills.append(np.zeros(0, dtype=np.int32))
+                self.student_cgpa = np.append(self.student_cgpa, np.float32(0))
+                self.student_branch = np.append(self.student_branch, np.int32(0))
+                self.student_active = np.append(self.student_active, True)
+                self.top_jobs = np.vstack([self.top_jobs, np.full((1, self.top_n), -1, dtype=np.int32)])
+                self.top_job_scores = np.vstack([self.top_job_scores, np.zeros((1, self.top_n), dtype=np.float32)])
+
+            self.student_skills[row] = self._encode_student(student.skills)
+            self.student_cgpa[row] = student.cgpa or 0
+            self.student_branch[row] = self._branch_index(student.branch)
+            self.student_active[row] = True
+
+            scores = self._score_students([row])
+            top, top_scores = self._top_n(scores, self.top_n, axis=1)
+            self.top_jobs[row], self.top_job_scores[row] = top[0], top_scores[0]
+
+            # Replace this student's entries in every job's candidate list
+            stale = self.top_candidates == row
+            self.top_candidates[stale] = -1
+            self.top_candidate_scores[stale] = 0
+            if len(self.job_ids):
+                self.top_candidates, self.top_candidate_scores = self._merge_top(
+                    self.top_candidates, self.top_candidate_scores,
+                    np.full((len(self.job_ids), 1), row, dtype=np.int32), scores[0][:, None], self.top_n
+                )
+                self.top_candidates[self.top_candidate_scores <= 0] = -1
+
+    def remove_job(self, job_id):
+        with self._lock:
+            col = self.job_index.get(job_id)
+            if col is not None:
+                self.job_active[col] = False
+
+    def remove_student(self, student_id):
+        """Drop a deleted profile from every job's candidate list"""
+        with self._lock:
+            row = self.student_index.get(student_id)
+            if row is None:
+                return
+            self.student_active[row] = False
+            self.top_jobs[row] = -1
+            self.top_job_scores[row] = 0
+            stale = self.top_candidates == row
+            self.top_candidates[stale] = -1
+            self.top_candidate_scores[stale] = 0
+
+    # Change feed
+
+    def refresh(self, rebuild=True, max_age=None):
+        """Apply committed changes from the change feed, rebuilding when it can't
+
+        With rebuild=False a missing or outdated engine is left for the
+        background thread to build; max_age (seconds) forces a rebuild of an
+        older one. Only one thread refreshes at a time.
+        """
+        if not self._refresh_lock.acquire(blocking=rebuild and not self.loaded):
+            return
+        try:
+            changes = self._changes.changes() if self.loaded else None
+            if max_age and self.built_at is not None and time.monotonic() - self.built_at > max_age:
+                changes = None
+            if changes and changes.get(COMPANY):
+                # Approval changes open or close every job of the company
+                company_jobs = db.session.query(Job.id).filter(Job.company_id.in_(changes[COMPANY]))
+                changes.setdefault(JOB, set()).update(job_id for (job_id,) in company_jobs)
+            # Row by row, a bulk change would hold the lock through one full merge per row
+            if changes is None or len(changes.get(JOB, ())) + len(changes.get(STUDENT, ())) > REBUILD_THRESHOLD:
+                if rebuild:
+                    self.rebuild()
+                return
+            if changes.get(JOB):
+                self._apply(Job, changes[JOB], self.update_job, self.remove_job, Job.company)
+            if changes.get(STUDENT):
+                self._apply(StudentProfile, changes[STUDENT], self.update_student, self.remove_student)
+        finally:
+            self._refresh_lock.release()
+
+    @staticmethod
+    def _apply(model, ids, update, remove, *related):
+        rows = model.query.filter(model.id.in_(ids)).options(*[joinedload(r) for r in related])\
+            .execution_options(populate_existing=True).all()
+        for row in rows:
+            update(row)
+        for missing in set(ids) - {row.id for row in rows}:
+            remove(missing)
+
+    # Serving
+
+    def top_jobs_for_student(self, student_id, limit=10):
+        """Get [(job_id, score)] best matches for a student profile
+
+        Deadlines are checked here, since passing one doesn't change the job.
+        """
+        now = _timestamp(datetime.utcnow())
+        with self._lock:
+            row = self.student_index.get(student_id)
+            if row is None:
+                return []
+            return [(int(self.job_ids[j]), float(score))
+                    for j, score in zip(self.top_jobs[row], self.top_job_scores[row])
+                    if j >= 0 and score > 0 and self.job_active[j] and self.job_deadline[j] >= now][:limit]
+
+    def top_candidates_for_job(self, job_id, limit=10):
+        """Get [(student_profile_id, score)] best candidates for a job"""
+        with self._lock:
+            col = self.job_index.get(job_id)
+            if col is None or not self.job_active[col] or self.job_deadline[col] < _timestamp(datetime.utcnow()):
+                return []
+            return [(int(self.student_ids[s]), float(score))
+                    for s, score in zip(self.top_candidates[col], self.top_candidate_scores[col])
+                    if s >= 0 and score > 0][:limit]
+
+_engine = MatchEngine()
+
+def get_match_engine():
+    """Get the process-wide match engine with committed changes applied
+
+    The background thread builds it; without one the first caller does.
+    """
+    _engine.refresh(rebuild=not (_refresher is not None and _refresher.is_alive()))
+    return _engine
+
+def recommended_jobs(student, limit=10):
+    """Get the best matching open jobs for a student, best first"""
+    matches = get_match_engine().top_jobs_for_student(student.id, limit)
+    scores = dict(matches)
+    jobs = Job.query.filter(Job.id.in_(scores)).all() if scores else []
+    return sorted(((job, scores[job.id]) for job in jobs), key=lambda item: -item[1])
+
+def recommended_candidates(job, limit=10):
+    """Get the best matching student profiles for a job, best first"""
+    matches = get_match_engine().top_candidates_for_job(job.id, limit)
+    scores = dict(matches)
+    students = StudentProfile.query.filter(StudentProfile.id.in_(scores)).all() if scores else []
+    return sorted(((student, scores[student.id]) for student in students), key=lambda item: -item[1])
+
+# Background build and refresh
+
+class MatchRefresher(threading.Thread):
+    """Background thread that builds the engine and then follows the change feed"""
+
+    def __init__(self, app, poll_interval=None):
+        super().__init__(name='match-refresh', daemon=True)
+        self.app = app
+        self.poll_interval = poll_interval or app.config.get('CHANGE_POLL_INTERVAL', 2)
+        # Also drops jobs whose deadline passed from the top lists, freeing their slots
+        self.rebuild_interval = app.config.get('MATCH_REBUILD_INTERVAL', 3600)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with self.app.app_context():
+                try:
+                    _engine.refresh(max_age=self.rebuild_interval)
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Match engine refresh error: {str(e)}")
+                finally:
+                    db.session.remove()
+            self._stop_event.wait(self.poll_interval)
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+def start_match_refresher(app):
+    """Start the refresh thread once per process (again after a fork)"""
+    global _refresher
+    if _refresher is not None and _refresher.is_alive():
+        return _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = MatchRefresher(app)
+            _refresher.start()
+    return _refresher
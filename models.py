@@ -1,10 +1,13 @@
 from datetime import datetime
-from app import db
+from extensions import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_role_active', 'role', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -33,6 +36,11 @@ class User(UserMixin, db.Model):
 
 class StudentProfile(db.Model):
     __tablename__ = 'student_profiles'
+    __table_args__ = (
+        db.Index('ix_student_profiles_user_id', 'user_id'),
+        db.Index('ix_student_profiles_branch_status', 'branch', 'placement_status'),
+        db.Index('ix_student_profiles_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -59,11 +67,29 @@ class StudentProfile(db.Model):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    def to_dict(self, email=None):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'email': email,
+            'name': self.full_name,
+            'roll_number': self.roll_number,
+            'branch': self.branch,
+            'graduation_year': self.graduation_year,
+            'cgpa': self.cgpa,
+            'skills': self.skills,
+            'placement_status': self.placement_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def __repr__(self):
         return f'<StudentProfile {self.roll_number}>'
 
 class Company(db.Model):
     __tablename__ = 'companies'
+    __table_args__ = (
+        db.Index('ix_companies_approved_created', 'is_approved', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -86,6 +112,9 @@ class Company(db.Model):
 
 class RecruiterProfile(db.Model):
     __tablename__ = 'recruiter_profiles'
+    __table_args__ = (
+        db.Index('ix_recruiter_profiles_user_id', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -106,6 +135,10 @@ class RecruiterProfile(db.Model):
 
 class Job(db.Model):
     __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_active_created', 'is_active', 'created_at'),
+        db.Index('ix_jobs_company_created', 'company_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
@@ -132,11 +165,33 @@ class Job(db.Model):
     def application_count(self):
         return self.applications.count()
     
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'title': self.title,
+            'location': self.location,
+            'job_type': self.job_type,
+            'salary_min': self.salary_min,
+            'salary_max': self.salary_max,
+            'min_cgpa': self.min_cgpa,
+            'skills_required': self.skills_required,
+            'application_deadline': self.application_deadline.isoformat() if self.application_deadline else None,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def __repr__(self):
         return f'<Job {self.title} at {self.company.name}>'
 
 class Application(db.Model):
     __tablename__ = 'applications'
+    __table_args__ = (
+        db.Index('uq_applications_user_job', 'user_id', 'job_id', unique=True),
+        db.Index('ix_applications_user_applied', 'user_id', 'applied_at'),
+        db.Index('ix_applications_job_status', 'job_id', 'status'),
+        db.Index('ix_applications_applied_at', 'applied_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -156,6 +211,10 @@ class Application(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -165,11 +224,25 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'message': self.message,
+            'type': self.type,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def __repr__(self):
         return f'<Notification {self.title}>'
 
 class PlacementRecord(db.Model):
     __tablename__ = 'placement_records'
+    __table_args__ = (
+        db.Index('ix_placement_records_student_job', 'student_id', 'job_id'),
+        db.Index('ix_placement_records_company', 'company_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -191,6 +264,9 @@ class PlacementRecord(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        db.Index('ix_events_date', 'event_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -209,3 +285,146 @@ class Event(db.Model):
     
     def __repr__(self):
         return f'<Event {self.title}>'
+
+class StatCounter(db.Model):
+    __tablename__ = 'stat_counters'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_key', 'metric', name='uq_stat_counter'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # global, branch, company, year
+    scope_key = db.Column(db.String(100), nullable=False, default='')
+    metric = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StatCounter {self.scope}:{self.scope_key}:{self.metric}={self.value}>'
+
+class JobBranch(db.Model):
+    __tablename__ = 'job_branches'
+    __table_args__ = (
+        db.Index('ix_job_branches_branch_job', 'branch', 'job_id'),
+    )
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    branch = db.Column(db.String(100), primary_key=True)  # normalized, lower-case
+    
+    def __repr__(self):
+        return f'<JobBranch {self.job_id}:{self.branch}>'
+
+class Skill(db.Model):
+    __tablename__ = 'skills'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # normalized, lower-case
+    
+    def __repr__(self):
+        return f'<Skill {self.name}>'
+
+class JobSkill(db.Model):
+    __tablename__ = 'job_skills'
+    __table_args__ = (
+        db.Index('ix_job_skills_skill_job', 'skill_id', 'job_id'),
+    )
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.id'), primary_key=True)
+    
+    def __repr__(self):
+        return f'<JobSkill {self.job_id}:{self.skill_id}>'
+
+class ResumeIndex(db.Model):
+    __tablename__ = 'resume_index'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id', ondelete='CASCADE'),
+                           unique=True, nullable=False)
+    content_key = db.Column(db.String(300), nullable=False)  # content hash, or the legacy file name
+    status = db.Column(db.String(20), nullable=False)  # indexed, unsupported, failed
+    text = db.Column(db.Text)
+    error = db.Column(db.Text)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ResumeIndex {self.student_id} {self.status}>'
+
+class ResumeSkill(db.Model):
+    __tablename__ = 'resume_skills'
+    __table_args__ = (
+        db.Index('ix_resume_skills_skill_student', 'skill_id', 'student_id'),
+    )
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id', ondelete='CASCADE'), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.id'), primary_key=True)
+    
+    def __repr__(self):
+        return f'<ResumeSkill {self.student_id}:{self.skill_id}>'
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    html_body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claim_token = db.Column(db.String(36))  # set by the worker holding the lease
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<EmailOutbox {self.recipient} {self.status}>'
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+    __table_args__ = (
+        db.Index('ix_stored_files_ref_count_last_seen', 'ref_count', 'last_seen_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # profiles pointing at this file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)  # last upload of this content
+    
+    def __repr__(self):
+        return f'<StoredFile {self.sha256[:12]} refs={self.ref_count}>'
+
+class StreamEvent(db.Model):
+    __tablename__ = 'stream_events'
+    __table_args__ = (
+        db.Index('ix_stream_events_created_at', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(100), nullable=False)
+    event = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON payload
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StreamEvent {self.channel} {self.event}>'
+
+class IndexChange(db.Model):
+    __tablename__ = 'index_changes'
+    __table_args__ = (
+        db.Index('ix_index_changes_created_at', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # job, student, company
+    entity_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<IndexChange {self.entity}:{self.entity_id}>'
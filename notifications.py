@@ -0,0 +1,134 @@
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from models import Notification
+from cache import TTLCache
+from pagination import keyset_paginate
+
+# Notification feed
+#
+# The feed is keyset-paginated on (created_at, id) like the other lists. Each
+# user's unread count is cached and kept current as notifications are created
+# or read: committed inserts bump the cached number, bulk mark-read lowers it
+# by the rows the UPDATE touched, and any other write drops the entry so the
+# next read recounts. Those updates only reach the process that made the
+# write, so the count is a hint with a short TTL, and reads that return
+# notifications always query them. Marking read is always a single UPDATE statement.
+
+MAX_BULK_NOTIFICATIONS = 1000
+
+_unread_cache = TTLCache(maxsize=10000)
+
+def _unread_key(user_id):
+    return f'unread:{user_id}'
+
+def get_unread_count(user_id):
+    """Get the number of unread notifications for a user, served from cache when possible"""
+    count = _unread_cache.get(_unread_key(user_id))
+    if count is None:
+        count = db.session.query(db.func.count(Notification.id))\
+            .filter(Notification.user_id == user_id, Notification.is_read == False).scalar()
+        _unread_cache.set(_unread_key(user_id), count,
+                          ttl=current_app.config.get('NOTIFICATION_COUNT_CACHE_TTL', 30))
+    return count
+
+def get_unread_notifications(user_id, limit=5):
+    """Get the newest unread notifications
+
+    Always queried: the cached count is only a hint, since another worker may
+    have added notifications it hasn't seen. A count the rows contradict is
+    dropped so the next read recounts.
+    """
+    notifications = Notification.query.filter_by(user_id=user_id, is_read=False)\
+        .order_by(Notification.created_at.desc()).limit(limit).all()
+    check_unread_count(user_id, notifications)
+    return notifications
+
+def check_unread_count(user_id, notifications):
+    """Drop the cached unread count if the newest unread notifications contradict it"""
+    cached = _unread_cache.get(_unread_key(user_id))
+    if cached is not None and (cached < len(notifications) or (cached and not notifications)):
+        invalidate_unread_count(user_id)
+
+def get_notification_feed(user_id, cursor=None, per_page=None, unread_only=False):
+    """Get one page of a user's notifications, newest first"""
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    return keyset_paginate(query, Notification.created_at, Notification.id, cursor, per_page)
+
+def parse_before(value):
+    """Parse an ISO 8601 timestamp from a request as naive UTC, None when missing or invalid"""
+    if not value:
+        return None
+    try:
+        before = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if before.tzinfo is not None:
+        before = before.replace(tzinfo=None) - before.utcoffset()
+    return before
+
+def mark_notifications_read(user_id, notification_ids=None, before=None):
+    """Mark a user's unread notifications as read with one UPDATE
+
+    Limited to notification_ids when given, otherwise to notifications created
+    at or before `before` (everything unread when neither is given). Returns
+    the number of notifications that changed.
+    """
+    query = db.session.query(Notification)\
+        .filter(Notification.user_id == user_id, Notification.is_read == False)
+    if notification_ids is not None:
+        notification_ids = [int(i) for i in notification_ids]
+        if not notification_ids:
+            return 0
+        query = query.filter(Notification.id.in_(notification_ids))
+    elif before is not None:
+        query = query.filter(Notification.created_at <= before)
+
+    updated = query.update({'is_read': True}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        _unread_cache.incr(_unread_key(user_id), -updated)
+    return updated
+
+def notifications_created(user_ids):
+    """Count committed unread notifications inserted without the ORM, one per user id"""
+    for user_id, count in Counter(user_ids).items():
+        _unread_cache.incr(_unread_key(user_id), count)
+
+def invalidate_unread_count(user_id):
+    """Drop a user's cached unread count so the next read recounts"""
+    _unread_cache.delete(_unread_key(user_id))
+
+# Counter maintenance hooks
+
+@event.listens_for(Notification, 'after_insert')
+def _notification_inserted(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and not target.is_read:
+        session.info.setdefault('new_notification_user_ids', []).append(target.user_id)
+
+@event.listens_for(Notification, 'after_update')
+@event.listens_for(Notification, 'after_delete')
+def _notification_changed(mapper, connection, target):
+    invalidate_unread_count(target.user_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_notification_user_ids', set()).add(target.user_id)
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    changed = session.info.pop('changed_notification_user_ids', set())
+    for user_id in changed:
+        invalidate_unread_count(user_id)
+    notifications_created([user_id for user_id in session.info.pop('new_notification_user_ids', ())
+                           if user_id not in changed])
+
+@event.listens_for(Session, 'after_rollback')
+def _session_rolled_back(session):
+    session.info.pop('new_notification_user_ids', None)
+    session.info.pop('changed_notification_user_ids', None)
@@ -0,0 +1,181 @@
+import uuid
+import threading
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from extensions import db, mail
+from models import EmailOutbox
+
+# Email outbox
+#
+# Routes queue emails as rows in email_outbox inside their own transaction, so
+# a request never waits on SMTP and an email is only sent if the change that
+# triggered it was committed. A background worker claims due rows in batches,
+# sends each batch over a single SMTP connection and retries failures with
+# exponential backoff. Claimed rows carry a lease so a crashed worker's batch
+# is picked up again.
+
+def enqueue_email(to, subject, html):
+    """Queue an email on the current session; it is sent after the caller commits"""
+    recipients = [to] if isinstance(to, str) else list(to)
+    for recipient in recipients:
+        db.session.add(EmailOutbox(recipient=recipient, subject=subject, html_body=html))
+    return len(recipients)
+
+class SMTPTransport:
+    """Sends a batch of messages over one Flask-Mail connection"""
+
+    def send_batch(self, messages):
+        results = []
+        with mail.connect() as connection:
+            for message in messages:
+                try:
+                    connection.send(message)
+                    results.append(None)
+                except Exception as e:
+                    results.append(str(e))
+        return results
+
+class MemoryTransport:
+    """Local stand-in for an SMTP server that records messages instead of sending them"""
+
+    def __init__(self):
+        self.outbox = []
+        self.connections = 0
+        self.fail_recipients = set()
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages):
+        results = []
+        with self._lock:
+            self.connections += 1
+            for message in messages:
+                if set(message.recipients) & self.fail_recipients:
+                    results.append('Recipient refused')
+                else:
+                    self.outbox.append(message)
+                    results.append(None)
+        return results
+
+_memory_transport = MemoryTransport()
+
+def get_transport():
+    if current_app.config.get('MAIL_TRANSPORT', 'smtp') == 'memory':
+        return _memory_transport
+    return SMTPTransport()
+
+def _retry_delay(attempts):
+    base = current_app.config.get('OUTBOX_BACKOFF_SECONDS', 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 3600))
+
+def claim_batch(batch_size=None):
+    """Lease a batch of due emails to this worker
+
+    Candidates are claimed with a guarded UPDATE that stamps a fresh claim
+    token, so when several workers race for the same rows only the one whose
+    token landed gets to send them. (The lease time can't tell them apart:
+    MySQL DATETIME keeps whole seconds.)
+    """
+    batch_size = batch_size or current_app.config.get('OUTBOX_BATCH_SIZE', 50)
+    now = datetime.utcnow()
+    due = db.and_(EmailOutbox.status.in_(['pending', 'sending']), EmailOutbox.next_attempt_at <= now)
+    ids = [row_id for (row_id,) in db.session.query(EmailOutbox.id).filter(due)
+           .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(batch_size).all()]
+    if not ids:
+        db.session.rollback()
+        return []
+
+    lease = now + timedelta(seconds=current_app.config.get('OUTBOX_LEASE_SECONDS', 300))
+    token = uuid.uuid4().hex
+    EmailOutbox.query.filter(EmailOutbox.id.in_(ids), due)\
+        .update({'status': 'sending', 'next_attempt_at': lease, 'claim_token': token}, synchronize_session=False)
+    db.session.commit()
+    return EmailOutbox.query.filter(EmailOutbox.id.in_(ids), EmailOutbox.claim_token == token)\
+        .order_by(EmailOutbox.id).all()
+
+def deliver_pending(batch_size=None, transport=None):
+    """Send one batch of due emails; returns the number of rows processed"""
+    rows = claim_batch(batch_size)
+    if not rows:
+        return 0
+
+    transport = transport or get_transport()
+    sender = current_app.config.get('MAIL_DEFAULT_SENDER')
+    messages = [Message(subject=row.subject, recipients=[row.recipient], html=row.html_body, sender=sender)
+                for row in rows]
+
+    try:
+        results = transport.send_batch(messages)
+    except Exception as e:
+        logging.error(f"Email batch delivery failed: {str(e)}")
+        results = [str(e)] * len(rows)
+
+    max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', 5)
+    now = datetime.utcnow()
+    for row, error in zip(rows, results):
+        row.attempts += 1
+        if error is None:
+            row.status = 'sent'
+            row.sent_at = now
+            row.last_error = None
+        elif row.attempts >= max_attempts:
+            row.status = 'failed'
+            row.last_error = error
+            logging.error(f"Email to {row.recipient} failed permanently: {error}")
+        else:
+            row.status = 'pending'
+            row.last_error = error
+            row.next_attempt_at = now + _retry_delay(row.attempts)
+    db.session.commit()
+    return len(rows)
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox until stopped"""
+
+    def __init__(self, app, poll_interval=None):
+        super().__init__(name='email-outbox', daemon=True)
+        self.app = app
+        self.poll_interval = poll_interval or app.config.get('OUTBOX_POLL_INTERVAL', 2)
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def wake(self):
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            processed = 0
+            with self.app.app_context():
+                try:
+                    processed = deliver_pending()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Outbox worker error: {str(e)}")
+                finally:
+                    db.session.remove()
+            if not processed:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_outbox_worker(app):
+    """Start the in-process delivery thread once per process (again after a fork)"""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker(app)
+            _worker.start()
+    return _worker
+
+def wake_outbox_worker():
+    if _worker is not None:
+        _worker.wake()
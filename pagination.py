@@ -0,0 +1,120 @@
+import json
+import base64
+from datetime import datetime
+from flask import current_app
+from extensions import db
+from cache import TTLCache
+from search import search_page
+
+# Keyset (cursor) pagination
+#
+# Lists are ordered newest first on (created_at, id). A cursor encodes the
+# sort key of the last row on the previous page, so fetching page N costs the
+# same as page 1 regardless of how deep the user scrolls. Totals are estimated
+# from a short-lived cache instead of issuing a COUNT for every page.
+
+_count_cache = TTLCache(maxsize=2048)
+
+class Page:
+    def __init__(self, items, next_cursor=None, total_estimate=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total_estimate = total_estimate
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def to_dict(self, serialize):
+        return {
+            'items': [serialize(item) for item in self.items],
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more,
+            'total_estimate': self.total_estimate
+        }
+
+def encode_cursor(payload):
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor, returning None for missing or malformed values"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+
+def get_per_page(requested=None):
+    per_page = current_app.config.get('ITEMS_PER_PAGE', 20)
+    if requested:
+        per_page = max(1, min(int(requested), current_app.config.get('MAX_ITEMS_PER_PAGE', 100)))
+    return per_page
+
+def estimate_count(cache_key, query):
+    """Get the row count for a query, cached briefly per filter combination"""
+    total = _count_cache.get(cache_key)
+    if total is None:
+        total = query.order_by(None).count()
+        _count_cache.set(cache_key, total, ttl=current_app.config.get('COUNT_CACHE_TTL', 60))
+    return total
+
+def invalidate_counts(prefix):
+    """Drop cached totals for a list after rows were added or removed"""
+    _count_cache.delete_prefix(prefix)
+
+def keyset_paginate(query, created_column, id_column, cursor=None, per_page=None,
+                    key=lambda item: (item.created_at, item.id), count_key=None, options=()):
+    """Get one page of a query ordered by (created_at, id) descending"""
+    per_page = get_per_page(per_page)
+    total = estimate_count(count_key, query) if count_key else None
+
+    position = decode_cursor(cursor)
+    try:
+        created_at, last_id = datetime.fromisoformat(position['c']), int(position['i'])
+    except (TypeError, KeyError, ValueError):
+        created_at = None
+    if created_at is not None:
+        query = query.filter(db.or_(
+            created_column < created_at,
+            db.and_(created_column == created_at, id_column < last_id)
+        ))
+
+    rows = query.options(*options).order_by(created_column.desc(), id_column.desc())\
+        .limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        created_at, row_id = key(rows[-1])
+        next_cursor = encode_cursor({'c': created_at.isoformat(), 'i': row_id})
+
+    return Page(rows, next_cursor, total)
+
+def ranked_paginate(query, id_column, kind, text, cursor=None, per_page=None,
+                    key=lambda item: item.id, options=()):
+    """Get one page of search results for text, keeping the index's rank order
+
+    The search index applies the query's filters to every match, so pages stay
+    full and the total counts all matching rows, not just the best ranked.
+    """
+    per_page = get_per_page(per_page)
+    position = decode_cursor(cursor)
+    try:
+        offset = max(int(position['o']), 0)
+    except (TypeError, KeyError, ValueError):
+        offset = 0
+
+    page_ids, total = search_page(kind, text, query, id_column, offset, per_page)
+
+    positions = {row_id: index for index, row_id in enumerate(page_ids)}
+    rows = query.options(*options).filter(id_column.in_(page_ids)).all() if page_ids else []
+    rows.sort(key=lambda item: positions[key(item)])
+
+    next_cursor = None
+    if offset + per_page < total:
+        next_cursor = encode_cursor({'o': offset + per_page})
+
+    return Page(rows, next_cursor, total)
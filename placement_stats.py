@@ -0,0 +1,359 @@
+import re
+import random
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import User, StudentProfile, Company, Job, Application, PlacementRecord, StatCounter
+
+# Materialized placement statistics
+#
+# Aggregates shown on the TPO pages are kept in the stat_counters table as
+# (scope, scope_key, metric) -> value rows. Mapper events below apply deltas in
+# the same transaction as the change that caused them, so readers only ever
+# fetch a handful of rows. rebuild_stat_counters() recomputes everything from
+# the source tables to repair drift (e.g. after raw SQL edits or bulk updates,
+# including bulk UPDATEs of a student's branch or a placement's package, which
+# the hooks don't see).
+#
+# Counters are written with the database's native upsert, so two transactions
+# creating the same row don't collide on uq_stat_counter. Metrics that every
+# request of a busy path bumps (the global application count) are spread over
+# COUNTER_SHARDS rows stored as "<scope_key>#<n>", which readers add up, so
+# concurrent transactions don't queue on one row lock.
+
+GLOBAL = 'global'
+BRANCH = 'branch'
+COMPANY = 'company'
+YEAR = 'year'
+
+COUNTER_SHARDS = 16
+SHARDED_METRICS = {(GLOBAL, 'applications')}
+
+_counters = StatCounter.__table__
+_SHARD_SUFFIX = re.compile(r'#\d+$')
+_UPSERTS = {'mysql': mysql_insert, 'mariadb': mysql_insert, 'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+def _upsert(connection, scope, scope_key, metric, initial, new_value):
+    """Insert a counter row with `initial`, or set an existing one to `new_value`, in one statement"""
+    now = datetime.utcnow()
+    values = {'scope': scope, 'scope_key': scope_key, 'metric': metric, 'value': initial, 'updated_at': now}
+    insert = _UPSERTS.get(connection.dialect.name)
+    if insert is mysql_insert:
+        connection.execute(insert(_counters).values(**values)
+                           .on_duplicate_key_update(value=new_value, updated_at=now))
+        return
+    if insert is not None:
+        connection.execute(insert(_counters).values(**values).on_conflict_do_update(
+            index_elements=['scope', 'scope_key', 'metric'], set_={'value': new_value, 'updated_at': now}
+        ))
+        return
+
+    # Other databases: update, else insert; losing an insert race means the row now exists
+    where = (_counters.c.scope == scope) & (_counters.c.scope_key == scope_key) & (_counters.c.metric == metric)
+    for attempt in range(2):
+        if connection.execute(_counters.update().where(where).values(value=new_value, updated_at=now)).rowcount:
+            return
+        try:
+            with connection.begin_nested():
+                connection.execute(_counters.insert().values(**values))
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+def _apply(connection, scope, scope_key, metric, delta=0, maximum=None, minimum=None):
+    """Apply a delta (or a running maximum/minimum) to a single counter row"""
+    scope_key = '' if scope_key is None else str(scope_key)
+
+    if maximum is not None:
+        new_value = db.case((_counters.c.value < maximum, maximum), else_=_counters.c.value)
+        initial = maximum
+    elif minimum is not None:
+        new_value = db.case((_counters.c.value > minimum, minimum), else_=_counters.c.value)
+        initial = minimum
+    else:
+        if (scope, metric) in SHARDED_METRICS:
+            scope_key = f'{scope_key}#{random.randrange(COUNTER_SHARDS)}'
+        new_value = _counters.c.value + delta
+        initial = delta
+
+    _upsert(connection, scope, scope_key, metric, initial, new_value)
+
+def _set(connection, scope, scope_key, metric, value):
+    """Overwrite a counter, removing it when value is None"""
+    scope_key = '' if scope_key is None else str(scope_key)
+    if value is None:
+        connection.execute(_counters.delete().where(
+            (_counters.c.scope == scope) & (_counters.c.scope_key == scope_key) & (_counters.c.metric == metric)
+        ))
+    else:
+        _upsert(connection, scope, scope_key, metric, value, value)
+
+def _previous(target, attr):
+    """Get the value an attribute had before the current flush"""
+    history = inspect(target).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attr)
+
+def _is_counted_student(role, is_active):
+    return role == 'student' and is_active is not False
+
+def record_placement(connection, record, delta=1):
+    """Apply a placement record to the global, branch, company and year counters"""
+    branch = connection.execute(
+        db.select(StudentProfile.branch).where(StudentProfile.user_id == record.student_id)
+    ).scalar()
+
+    scopes = [
+        (GLOBAL, '', db.true()),
+        (COMPANY, record.company_id, PlacementRecord.company_id == record.company_id),
+        (YEAR, record.academic_year or '', PlacementRecord.academic_year == record.academic_year
+         if record.academic_year is not None else PlacementRecord.academic_year.is_(None))
+    ]
+    for scope, key, condition in scopes:
+        _apply(connection, scope, key, 'placed', delta)
+        if record.package_amount:
+            _apply(connection, scope, key, 'package_total', delta * record.package_amount)
+            _apply(connection, scope, key, 'package_count', delta)
+            if delta > 0:
+                _apply(connection, scope, key, 'package_max', maximum=record.package_amount)
+                _apply(connection, scope, key, 'package_min', minimum=record.package_amount)
+            else:
+                # The removed package may have been the extreme; recompute from what's left
+                maximum, minimum = connection.execute(
+                    db.select(db.func.max(PlacementRecord.package_amount), db.func.min(PlacementRecord.package_amount))
+                    .where(condition, PlacementRecord.package_amount.isnot(None))
+                ).one()
+                _set(connection, scope, key, 'package_max', maximum)
+                _set(connection, scope, key, 'package_min', minimum)
+    if branch:
+        _apply(connection, BRANCH, branch, 'placed', delta)
+
+def _placements_of(connection, user_id):
+    return connection.execute(
+        db.select(db.func.count(PlacementRecord.id)).where(PlacementRecord.student_id == user_id)
+    ).scalar() or 0
+
+def record_students_added(connection, branch_counts):
+    """Apply counters for students inserted with bulk statements (which skip mapper events)"""
+    total = sum(branch_counts.values())
+    if total:
+        _apply(connection, GLOBAL, '', 'students', total)
+    for branch, count in branch_counts.items():
+        _apply(connection, BRANCH, branch, 'students', count)
+
+# Incremental maintenance hooks
+
+@event.listens_for(PlacementRecord, 'after_insert')
+def _placement_inserted(mapper, connection, target):
+    record_placement(connection, target)
+
+@event.listens_for(PlacementRecord, 'after_delete')
+def _placement_deleted(mapper, connection, target):
+    record_placement(connection, target, delta=-1)
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    if _is_counted_student(target.role, target.is_active):
+        _apply(connection, GLOBAL, '', 'students', 1)
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    was_counted = _is_counted_student(_previous(target, 'role'), _previous(target, 'is_active'))
+    is_counted = _is_counted_student(target.role, target.is_active)
+    if was_counted != is_counted:
+        _apply(connection, GLOBAL, '', 'students', 1 if is_counted else -1)
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    if _is_counted_student(target.role, target.is_active):
+        _apply(connection, GLOBAL, '', 'students', -1)
+
+@event.listens_for(StudentProfile, 'after_insert')
+def _profile_inserted(mapper, connection, target):
+    _apply(connection, BRANCH, target.branch, 'students', 1)
+
+@event.listens_for(StudentProfile, 'after_update')
+def _profile_updated(mapper, connection, target):
+    old_branch = _previous(target, 'branch')
+    if old_branch != target.branch:
+        _apply(connection, BRANCH, old_branch, 'students', -1)
+        _apply(connection, BRANCH, target.branch, 'students', 1)
+        # The student's placements are counted under their current branch
+        placed = _placements_of(connection, target.user_id)
+        if placed:
+            _apply(connection, BRANCH, old_branch, 'placed', -placed)
+            _apply(connection, BRANCH, target.branch, 'placed', placed)
+
+@event.listens_for(StudentProfile, 'after_delete')
+def _profile_deleted(mapper, connection, target):
+    branch = _previous(target, 'branch')
+    _apply(connection, BRANCH, branch, 'students', -1)
+    # Placements deleted later can no longer find this branch
+    placed = _placements_of(connection, target.user_id)
+    if placed:
+        _apply(connection, BRANCH, branch, 'placed', -placed)
+
+@event.listens_for(Job, 'after_insert')
+def _job_inserted(mapper, connection, target):
+    if target.is_active is not False:
+        _apply(connection, GLOBAL, '', 'active_jobs', 1)
+
+@event.listens_for(Job, 'after_update')
+def _job_updated(mapper, connection, target):
+    was_active = _previous(target, 'is_active') is not False
+    is_active = target.is_active is not False
+    if was_active != is_active:
+        _apply(connection, GLOBAL, '', 'active_jobs', 1 if is_active else -1)
+
+@event.listens_for(Job, 'after_delete')
+def _job_deleted(mapper, connection, target):
+    if target.is_active is not False:
+        _apply(connection, GLOBAL, '', 'active_jobs', -1)
+
+@event.listens_for(Application, 'after_insert')
+def _application_inserted(mapper, connection, target):
+    _apply(connection, GLOBAL, '', 'applications', 1)
+
+@event.listens_for(Application, 'after_delete')
+def _application_deleted(mapper, connection, target):
+    _apply(connection, GLOBAL, '', 'applications', -1)
+
+def _company_metric(is_approved):
+    return 'approved_companies' if is_approved else 'pending_companies'
+
+@event.listens_for(Company, 'after_insert')
+def _company_inserted(mapper, connection, target):
+    _apply(connection, GLOBAL, '', _company_metric(target.is_approved), 1)
+
+@event.listens_for(Company, 'after_update')
+def _company_updated(mapper, connection, target):
+    was_approved = bool(_previous(target, 'is_approved'))
+    if was_approved != bool(target.is_approved):
+        _apply(connection, GLOBAL, '', _company_metric(was_approved), -1)
+        _apply(connection, GLOBAL, '', _company_metric(target.is_approved), 1)
+
+@event.listens_for(Company, 'after_delete')
+def _company_deleted(mapper, connection, target):
+    _apply(connection, GLOBAL, '', _company_metric(target.is_approved), -1)
+
+# Rebuild
+
+def rebuild_stat_counters():
+    """Recompute every counter from the source tables"""
+    rows = {}
+
+    def put(scope, key, metric, value):
+        rows[(scope, '' if key is None else str(key), metric)] = int(value or 0)
+
+    put(GLOBAL, '', 'students', User.query.filter_by(role='student', is_active=True).count())
+    put(GLOBAL, '', 'active_jobs', Job.query.filter_by(is_active=True).count())
+    put(GLOBAL, '', 'applications', Application.query.count())
+    put(GLOBAL, '', 'approved_companies', Company.query.filter_by(is_approved=True).count())
+    put(GLOBAL, '', 'pending_companies', Company.query.filter(Company.is_approved.isnot(True)).count())
+
+    for branch, total in db.session.query(StudentProfile.branch, db.func.count(StudentProfile.id))\
+            .group_by(StudentProfile.branch).all():
+        put(BRANCH, branch, 'students', total)
+
+    for branch, placed in db.session.query(StudentProfile.branch, db.func.count(PlacementRecord.id))\
+            .join(StudentProfile, PlacementRecord.student_id == StudentProfile.user_id)\
+            .group_by(StudentProfile.branch).all():
+        put(BRANCH, branch, 'placed', placed)
+
+    package_columns = [
+        db.func.count(PlacementRecord.id),
+        db.func.sum(PlacementRecord.package_amount),
+        db.func.count(PlacementRecord.package_amount),
+        db.func.max(PlacementRecord.package_amount),
+        db.func.min(PlacementRecord.package_amount)
+    ]
+
+    def put_packages(scope, key, placed, total, count, maximum, minimum):
+        put(scope, key, 'placed', placed)
+        if count:
+            put(scope, key, 'package_total', total)
+            put(scope, key, 'package_count', count)
+            put(scope, key, 'package_max', maximum)
+            put(scope, key, 'package_min', minimum)
+
+    put_packages(GLOBAL, '', *db.session.query(*package_columns).one())
+    for company_id, *values in db.session.query(PlacementRecord.company_id, *package_columns)\
+            .group_by(PlacementRecord.company_id).all():
+        put_packages(COMPANY, company_id, *values)
+    for academic_year, *values in db.session.query(PlacementRecord.academic_year, *package_columns)\
+            .group_by(PlacementRecord.academic_year).all():
+        put_packages(YEAR, academic_year, *values)
+
+    db.session.execute(_counters.delete())
+    now = datetime.utcnow()
+    db.session.execute(_counters.insert(), [
+        {'scope': scope, 'scope_key': key, 'metric': metric, 'value': value, 'updated_at': now}
+        for (scope, key, metric), value in rows.items()
+    ])
+    db.session.commit()
+    return len(rows)
+
+def ensure_stat_counters():
+    """Build the counters once so later deltas apply to complete totals"""
+    if db.session.query(StatCounter.id).first() is None:
+        rebuild_stat_counters()
+
+# Readers
+
+def get_counters(scope, scope_key=None):
+    """Get {scope_key: {metric: value}} for a scope, or {metric: value} for a single key"""
+    query = db.session.query(StatCounter.scope_key, StatCounter.metric, StatCounter.value)\
+        .filter(StatCounter.scope == scope)
+    if scope_key is not None:
+        query = query.filter(db.or_(StatCounter.scope_key == str(scope_key),
+                                    StatCounter.scope_key.startswith(f'{scope_key}#', autoescape=True)))
+
+    result = {}
+    for key, metric, value in query.all():
+        # Shard rows add up into their key
+        metrics = result.setdefault(_SHARD_SUFFIX.sub('', key), {})
+        metrics[metric] = metrics.get(metric, 0) + value
+
+    if scope_key is not None:
+        return result.get(str(scope_key), {})
+    return result
+
+def _with_averages(counters):
+    counters = dict(counters)
+    count = counters.get('package_count', 0)
+    counters['package_avg'] = counters.get('package_total', 0) / count if count else 0
+    return counters
+
+def get_global_stats():
+    """Get campus-wide counters; all zero until init-db or rebuild-stats has built the table"""
+    return _with_averages(get_counters(GLOBAL, ''))
+
+def get_branch_stats():
+    """Get per-branch student and placement counts"""
+    branches = get_counters(BRANCH)
+    return [
+        {
+            'branch': branch,
+            'total': metrics.get('students', 0),
+            'placed': metrics.get('placed', 0)
+        }
+        for branch, metrics in sorted(branches.items())
+    ]
+
+def get_top_hiring_companies(limit=10):
+    """Get companies ordered by number of placements"""
+    rows = db.session.query(Company.name, StatCounter.value)\
+        .join(StatCounter, db.cast(Company.id, db.String) == StatCounter.scope_key)\
+        .filter(StatCounter.scope == COMPANY, StatCounter.metric == 'placed', StatCounter.value > 0)\
+        .order_by(StatCounter.value.desc()).limit(limit).all()
+    return [{'name': name, 'hired': hired} for name, hired in rows]
+
+def get_year_stats():
+    """Get per-academic-year placement counters"""
+    return {year: _with_averages(metrics) for year, metrics in get_counters(YEAR).items()}
@@ -0,0 +1,97 @@
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, joinedload, object_session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from extensions import db
+from models import User, StudentProfile, RecruiterProfile
+from cache import TTLCache
+
+# Current user loading
+#
+# The login manager loads the user together with its role profile in one
+# joined query, so current_user.student_profile / recruiter_profile never
+# cost a second round trip. With USER_CACHE_TTL > 0 the loaded rows are also
+# kept in a short-lived per-process cache as plain column snapshots and
+# re-attached to each request's session without querying. Entries are
+# dropped whenever the user or a profile is written, and again once that
+# write commits.
+
+_user_cache = TTLCache(maxsize=10000)
+
+def snapshot(instance):
+    if instance is None:
+        return None
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+def restore(model, values):
+    """Rebuild a detached instance from a column snapshot, as if freshly loaded"""
+    if values is None:
+        return None
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
+
+def _from_cache(entry):
+    user_values, student_values, recruiter_values = entry
+    user = restore(User, user_values)
+    set_committed_value(user, 'student_profile', restore(StudentProfile, student_values))
+    set_committed_value(user, 'recruiter_profile', restore(RecruiterProfile, recruiter_values))
+    return db.session.merge(user, load=False)
+
+def load_user_with_profile(user_id):
+    """Get a user with its student or recruiter profile already loaded"""
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    if ttl > 0:
+        entry = _user_cache.get(user_id)
+        if entry is not None:
+            return _from_cache(entry)
+
+    user = User.query.options(
+        joinedload(User.student_profile),
+        joinedload(User.recruiter_profile)
+    ).filter(User.id == user_id).first()
+
+    if user is not None and ttl > 0:
+        _user_cache.set(user_id, (
+            snapshot(user),
+            snapshot(user.student_profile),
+            snapshot(user.recruiter_profile)
+        ), ttl=ttl)
+    return user
+
+def invalidate_user(user_id):
+    """Drop the cached user and profile after either one changes"""
+    _user_cache.delete(user_id)
+
+# Invalidation hooks
+
+def _user_changed(user_id, target):
+    invalidate_user(user_id)
+    # Also drop it after commit, so a request that re-cached the old row
+    # between this flush and the commit can't keep it around
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(user_id)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_written(mapper, connection, target):
+    _user_changed(target.id, target)
+
+@event.listens_for(StudentProfile, 'after_insert')
+@event.listens_for(StudentProfile, 'after_update')
+@event.listens_for(StudentProfile, 'after_delete')
+@event.listens_for(RecruiterProfile, 'after_insert')
+@event.listens_for(RecruiterProfile, 'after_update')
+@event.listens_for(RecruiterProfile, 'after_delete')
+def _profile_written(mapper, connection, target):
+    _user_changed(target.user_id, target)
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _session_rolled_back(session):
+    session.info.pop('changed_user_ids', None)
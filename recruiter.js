@@ -13,6 +13,7 @@ function initializeRecruiterModule() {
     setupDataImport();
     setupOfferGeneration();
     setupNotifications();
+    setupLiveUpdates();
 }
 
 // Navigation highlighting
@@ -590,6 +591,117 @@ function markNotificationsAsRead() {
     });
 }
 
+// Live updates pushed by the server (notifications, application status)
+function setupLiveUpdates() {
+    if (!window.EventSource) {
+        return;
+    }
+    
+    const handlers = {
+        application: function(application) {
+            prependNotification('👤', 'New Application', `New application for ${application.job_title}`);
+            showNotification(`New application for ${application.job_title}`, 'info');
+        },
+        applications: function(update) {
+            update.ids.forEach(id => {
+                document.querySelectorAll(`[data-application-id="${id}"] .status-badge`).forEach(badge => {
+                    badge.className = `status-badge status-${update.status}`;
+                    badge.textContent = update.status.toUpperCase();
+                });
+            });
+        },
+        resync: function() {
+            // Too many updates were missed while the connection was busy; reload instead
+            window.location.reload();
+        }
+    };
+    
+    let lastEventId = null;
+    let retryDelay = 30000;
+    let pollTimer = null;
+    
+    function handle(name, id, data) {
+        if (id) {
+            lastEventId = id;
+        }
+        handlers[name](data);
+    }
+    
+    // Turned away at capacity (or disconnected for good): poll for missed events and retry later
+    function poll() {
+        const query = lastEventId ? `?last_event_id=${lastEventId}` : '';
+        fetch(`/api/events${query}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    return;
+                }
+                data.events.forEach(item => handle(item.event, String(item.id), item.data));
+                lastEventId = String(data.last_event_id);
+            })
+            .catch(error => console.error('Error polling updates:', error));
+    }
+    
+    function connect() {
+        const query = lastEventId ? `?last_event_id=${lastEventId}` : '';
+        const source = new EventSource(`/api/stream${query}`);
+        
+        Object.keys(handlers).forEach(name => {
+            source.addEventListener(name, function(e) {
+                handle(name, e.lastEventId, JSON.parse(e.data));
+            });
+        });
+        
+        source.addEventListener('open', function() {
+            retryDelay = 30000;
+            clearInterval(pollTimer);
+            pollTimer = null;
+        });
+        
+        source.addEventListener('error', function() {
+            // EventSource retries dropped connections itself; only a refused one ends up closed
+            if (source.readyState !== EventSource.CLOSED) {
+                return;
+            }
+            source.close();
+            if (!pollTimer) {
+                poll();
+                pollTimer = setInterval(poll, 30000);
+            }
+            setTimeout(connect, retryDelay);
+            retryDelay = Math.min(retryDelay * 2, 300000);
+        });
+    }
+    
+    connect();
+}
+
+function prependNotification(icon, title, text) {
+    const container = document.querySelector('.notification-center');
+    if (!container) {
+        return;
+    }
+    
+    const item = document.createElement('div');
+    item.className = 'notification-item unread';
+    item.innerHTML = `
+        <div class="notification-icon">${icon}</div>
+        <div class="notification-content">
+            <div class="notification-title"></div>
+            <div class="notification-text"></div>
+            <div class="notification-time">Just now</div>
+        </div>
+    `;
+    item.querySelector('.notification-title').textContent = title;
+    item.querySelector('.notification-text').textContent = text;
+    item.addEventListener('click', function() {
+        this.classList.remove('unread');
+    });
+    
+    const heading = container.querySelector('h3');
+    container.insertBefore(item, heading ? heading.nextSibling : container.firstChild);
+}
+
 // Utility functions for modal content population
 function populateCandidateDetails(content) {
     content.innerHTML = `
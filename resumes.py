@@ -0,0 +1,303 @@
+import re
+import os
+import zipfile
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from xml.etree import ElementTree
+from sqlalchemy import insert
+from extensions import db
+from models import StudentProfile, Skill, ResumeIndex, ResumeSkill
+from eligibility import SKILL_ALIASES, normalize_skill, parse_skills, skill_ids
+from storage import parse_storage_name, resolve_path
+
+# Resume text and skill index
+#
+# Uploaded resumes are parsed once, outside the request path: text is pulled
+# out of PDF (with the optional pypdf package), DOCX (read straight from the
+# zip container) and TXT files, and every 1-3 word phrase is matched against
+# the normalized skill vocabulary that job eligibility already uses. Results
+# go to resume_index / resume_skills keyed by the file's content hash, so only
+# new or changed resumes are parsed again and students sharing an identical
+# file share one extraction. Candidate search by skill is then an indexed
+# lookup on resume_skills.
+#
+# `flask resume-index` backfills in a process pool. Uploads are queued to a
+# background thread in the web process, which hands the parsing to a spawned
+# child process so PDF and DOCX parsing never holds the GIL a worker's request
+# threads need; the thread itself only does the database reads and writes.
+
+MAX_NGRAM = 3
+WRITE_BATCH_SIZE = 200
+SEARCH_MAX_RESULTS = 50
+
+# Recognized in resumes even before any job lists them
+COMMON_SKILLS = {
+    'python', 'java', 'c', 'c++', 'c#', 'javascript', 'typescript', 'go', 'rust', 'kotlin', 'swift', 'r',
+    'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'html', 'css', 'react', 'angular', 'vue', 'node.js',
+    'django', 'flask', 'spring', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'linux', 'git',
+    'machine learning', 'deep learning', 'data analysis', 'tensorflow', 'pytorch', 'excel', 'matlab', 'autocad'
+}
+
+# Skills that are also ordinary words or letters only count when written like the skill
+AMBIGUOUS_SKILLS = {
+    'go': {'Go', 'Golang', 'golang'},
+    'c': {'C'},
+    'r': {'R'}
+}
+
+_TOKEN_RE = re.compile(r'[A-Za-z0-9][A-Za-z0-9+#.]*')
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+class UnsupportedResume(Exception):
+    pass
+
+# Text extraction (runs in worker processes)
+
+def extract_pdf_text(path, max_chars):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedResume('PDF text extraction needs the optional pypdf package')
+    parts, length = [], 0
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return '\n'.join(parts)[:max_chars]
+
+def extract_docx_text(path, max_chars):
+    parts, length = [], 0
+    with zipfile.ZipFile(path) as archive, archive.open('word/document.xml') as document:
+        for _, element in ElementTree.iterparse(document):
+            if element.tag == _WORD_NS + 't' and element.text:
+                parts.append(element.text)
+                length += len(element.text)
+            elif element.tag == _WORD_NS + 'tab':
+                parts.append(' ')
+            elif element.tag == _WORD_NS + 'p':
+                parts.append('\n')
+                element.clear()
+            if length >= max_chars:
+                break
+    return ''.join(parts)[:max_chars]
+
+def extract_txt_text(path, max_chars):
+    with open(path, 'rb') as f:
+        return f.read(max_chars * 4).decode('utf-8', errors='replace')[:max_chars]
+
+EXTRACTORS = {
+    'pdf': extract_pdf_text,
+    'docx': extract_docx_text,
+    'txt': extract_txt_text
+}
+
+def extract_skills(text, vocabulary):
+    """Find the vocabulary skills mentioned in free text, matching phrases of up to MAX_NGRAM words"""
+    tokens = [token.rstrip('.') for token in _TOKEN_RE.findall(text or '')]
+    found = set()
+    for start in range(len(tokens)):
+        for size in range(1, MAX_NGRAM + 1):
+            if start + size > len(tokens):
+                break
+            phrase = ' '.join(tokens[start:start + size])
+            skill = normalize_skill(phrase)
+            if skill in vocabulary and (skill not in AMBIGUOUS_SKILLS or phrase in AMBIGUOUS_SKILLS[skill]):
+                found.add(skill)
+    return found
+
+_vocabulary = frozenset()
+
+def _init_worker(vocabulary):
+    global _vocabulary
+    _vocabulary = vocabulary
+
+def process_resume(job):
+    """Extract text and skills from one file; returns (status, text, skills, error)"""
+    path, ext, max_chars = job
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
+        return 'unsupported', None, [], f'No text extractor for .{ext or "?"} files'
+    try:
+        text = extractor(path, max_chars)
+    except UnsupportedResume as e:
+        return 'unsupported', None, [], str(e)
+    except Exception as e:
+        return 'failed', None, [], f'{type(e).__name__}: {e}'
+    return 'indexed', text, sorted(extract_skills(text, _vocabulary)), None
+
+# Indexing
+
+def content_key(resume_filename):
+    """Identify a resume's content: its hash, or the name of a pre-hash upload"""
+    return parse_storage_name(resume_filename) or resume_filename
+
+def skill_vocabulary():
+    names = {name for (name,) in db.session.query(Skill.name).all()}
+    names.update(SKILL_ALIASES.values())
+    names.update(COMMON_SKILLS)
+    return frozenset(names)
+
+def _stale_resumes(student_ids=None, force=False, retry_failed=False):
+    """Get [(student_id, resume_filename)] needing (re)indexing and student ids whose resume was removed"""
+    query = db.session.query(
+        StudentProfile.id, StudentProfile.resume_filename, ResumeIndex.content_key, ResumeIndex.status
+    ).outerjoin(ResumeIndex, ResumeIndex.student_id == StudentProfile.id)\
+     .filter(db.or_(StudentProfile.resume_filename.isnot(None), ResumeIndex.id.isnot(None)))
+    if student_ids is not None:
+        query = query.filter(StudentProfile.id.in_(student_ids))
+
+    stale, removed = [], []
+    for student_id, filename, key, status in query.all():
+        if not filename:
+            removed.append(student_id)
+        elif force or key != content_key(filename) or (retry_failed and status == 'failed'):
+            stale.append((student_id, filename))
+    return stale, removed
+
+def _clear(student_ids):
+    db.session.query(ResumeSkill).filter(ResumeSkill.student_id.in_(student_ids))\
+        .delete(synchronize_session=False)
+    db.session.query(ResumeIndex).filter(ResumeIndex.student_id.in_(student_ids))\
+        .delete(synchronize_session=False)
+
+def _save(batch):
+    """Replace the index rows for a batch of (key, student_ids, result) in one transaction"""
+    if not batch:
+        return
+    now = datetime.utcnow()
+    ids = skill_ids(db.session.connection(), sorted({skill for _, _, result in batch for skill in result[2]}))
+    _clear([student_id for _, student_ids, _ in batch for student_id in student_ids])
+
+    index_rows, skill_rows = [], []
+    for key, student_ids, (status, text, skills, error) in batch:
+        for student_id in student_ids:
+            index_rows.append({'student_id': student_id, 'content_key': key, 'status': status,
+                               'text': text, 'error': error, 'processed_at': now})
+            skill_rows.extend({'student_id': student_id, 'skill_id': ids[skill]} for skill in skills)
+    db.session.execute(insert(ResumeIndex), index_rows)
+    if skill_rows:
+        db.session.execute(insert(ResumeSkill), skill_rows)
+    db.session.commit()
+
+def index_resumes(student_ids=None, force=False, retry_failed=False, max_workers=None, max_chars=100000,
+                  isolate=False):
+    """Extract and index the resumes whose content changed since they were last indexed
+
+    Files are parsed in a process pool unless max_workers is 1 or there is a
+    single file; with isolate=True they always are, so the calling process
+    does no parsing. Returns a count of processed resumes by status.
+    """
+    stale, removed = _stale_resumes(student_ids, force, retry_failed)
+    if removed:
+        _clear(removed)
+        db.session.commit()
+
+    # One extraction per distinct file
+    files = {}
+    for student_id, filename in stale:
+        files.setdefault(content_key(filename), (filename, []))[1].append(student_id)
+
+    keys, jobs = [], []
+    for key, (filename, _) in files.items():
+        path = resolve_path(filename)
+        ext = os.path.splitext(filename)[1].lstrip('.').lower()
+        keys.append(key)
+        jobs.append((path if path and os.path.isfile(path) else None, ext, max_chars))
+
+    counts = {'removed': len(removed)}
+    vocabulary = skill_vocabulary()
+
+    def save_all(results):
+        batch = []
+        for key, job, result in zip(keys, jobs, results):
+            if job[0] is None:
+                result = ('failed', None, [], 'Resume file not found')
+            counts[result[0]] = counts.get(result[0], 0) + len(files[key][1])
+            batch.append((key, files[key][1], result))
+            if len(batch) >= WRITE_BATCH_SIZE:
+                _save(batch)
+                batch = []
+        _save(batch)
+
+    # Missing files skip extraction but still get a 'failed' row
+    work = [job if job[0] is not None else (None, None, max_chars) for job in jobs]
+    if not isolate and (max_workers == 1 or len(work) <= 1) or not any(job[0] for job in work):
+        _init_worker(vocabulary)
+        save_all(map(process_resume, work))
+    else:
+        # Spawned, not forked: the parent has threads and pooled database connections
+        with ProcessPoolExecutor(max_workers=max_workers or None, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(vocabulary,)) as pool:
+            save_all(pool.map(process_resume, work, chunksize=4))
+    return counts
+
+# Background indexing of new uploads
+
+class ResumeIndexer(threading.Thread):
+    """Background thread that indexes the resumes of queued students"""
+
+    def __init__(self, app):
+        super().__init__(name='resume-indexer', daemon=True)
+        self.app = app
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+
+    def enqueue(self, student_id):
+        with self._lock:
+            self._pending.add(student_id)
+        self._wake_event.set()
+
+    def run(self):
+        while True:
+            self._wake_event.wait()
+            self._wake_event.clear()
+            with self._lock:
+                student_ids, self._pending = self._pending, set()
+            if not student_ids:
+                continue
+            with self.app.app_context():
+                try:
+                    index_resumes(sorted(student_ids), max_workers=1, isolate=True,
+                                  max_chars=self.app.config.get('RESUME_TEXT_MAX_CHARS', 100000))
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Resume indexing error: {str(e)}")
+                finally:
+                    db.session.remove()
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+def queue_resume_indexing(app, student_id):
+    """Index a student's resume in the background (one indexer thread per process)"""
+    global _indexer
+    if _indexer is None or not _indexer.is_alive():
+        with _indexer_lock:
+            if _indexer is None or not _indexer.is_alive():
+                _indexer = ResumeIndexer(app)
+                _indexer.start()
+    _indexer.enqueue(student_id)
+
+# Search
+
+def search_candidates_by_skills(skills, limit=SEARCH_MAX_RESULTS):
+    """Get [(StudentProfile, matched_skills)] for resumes mentioning the most of the given skills"""
+    names = parse_skills(skills) if isinstance(skills, str) else sorted({normalize_skill(s) for s in skills} - {''})
+    if not names:
+        return []
+    matches = db.func.count(ResumeSkill.skill_id).label('matches')
+    rows = db.session.query(ResumeSkill.student_id, matches)\
+        .join(Skill, Skill.id == ResumeSkill.skill_id)\
+        .filter(Skill.name.in_(names))\
+        .group_by(ResumeSkill.student_id)\
+        .order_by(matches.desc(), ResumeSkill.student_id).limit(limit).all()
+
+    profiles = {student.id: student for student in
+                StudentProfile.query.filter(StudentProfile.id.in_([row.student_id for row in rows])).all()}
+    return [(profiles[row.student_id], row.matches) for row in rows if row.student_id in profiles]
@@ -1,9 +1,27 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, send_from_directory, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, Response, stream_with_context, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from app import db
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, joinedload
+from extensions import db
 from models import User, StudentProfile, Job, Application, Company, Notification, PlacementRecord, Event
-from utils import allowed_file, generate_report, send_notification_email
+from utils import (allowed_file, generate_report, send_notification_email, stream_report, gzip_stream, REPORTS,
+                   resume_archive_rows, stream_resume_zip)
+from stats import (get_student_dashboard, get_latest_jobs, invalidate_user_stats, get_company_job_stats,
+                   APPLICATION_STATUSES)
+from placement_stats import get_global_stats, get_branch_stats, get_top_hiring_companies
+from pagination import keyset_paginate, ranked_paginate, invalidate_counts
+from eligibility import open_to_branch, eligible_jobs_query
+from matching import recommended_jobs, recommended_candidates
+from outbox import wake_outbox_worker
+from events import publish, subscribe, recent_events, event_stream, user_channel, company_channel
+from applications import update_application_statuses, is_duplicate_application, MAX_BULK_APPLICATIONS
+from storage import store_upload, send_stored_file
+from resumes import queue_resume_indexing, search_candidates_by_skills
+from fragments import (cached_fragment, invalidate_fragment, invalidate_application_fragments,
+                       TPO_SCOPE, company_scope)
+from notifications import (get_notification_feed, get_unread_count,
+                           mark_notifications_read, parse_before, MAX_BULK_NOTIFICATIONS)
 import os
 import json
 from datetime import datetime, timedelta
@@ -42,25 +60,11 @@ def student_dashboard():
         flash('Please complete your profile first.', 'warning')
         return redirect(url_for('main.student_profile'))
     
-    # Get recent applications
-    recent_applications = Application.query.filter_by(user_id=current_user.id)\
-        .order_by(Application.applied_at.desc()).limit(5).all()
+    # Recent applications, unread notifications and the stats counters in one query
+    recent_applications, notifications, stats = get_student_dashboard(current_user.id, limit=5)
     
-    # Get notifications
-    notifications = Notification.query.filter_by(user_id=current_user.id, is_read=False)\
-        .order_by(Notification.created_at.desc()).limit(5).all()
-    
-    # Get available jobs
-    available_jobs = Job.query.filter_by(is_active=True)\
-        .join(Company).filter(Company.is_approved==True)\
-        .order_by(Job.created_at.desc()).limit(5).all()
-    
-    stats = {
-        'total_applications': Application.query.filter_by(user_id=current_user.id).count(),
-        'shortlisted': Application.query.filter_by(user_id=current_user.id, status='shortlisted').count(),
-        'interviews': Application.query.filter_by(user_id=current_user.id, status='interviewed').count(),
-        'offers': Application.query.filter_by(user_id=current_user.id, status='selected').count()
-    }
+    # The same for every student; cached for a few seconds
+    available_jobs = get_latest_jobs(limit=5)
     
     return render_template('student/dashboard.html', 
                          student=student, 
@@ -105,14 +109,14 @@ def student_profile():
             if 'resume' in request.files:
                 file = request.files['resume']
                 if file and file.filename and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                    filename = timestamp + filename
-                    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(file_path)
-                    student.resume_filename = filename
+                    # Stored by content hash; re-uploading the same file reuses it
+                    student.resume_filename = store_upload(file)
             
             db.session.commit()
+            
+            # Extract the resume's text and skills in the background
+            if request.files.get('resume') and current_app.config.get('RESUME_INDEX_ON_UPLOAD'):
+                queue_resume_indexing(current_app._get_current_object(), student.id)
             flash('Profile updated successfully!', 'success')
             return redirect(url_for('main.student_profile'))
             
@@ -135,26 +139,47 @@ def student_jobs():
     type_filter = request.args.get('type', '')
     search = request.args.get('search', '')
     
+    eligible_only = request.args.get('eligible') in ['1', 'true']
+    
     # Build query
-    query = Job.query.filter_by(is_active=True)\
-        .join(Company).filter(Company.is_approved==True)
+    if eligible_only and current_user.student_profile:
+        query = eligible_jobs_query(current_user.student_profile)
+    else:
+        query = Job.query.filter_by(is_active=True)\
+            .join(Company).filter(Company.is_approved==True)
     
     if branch_filter:
-        query = query.filter(Job.eligible_branches.contains(branch_filter))
+        query = query.filter(open_to_branch(branch_filter))
     
     if type_filter:
         query = query.filter_by(job_type=type_filter)
     
-    if search:
-        query = query.filter(Job.title.contains(search) | Job.description.contains(search))
+    cursor = request.args.get('cursor')
+    per_page = request.args.get('per_page', type=int)
     
-    jobs = query.order_by(Job.created_at.desc()).all()
+    if search:
+        # Ranked lookup through the search index instead of LIKE '%x%' scans
+        page = ranked_paginate(query, Job.id, 'jobs', search, cursor, per_page)
+    else:
+        count_key = f'jobs:{branch_filter}:{type_filter}'
+        if eligible_only:
+            count_key += f':eligible:{current_user.id}'
+        page = keyset_paginate(query, Job.created_at, Job.id, cursor, per_page, count_key=count_key)
+    jobs = page.items
     
-    # Get user's applications
+    # Get user's applications for the jobs on this page
     user_applications = {app.job_id: app for app in 
-                        Application.query.filter_by(user_id=current_user.id).all()}
+                        Application.query.filter(Application.user_id == current_user.id,
+                                                 Application.job_id.in_([job.id for job in jobs])).all()}
     
-    return render_template('student/jobs.html', jobs=jobs, user_applications=user_applications)
+    if request.args.get('format') == 'json':
+        data = page.to_dict(lambda job: job.to_dict())
+        for item in data['items']:
+            application = user_applications.get(item['id'])
+            item['application_status'] = application.status if application else None
+        return jsonify(data)
+    
+    return render_template('student/jobs.html', jobs=jobs, page=page, user_applications=user_applications)
 
 @bp.route('/student/apply/<int:job_id>', methods=['POST'])
 @login_required
@@ -182,20 +207,39 @@ def apply_job(job_id):
             status='applied'
         )
         db.session.add(application)
-        db.session.commit()
         
-        # Send notification
+        # Send notification in the same transaction; the email goes out via the outbox
+        title = 'Application Submitted'
+        message = f'Your application for {job.title} at {job.company.name} has been submitted successfully.'
         notification = Notification(
             user_id=current_user.id,
-            title='Application Submitted',
-            message=f'Your application for {job.title} at {job.company.name} has been submitted successfully.',
+            title=title,
+            message=message,
             type='success'
         )
         db.session.add(notification)
+        send_notification_email(current_user, title, message, commit=False)
+        db.session.flush()
+        
+        # Push the new application to the student's and the recruiters' pages
+        publish(user_channel(current_user.id), 'notification', notification.to_dict())
+        publish(company_channel(job.company_id), 'application', {
+            'id': application.id, 'job_id': job.id, 'job_title': job.title, 'status': application.status
+        })
         db.session.commit()
+        invalidate_user_stats(current_user.id)
+        invalidate_application_fragments(job.company_id)
+        wake_outbox_worker()
         
         return jsonify({'success': True, 'message': 'Application submitted successfully'})
         
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_duplicate_application(e):
+            # A concurrent request inserted the same (user, job) application first
+            return jsonify({'success': False, 'message': 'Already applied to this job'})
+        logging.error(f"Application error: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to submit application'})
     except Exception as e:
         db.session.rollback()
         logging.error(f"Application error: {str(e)}")
@@ -210,18 +254,28 @@ def tpo_dashboard():
         return redirect(url_for('main.index'))
     
     # Dashboard statistics
+    counters = get_global_stats()
     stats = {
-        'total_students': User.query.filter_by(role='student', is_active=True).count(),
-        'placed_students': PlacementRecord.query.count(),
-        'active_companies': Company.query.filter_by(is_approved=True).count(),
-        'active_jobs': Job.query.filter_by(is_active=True).count(),
-        'total_applications': Application.query.count(),
-        'pending_companies': Company.query.filter_by(is_approved=False).count()
+        'total_students': counters.get('students', 0),
+        'placed_students': counters.get('placed', 0),
+        'active_companies': counters.get('approved_companies', 0),
+        'active_jobs': counters.get('active_jobs', 0),
+        'total_applications': counters.get('applications', 0),
+        'pending_companies': counters.get('pending_companies', 0)
     }
     
-    # Recent activities
-    recent_applications = Application.query.order_by(Application.applied_at.desc()).limit(10).all()
-    pending_companies = Company.query.filter_by(is_approved=False).order_by(Company.created_at.desc()).limit(5).all()
+    # Recent activities, shared by every TPO and only queried when not cached
+    recent_applications_html = cached_fragment('recent_applications', TPO_SCOPE, lambda: render_template(
+        'tpo/_recent_applications.html',
+        recent_applications=Application.query.options(
+            joinedload(Application.user), joinedload(Application.job).joinedload(Job.company)
+        ).order_by(Application.applied_at.desc()).limit(10).all()
+    ))
+    pending_companies_html = cached_fragment('pending_companies', TPO_SCOPE, lambda: render_template(
+        'tpo/_pending_companies.html',
+        pending_companies=Company.query.filter_by(is_approved=False)
+            .order_by(Company.created_at.desc()).limit(5).all()
+    ))
     
     # Upcoming events
     upcoming_events = Event.query.filter(Event.event_date >= datetime.utcnow())\
@@ -229,8 +283,8 @@ def tpo_dashboard():
     
     return render_template('tpo/dashboard.html', 
                          stats=stats, 
-                         recent_applications=recent_applications,
-                         pending_companies=pending_companies,
+                         recent_applications_html=recent_applications_html,
+                         pending_companies_html=pending_companies_html,
                          upcoming_events=upcoming_events)
 
 @bp.route('/tpo/students')
@@ -268,16 +322,24 @@ def tpo_students():
         elif cgpa_filter == '<6.0':
             query = query.filter(StudentProfile.cgpa < 6.0)
     
+    cursor = request.args.get('cursor')
+    per_page = request.args.get('per_page', type=int)
+    options = [contains_eager(User.student_profile)]
+    
     if search:
-        query = query.filter(
-            (StudentProfile.first_name.contains(search)) |
-            (StudentProfile.last_name.contains(search)) |
-            (StudentProfile.roll_number.contains(search))
-        )
+        page = ranked_paginate(query, StudentProfile.id, 'students', search, cursor, per_page,
+                               key=lambda user: user.student_profile.id, options=options)
+    else:
+        count_key = f'students:{branch_filter}:{status_filter}:{cgpa_filter}'
+        page = keyset_paginate(query, StudentProfile.created_at, StudentProfile.id, cursor, per_page,
+                               key=lambda user: (user.student_profile.created_at, user.student_profile.id),
+                               count_key=count_key, options=options)
+    students = page.items
     
-    students = query.order_by(StudentProfile.created_at.desc()).all()
+    if request.args.get('format') == 'json':
+        return jsonify(page.to_dict(lambda user: user.student_profile.to_dict(email=user.email)))
     
-    return render_template('tpo/students.html', students=students)
+    return render_template('tpo/students.html', students=students, page=page)
 
 @bp.route('/tpo/reports')
 @login_required
@@ -287,33 +349,56 @@ def tpo_reports():
         return redirect(url_for('main.index'))
     
     # Generate report data
+    counters = get_global_stats()
     placement_stats = {
-        'total_eligible': User.query.filter_by(role='student', is_active=True).count(),
-        'total_placed': PlacementRecord.query.count(),
-        'average_package': db.session.query(db.func.avg(PlacementRecord.package_amount)).scalar() or 0,
-        'highest_package': db.session.query(db.func.max(PlacementRecord.package_amount)).scalar() or 0
+        'total_eligible': counters.get('students', 0),
+        'total_placed': counters.get('placed', 0),
+        'average_package': counters['package_avg'],
+        'highest_package': counters.get('package_max', 0)
     }
     
     # Branch-wise placement data
-    branch_data = db.session.query(
-        StudentProfile.branch,
-        db.func.count(StudentProfile.id).label('total'),
-        db.func.count(PlacementRecord.id).label('placed')
-    ).outerjoin(PlacementRecord, StudentProfile.user_id == PlacementRecord.student_id)\
-     .group_by(StudentProfile.branch).all()
+    branch_data = get_branch_stats()
     
     # Company-wise hiring data
-    company_data = db.session.query(
-        Company.name,
-        db.func.count(PlacementRecord.id).label('hired')
-    ).join(PlacementRecord).group_by(Company.name)\
-     .order_by(db.func.count(PlacementRecord.id).desc()).limit(10).all()
+    company_data = get_top_hiring_companies(limit=10)
     
     return render_template('tpo/reports.html',
                          placement_stats=placement_stats,
                          branch_data=branch_data,
                          company_data=company_data)
 
+@bp.route('/tpo/reports/export/<report_type>')
+@login_required
+def tpo_export_report(report_type):
+    if current_user.role != 'tpo':
+        flash('Access denied.', 'error')
+        return redirect(url_for('main.index'))
+    
+    if report_type not in REPORTS:
+        abort(404)
+    
+    format = request.args.get('format', 'csv')
+    if format not in ['csv', 'json']:
+        abort(400)
+    
+    kwargs = {}
+    if report_type == 'student_data' and request.args.get('branch'):
+        kwargs['branch'] = request.args.get('branch')
+    
+    # Rows are streamed straight from a batched query so memory stays flat
+    chunks = stream_report(report_type, format, **kwargs)
+    filename = f"{report_type}_{datetime.now().strftime('%Y%m%d')}.{format}"
+    mimetype = 'text/csv' if format == 'csv' else 'application/json'
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    
+    if request.args.get('gzip') in ['1', 'true'] or request.accept_encodings['gzip'] > 0:
+        chunks = gzip_stream(chunks)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
 # Recruiter Routes
 @bp.route('/recruiter/dashboard')
 @login_required
@@ -327,30 +412,39 @@ def recruiter_dashboard():
         flash('Please complete your profile first.', 'warning')
         return redirect(url_for('main.recruiter_profile'))
     
-    # Get company jobs
-    company_jobs = Job.query.filter_by(company_id=recruiter.company_id).all()
+    company_id = recruiter.company_id
+    job_stats = get_company_job_stats(company_id)
+    total_jobs, active_jobs = db.session.query(
+        db.func.count(Job.id), db.func.coalesce(db.func.sum(db.case((Job.is_active == True, 1), else_=0)), 0)
+    ).filter(Job.company_id == company_id).one()
     
     # Statistics
     stats = {
-        'total_jobs': len(company_jobs),
-        'active_jobs': len([j for j in company_jobs if j.is_active]),
-        'total_applications': sum(job.application_count for job in company_jobs),
-        'shortlisted': Application.query.join(Job).filter(
-            Job.company_id == recruiter.company_id,
-            Application.status == 'shortlisted'
-        ).count()
+        'total_jobs': total_jobs,
+        'active_jobs': active_jobs,
+        'total_applications': sum(s['total'] for s in job_stats.values()),
+        'shortlisted': sum(s['by_status']['shortlisted'] for s in job_stats.values())
     }
     
-    # Recent applications
-    recent_applications = Application.query.join(Job).filter(
-        Job.company_id == recruiter.company_id
-    ).order_by(Application.applied_at.desc()).limit(10).all()
+    # Company jobs and recent applications, shared by the company's recruiters
+    company_jobs_html = cached_fragment('company_jobs', company_scope(company_id), lambda: render_template(
+        'recruiter/_company_jobs.html',
+        company_jobs=Job.query.filter_by(company_id=company_id).order_by(Job.created_at.desc()).all(),
+        job_stats=job_stats
+    ))
+    recent_applications_html = cached_fragment('recent_applications', company_scope(company_id), lambda: render_template(
+        'recruiter/_recent_applications.html',
+        recent_applications=Application.query.join(Job).filter(Job.company_id == company_id)
+            .options(joinedload(Application.user), contains_eager(Application.job).joinedload(Job.company))
+            .order_by(Application.applied_at.desc()).limit(10).all()
+    ))
     
     return render_template('recruiter/dashboard.html',
                          recruiter=recruiter,
-                         company_jobs=company_jobs,
+                         job_stats=job_stats,
                          stats=stats,
-                         recent_applications=recent_applications)
+                         company_jobs_html=company_jobs_html,
+                         recent_applications_html=recent_applications_html)
 
 @bp.route('/recruiter/jobs', methods=['GET', 'POST'])
 @login_required
@@ -384,6 +478,9 @@ def recruiter_jobs():
             )
             db.session.add(job)
             db.session.commit()
+            invalidate_counts('jobs:')
+            invalidate_counts(f'company_jobs:{recruiter.company_id}')
+            invalidate_fragment('company_jobs', company_scope(recruiter.company_id))
             flash('Job posted successfully!', 'success')
             return redirect(url_for('main.recruiter_jobs'))
             
@@ -393,10 +490,16 @@ def recruiter_jobs():
             flash('Failed to post job. Please try again.', 'error')
     
     # Get company jobs
-    company_jobs = Job.query.filter_by(company_id=recruiter.company_id)\
-        .order_by(Job.created_at.desc()).all()
+    page = keyset_paginate(Job.query.filter_by(company_id=recruiter.company_id),
+                           Job.created_at, Job.id,
+                           request.args.get('cursor'), request.args.get('per_page', type=int),
+                           count_key=f'company_jobs:{recruiter.company_id}')
+    company_jobs = page.items
     
-    return render_template('recruiter/jobs.html', company_jobs=company_jobs, recruiter=recruiter)
+    if request.args.get('format') == 'json':
+        return jsonify(page.to_dict(lambda job: job.to_dict()))
+    
+    return render_template('recruiter/jobs.html', company_jobs=company_jobs, page=page, recruiter=recruiter)
 
 @bp.route('/recruiter/profile')
 @login_required
@@ -409,22 +512,186 @@ def recruiter_profile():
     flash('Recruiter profile management coming soon.', 'info')
     return redirect(url_for('main.recruiter_dashboard'))
 
+@bp.route('/recruiter/jobs/<int:job_id>/resumes.zip')
+@login_required
+def recruiter_export_resumes(job_id):
+    if current_user.role not in ['recruiter', 'tpo']:
+        flash('Access denied.', 'error')
+        return redirect(url_for('main.index'))
+    
+    job = Job.query.get_or_404(job_id)
+    if current_user.role == 'recruiter':
+        recruiter = current_user.recruiter_profile
+        if not recruiter or job.company_id != recruiter.company_id:
+            flash('Access denied.', 'error')
+            return redirect(url_for('main.recruiter_dashboard'))
+    
+    statuses = request.args.getlist('status') or ['shortlisted']
+    if any(status not in APPLICATION_STATUSES for status in statuses):
+        abort(400)
+    
+    # Candidate rows are loaded now; the archive itself streams without the database
+    rows = resume_archive_rows(job.id, statuses)
+    chunks = stream_resume_zip(rows, current_app.config.get('STORAGE_CHUNK_SIZE', 64 * 1024))
+    filename = f"{secure_filename(job.title) or 'job'}_{'-'.join(statuses)}_resumes_{datetime.now().strftime('%Y%m%d')}.zip"
+    return Response(chunks, mimetype='application/zip', headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no'
+    })
+
 # File serving
 @bp.route('/uploads/<filename>')
 @login_required
 def uploaded_file(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    return send_stored_file(filename)
 
 # API endpoints for AJAX requests
+@bp.route('/api/notifications')
+@login_required
+def api_notifications():
+    page = get_notification_feed(
+        current_user.id,
+        cursor=request.args.get('cursor'),
+        per_page=request.args.get('per_page', type=int),
+        unread_only=request.args.get('unread', '').lower() in ['true', 'on', '1']
+    )
+    data = page.to_dict(lambda notification: notification.to_dict())
+    data.update(success=True, unread_count=get_unread_count(current_user.id))
+    return jsonify(data)
+
+@bp.route('/api/notifications/unread_count')
+@login_required
+def api_unread_count():
+    return jsonify({'success': True, 'unread_count': get_unread_count(current_user.id)})
+
+@bp.route('/api/notifications/mark_read', methods=['POST'])
+@login_required
+def mark_notifications_read_bulk():
+    data = request.get_json(silent=True) or {}
+    notification_ids = data.get('notification_ids')
+    before = parse_before(data.get('before'))
+    if notification_ids is not None:
+        if not isinstance(notification_ids, list) or len(notification_ids) > MAX_BULK_NOTIFICATIONS:
+            return jsonify({'success': False, 'message': 'Invalid notification list'})
+        try:
+            notification_ids = [int(i) for i in notification_ids]
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Invalid notification list'})
+    elif data.get('before') and before is None:
+        return jsonify({'success': False, 'message': 'Invalid timestamp'})
+    elif before is None and not data.get('all'):
+        return jsonify({'success': False, 'message': 'Nothing to mark as read'})
+    
+    try:
+        updated = mark_notifications_read(current_user.id, notification_ids, before)
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Mark read error: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to update notifications'})
+    
+    return jsonify({'success': True, 'updated': updated, 'unread_count': get_unread_count(current_user.id)})
+
 @bp.route('/api/notifications/mark_read/<int:notification_id>', methods=['POST'])
 @login_required
 def mark_notification_read(notification_id):
-    notification = Notification.query.filter_by(id=notification_id, user_id=current_user.id).first()
-    if notification:
-        notification.is_read = True
-        db.session.commit()
+    if mark_notifications_read(current_user.id, [notification_id]):
         return jsonify({'success': True})
-    return jsonify({'success': False})
+    # Already read still counts as success, as long as it's the user's notification
+    exists = db.session.query(Notification.id)\
+        .filter_by(id=notification_id, user_id=current_user.id).first()
+    return jsonify({'success': exists is not None})
+
+def _event_channels():
+    channels = [user_channel(current_user.id)]
+    if current_user.role == 'recruiter' and current_user.recruiter_profile:
+        channels.append(company_channel(current_user.recruiter_profile.company_id))
+    return channels
+
+@bp.route('/api/stream')
+@login_required
+def api_stream():
+    subscription = subscribe(_event_channels(),
+                             request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    if subscription is None:
+        # No content tells EventSource to stop; the page polls /api/events and retries later
+        response = Response(status=204)
+        response.headers['Retry-After'] = str(current_app.config.get('EVENT_STREAM_RETRY_AFTER', 30))
+        return response
+    
+    # The stream outlives the request's database work; don't keep a pooled connection for it
+    db.session.remove()
+    
+    stream = event_stream(subscription,
+                          keepalive=current_app.config.get('EVENT_STREAM_KEEPALIVE', 15),
+                          timeout=current_app.config.get('EVENT_STREAM_TIMEOUT', 300))
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@bp.route('/api/events')
+@login_required
+def api_events():
+    events, last_event_id = recent_events(_event_channels(), request.args.get('last_event_id'))
+    return jsonify({
+        'success': True,
+        'events': [{'id': event_id, 'event': event_name, 'data': json.loads(data)}
+                   for event_id, event_name, data in events],
+        'last_event_id': last_event_id
+    })
+
+@bp.route('/api/jobs/recommended')
+@login_required
+def api_recommended_jobs():
+    if current_user.role != 'student' or not current_user.student_profile:
+        return jsonify({'success': False, 'message': 'Access denied'})
+    
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    matches = recommended_jobs(current_user.student_profile, limit)
+    return jsonify({
+        'success': True,
+        'jobs': [dict(job.to_dict(), score=round(score, 4)) for job, score in matches]
+    })
+
+@bp.route('/api/jobs/<int:job_id>/candidates')
+@login_required
+def api_job_candidates(job_id):
+    if current_user.role != 'recruiter':
+        return jsonify({'success': False, 'message': 'Access denied'})
+    
+    job = Job.query.get_or_404(job_id)
+    recruiter = current_user.recruiter_profile
+    if not recruiter or job.company_id != recruiter.company_id:
+        return jsonify({'success': False, 'message': 'Access denied'})
+    
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    matches = recommended_candidates(job, limit)
+    return jsonify({
+        'success': True,
+        'candidates': [dict(student.to_dict(), score=round(score, 4)) for student, score in matches]
+    })
+
+@bp.route('/api/candidates/search')
+@login_required
+def api_search_candidates():
+    if current_user.role not in ['recruiter', 'tpo']:
+        return jsonify({'success': False, 'message': 'Access denied'})
+    
+    skills = request.args.get('skills', '')
+    job_id = request.args.get('job_id', type=int)
+    if job_id:
+        job = Job.query.get_or_404(job_id)
+        recruiter = current_user.recruiter_profile
+        if current_user.role == 'recruiter' and (not recruiter or job.company_id != recruiter.company_id):
+            return jsonify({'success': False, 'message': 'Access denied'})
+        skills = skills or job.skills_required or ''
+    
+    limit = min(request.args.get('limit', 20, type=int), 50)
+    matches = search_candidates_by_skills(skills, limit)
+    return jsonify({
+        'success': True,
+        'candidates': [dict(student.to_dict(), resume_skill_matches=count) for student, count in matches]
+    })
 
 @bp.route('/api/application/update_status/<int:application_id>', methods=['POST'])
 @login_required
@@ -432,49 +699,52 @@ def update_application_status(application_id):
     if current_user.role != 'recruiter':
         return jsonify({'success': False, 'message': 'Access denied'})
     
-    application = Application.query.get_or_404(application_id)
     recruiter = current_user.recruiter_profile
+    if not recruiter:
+        return jsonify({'success': False, 'message': 'Please complete your profile first'})
+    
+    new_status = request.json.get('status')
+    if new_status not in APPLICATION_STATUSES:
+        return jsonify({'success': False, 'message': 'Invalid status'})
     
-    # Check if the application belongs to recruiter's company
-    if application.job.company_id != recruiter.company_id:
+    result = update_application_statuses(recruiter.company_id, [application_id], new_status)[application_id]
+    if result == 'not_found':
+        abort(404)
+    if result == 'forbidden':
         return jsonify({'success': False, 'message': 'Access denied'})
     
-    new_status = request.json.get('status')
-    if new_status in ['applied', 'shortlisted', 'interviewed', 'selected', 'rejected']:
-        application.status = new_status
-        application.updated_at = datetime.utcnow()
-        
-        # Create notification for student
-        notification = Notification(
-            user_id=application.user_id,
-            title='Application Status Updated',
-            message=f'Your application for {application.job.title} has been {new_status}.',
-            type='info'
-        )
-        db.session.add(notification)
-        
-        # If selected, create placement record
-        if new_status == 'selected':
-            existing_record = PlacementRecord.query.filter_by(
-                student_id=application.user_id,
-                job_id=application.job_id
-            ).first()
-            
-            if not existing_record:
-                placement_record = PlacementRecord(
-                    student_id=application.user_id,
-                    company_id=application.job.company_id,
-                    job_id=application.job_id,
-                    academic_year='2024-25'
-                )
-                db.session.add(placement_record)
-                
-                # Update student placement status
-                student = User.query.get(application.user_id).student_profile
-                if student:
-                    student.placement_status = 'placed'
-        
-        db.session.commit()
-        return jsonify({'success': True})
+    wake_outbox_worker()
+    return jsonify({'success': True})
+
+@bp.route('/api/applications/bulk_update_status', methods=['POST'])
+@login_required
+def bulk_update_application_status():
+    if current_user.role != 'recruiter':
+        return jsonify({'success': False, 'message': 'Access denied'})
+    
+    recruiter = current_user.recruiter_profile
+    if not recruiter:
+        return jsonify({'success': False, 'message': 'Please complete your profile first'})
     
-    return jsonify({'success': False, 'message': 'Invalid status'})
+    data = request.get_json(silent=True) or {}
+    new_status = data.get('status')
+    application_ids = data.get('application_ids') or []
+    
+    if new_status not in APPLICATION_STATUSES:
+        return jsonify({'success': False, 'message': 'Invalid status'})
+    if not isinstance(application_ids, list) or not application_ids:
+        return jsonify({'success': False, 'message': 'No applications selected'})
+    if len(application_ids) > MAX_BULK_APPLICATIONS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BULK_APPLICATIONS} applications can be updated at once'})
+    
+    try:
+        results = update_application_statuses(recruiter.company_id, application_ids, new_status)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid application ids'})
+    
+    wake_outbox_worker()
+    return jsonify({
+        'success': True,
+        'updated': sum(1 for result in results.values() if result == 'updated'),
+        'results': {str(application_id): result for application_id, result in results.items()}
+    })
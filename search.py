@@ -0,0 +1,433 @@
+import re
+import math
+import bisect
+import threading
+import logging
+from sqlalchemy import event, inspect, text, select, literal_column
+from sqlalchemy.exc import OperationalError
+from flask import current_app
+from extensions import db
+from models import Job, StudentProfile
+from changefeed import ChangeReader, JOB, STUDENT
+
+# Full-text search over jobs and students
+#
+# On SQLite the index lives in FTS5 virtual tables written in the same
+# transaction as the row change, and a search page is one SQL query that
+# joins the match to the caller's filters. Other databases fall back to an
+# in-process inverted index that is built lazily and follows committed changes
+# from every worker through the change feed; its ranked ids are filtered in
+# the database in chunks until the page is known. Either way pages hold only
+# rows that pass the filters and the total counts all of them.
+
+SEARCH_MAX_RESULTS = 500
+FILTER_CHUNK_SIZE = 1000
+
+JOB_FIELDS = {'title': 10.0, 'description': 1.0, 'skills': 5.0}
+STUDENT_FIELDS = {'name': 10.0, 'roll_number': 10.0, 'skills': 3.0}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def tokenize(value):
+    return _TOKEN_RE.findall((value or '').lower())
+
+def job_document(job):
+    return {
+        'title': job.title,
+        'description': job.description,
+        'skills': job.skills_required
+    }
+
+def student_document(student):
+    return {
+        'name': f"{student.first_name or ''} {student.last_name or ''}",
+        'roll_number': student.roll_number,
+        'skills': student.skills
+    }
+
+class InvertedIndex:
+    """In-memory weighted inverted index with prefix matching"""
+
+    def __init__(self, field_weights):
+        self.field_weights = field_weights
+        self._postings = {}
+        self._documents = {}
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._lock = threading.RLock()
+
+    def add(self, doc_id, fields):
+        with self._lock:
+            self.remove(doc_id)
+            weights = {}
+            for field, value in fields.items():
+                for token in tokenize(value):
+                    weights[token] = weights.get(token, 0) + self.field_weights.get(field, 1.0)
+            for token, weight in weights.items():
+                if token not in self._postings:
+                    self._postings[token] = {}
+                    self._vocabulary_dirty = True
+                self._postings[token][doc_id] = weight
+            self._documents[doc_id] = set(weights)
+
+    def remove(self, doc_id):
+        with self._lock:
+            for token in self._documents.pop(doc_id, ()):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[token]
+                        self._vocabulary_dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary = []
+            self._vocabulary_dirty = False
+
+    def _expand(self, prefix):
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            total_docs = max(len(self._documents), 1)
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total_docs / len(postings))
+                    for doc_id, weight in postings.items():
+                        token_scores[doc_id] = token_scores.get(doc_id, 0) + weight * idf
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {doc_id: score + token_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in token_scores}
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        end = None if limit is None else offset + limit
+        return [doc_id for doc_id, _ in ranked[offset:end]]
+
+class SearchIndex:
+    """Interface shared by the search backends"""
+
+    name = None
+
+    def ensure_schema(self):
+        pass
+
+    def index_job(self, connection, job):
+        raise NotImplementedError
+
+    def remove_job(self, connection, job_id):
+        raise NotImplementedError
+
+    def index_student(self, connection, student):
+        raise NotImplementedError
+
+    def remove_student(self, connection, student_id):
+        raise NotImplementedError
+
+    def search_jobs(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        raise NotImplementedError
+
+    def search_students(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        raise NotImplementedError
+
+    def page(self, kind, text, query, id_column, offset, limit):
+        """Get (ids, total) for the rows of query matching text, best match first
+
+        kind is 'jobs' or 'students'. Every match is ranked and then filtered
+        by query in chunks of ids, so no match is out of reach.
+        """
+        search = self.search_jobs if kind == 'jobs' else self.search_students
+        ranked = search(text, limit=None)
+        matching = []
+        for start in range(0, len(ranked), FILTER_CHUNK_SIZE):
+            chunk = ranked[start:start + FILTER_CHUNK_SIZE]
+            allowed = {row_id for (row_id,) in query.with_entities(id_column)
+                       .filter(id_column.in_(chunk)).order_by(None).all()}
+            matching.extend(row_id for row_id in chunk if row_id in allowed)
+        return matching[offset:offset + limit], len(matching)
+
+    def rebuild(self):
+        raise NotImplementedError
+
+class FTS5SearchIndex(SearchIndex):
+    """SQLite FTS5 backed index, written inside the caller's transaction"""
+
+    name = 'fts5'
+
+    TABLES = {
+        'job_search': JOB_FIELDS,
+        'student_search': STUDENT_FIELDS
+    }
+    KINDS = {'jobs': 'job_search', 'students': 'student_search'}
+
+    def has_schema(self):
+        inspector = inspect(db.engine)
+        return all(inspector.has_table(table) for table in self.TABLES)
+
+    def ensure_schema(self):
+        created = False
+        with db.engine.begin() as connection:
+            for table, fields in self.TABLES.items():
+                exists = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': table}
+                ).first()
+                if not exists:
+                    columns = ', '.join(fields)
+                    connection.execute(text(
+                        f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, tokenize='unicode61')"
+                    ))
+                    created = True
+        if created:
+            self.rebuild()
+
+    def _write(self, connection, table, doc_id, document):
+        columns = list(self.TABLES[table])
+        connection.execute(text(f"DELETE FROM {table} WHERE rowid = :id"), {'id': doc_id})
+        connection.execute(
+            text(f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+                 f"VALUES (:id, {', '.join(':' + c for c in columns)})"),
+            {'id': doc_id, **{c: document.get(c) or '' for c in columns}}
+        )
+
+    def _delete(self, connection, table, doc_id):
+        connection.execute(text(f"DELETE FROM {table} WHERE rowid = :id"), {'id': doc_id})
+
+    def index_job(self, connection, job):
+        self._write(connection, 'job_search', job.id, job_document(job))
+
+    def remove_job(self, connection, job_id):
+        self._delete(connection, 'job_search', job_id)
+
+    def index_student(self, connection, student):
+        self._write(connection, 'student_search', student.id, student_document(student))
+
+    def remove_student(self, connection, student_id):
+        self._delete(connection, 'student_search', student_id)
+
+    @staticmethod
+    def _match(query):
+        return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+    def _rank(self, table):
+        weights = ', '.join(str(w) for w in self.TABLES[table].values())
+        return f"bm25({table}, {weights})"
+
+    def _search(self, table, query, limit, offset):
+        match = self._match(query)
+        if not match:
+            return []
+        rows = db.session.execute(
+            text(f"SELECT rowid FROM {table} WHERE {table} MATCH :match "
+                 f"ORDER BY {self._rank(table)}, rowid DESC LIMIT :limit OFFSET :offset"),
+            {'match': match, 'limit': -1 if limit is None else limit, 'offset': offset}
+        )
+        return [row[0] for row in rows]
+
+    def page(self, kind, text_query, query, id_column, offset, limit):
+        """Match, filter, rank and count in one query built on the caller's query"""
+        match = self._match(text_query)
+        if not match:
+            return [], 0
+        table = self.KINDS[kind]
+        # Materialized first: joined directly, SQLite re-runs the MATCH for every candidate row
+        matches = select(literal_column('rowid').label('id'), literal_column(self._rank(table)).label('rank'))\
+            .select_from(text(table)).where(text(f"{table} MATCH :match"))\
+            .cte(f'{table}_matches').prefix_with('MATERIALIZED')
+        matched = query.join(matches, matches.c.id == id_column).params(match=match)
+        rows = matched.with_entities(id_column, db.func.count().over())\
+            .order_by(matches.c.rank, id_column.desc()).offset(offset).limit(limit).all()
+        if rows:
+            return [row_id for row_id, _ in rows], rows[0][1]
+        return [], matched.with_entities(id_column).order_by(None).count() if offset else 0
+
+    def search_jobs(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        return self._search('job_search', query, limit, offset)
+
+    def search_students(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        return self._search('student_search', query, limit, offset)
+
+    def rebuild(self):
+        connection = db.session.connection()
+        for table in self.TABLES:
+            connection.execute(text(f"DELETE FROM {table}"))
+        for job in Job.query.yield_per(1000):
+            self.index_job(connection, job)
+        for student in StudentProfile.query.yield_per(1000):
+            self.index_student(connection, student)
+        db.session.commit()
+
+class MemorySearchIndex(SearchIndex):
+    """Per-process inverted index used when FTS5 is unavailable
+
+    Writes reach it through the change feed rather than the flush, so only
+    committed data is indexed and changes made by other workers show up too.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self.jobs = InvertedIndex(JOB_FIELDS)
+        self.students = InvertedIndex(STUDENT_FIELDS)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._changes = ChangeReader()
+
+    def _refresh(self):
+        changes = self._changes.changes() if self._loaded else None
+        if changes is None:
+            with self._lock:
+                changes = self._changes.changes() if self._loaded else None
+                if changes is None:
+                    self.rebuild()
+                    return
+        if changes.get(JOB):
+            self._reload(self.jobs, Job, changes[JOB], job_document)
+        if changes.get(STUDENT):
+            self._reload(self.students, StudentProfile, changes[STUDENT], student_document)
+
+    @staticmethod
+    def _reload(index, model, ids, document):
+        ids = sorted(ids)
+        found = set()
+        for start in range(0, len(ids), FILTER_CHUNK_SIZE):
+            rows = model.query.filter(model.id.in_(ids[start:start + FILTER_CHUNK_SIZE]))\
+                .execution_options(populate_existing=True)
+            for row in rows:
+                index.add(row.id, document(row))
+                found.add(row.id)
+        for doc_id in set(ids) - found:
+            index.remove(doc_id)
+
+    # Changes arrive through the change feed once committed
+    def index_job(self, connection, job):
+        pass
+
+    def remove_job(self, connection, job_id):
+        pass
+
+    def index_student(self, connection, student):
+        pass
+
+    def remove_student(self, connection, student_id):
+        pass
+
+    def search_jobs(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        self._refresh()
+        return self.jobs.search(query, limit, offset)
+
+    def search_students(self, query, limit=SEARCH_MAX_RESULTS, offset=0):
+        self._refresh()
+        return self.students.search(query, limit, offset)
+
+    def rebuild(self):
+        # Changes committed while loading are read again afterwards
+        self._changes.reset()
+        self.jobs.clear()
+        self.students.clear()
+        for job in Job.query.yield_per(1000):
+            self.jobs.add(job.id, job_document(job))
+        for student in StudentProfile.query.yield_per(1000):
+            self.students.add(student.id, student_document(student))
+        self._loaded = True
+
+_search_index = None
+
+def _fts5_wanted():
+    return current_app.config.get('SEARCH_BACKEND', 'auto') in ('auto', 'fts5') \
+        and db.engine.dialect.name == 'sqlite'
+
+def init_search_index():
+    """Create the FTS5 tables if needed and select the backend (run by init-db)"""
+    global _search_index
+    index = None
+    if _fts5_wanted():
+        try:
+            index = FTS5SearchIndex()
+            index.ensure_schema()
+        except OperationalError as e:
+            logging.warning(f"FTS5 unavailable, using in-process search index: {str(e)}")
+            index = None
+    _search_index = index or MemorySearchIndex()
+    return _search_index
+
+def get_search_index():
+    """Get the configured search backend, choosing FTS5 on SQLite when its tables exist
+
+    Only reads the schema, so it is safe to call for the first time from
+    inside a flush; the tables themselves are created by init_search_index().
+    """
+    global _search_index
+    if _search_index is None:
+        index = None
+        if _fts5_wanted():
+            index = FTS5SearchIndex()
+            if not index.has_schema():
+                logging.warning("Search tables are missing, using in-process search index; run 'flask init-db'")
+                index = None
+        _search_index = index or MemorySearchIndex()
+    return _search_index
+
+def search_jobs(query, limit=SEARCH_MAX_RESULTS, offset=0):
+    """Get job ids matching the query, best match first"""
+    return get_search_index().search_jobs(query, limit, offset)
+
+def search_students(query, limit=SEARCH_MAX_RESULTS, offset=0):
+    """Get student profile ids matching the query, best match first"""
+    return get_search_index().search_students(query, limit, offset)
+
+def search_page(kind, text, query, id_column, offset, limit):
+    """Get (ids, total) for the rows of query matching text, best match first"""
+    return get_search_index().page(kind, text, query, id_column, offset, limit)
+
+# Index maintenance hooks
+
+def _changed(target, fields):
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+@event.listens_for(Job, 'after_insert')
+def _job_inserted(mapper, connection, target):
+    get_search_index().index_job(connection, target)
+
+@event.listens_for(Job, 'after_update')
+def _job_updated(mapper, connection, target):
+    if _changed(target, ['title', 'description', 'skills_required']):
+        get_search_index().index_job(connection, target)
+
+@event.listens_for(Job, 'after_delete')
+def _job_deleted(mapper, connection, target):
+    get_search_index().remove_job(connection, target.id)
+
+@event.listens_for(StudentProfile, 'after_insert')
+def _student_inserted(mapper, connection, target):
+    get_search_index().index_student(connection, target)
+
+@event.listens_for(StudentProfile, 'after_update')
+def _student_updated(mapper, connection, target):
+    if _changed(target, ['first_name', 'last_name', 'roll_number', 'skills']):
+        get_search_index().index_student(connection, target)
+
+@event.listens_for(StudentProfile, 'after_delete')
+def _student_deleted(mapper, connection, target):
+    get_search_index().remove_student(connection, target.id)
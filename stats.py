@@ -0,0 +1,154 @@
+from flask import current_app
+from sqlalchemy import case, literal, select, union_all
+from sqlalchemy.orm import aliased, contains_eager
+from sqlalchemy.orm.attributes import set_committed_value
+from extensions import db
+from models import Application, Job, Company, Notification
+from cache import TTLCache
+from profiles import snapshot, restore
+from notifications import check_unread_count
+
+APPLICATION_STATUSES = ['applied', 'shortlisted', 'interviewed', 'selected', 'rejected']
+
+# Per-user application counters, invalidated whenever the user's applications
+# change. The cache and its invalidation are per process, so the TTL is kept to
+# a few seconds: a change made through another worker shows up within it.
+_user_stats_cache = TTLCache(maxsize=10000)
+
+def get_application_status_counts(user_id):
+    """Get a status -> count mapping for a user's applications in one grouped query"""
+    rows = db.session.query(Application.status, db.func.count(Application.id))\
+        .filter(Application.user_id == user_id)\
+        .group_by(Application.status).all()
+
+    counts = {status: 0 for status in APPLICATION_STATUSES}
+    for status, count in rows:
+        counts[status or 'applied'] = counts.get(status or 'applied', 0) + count
+    return counts
+
+def _dashboard_stats(total, shortlisted, interviews, offers):
+    return {
+        'total_applications': total,
+        'shortlisted': shortlisted,
+        'interviews': interviews,
+        'offers': offers
+    }
+
+def _cache_user_stats(user_id, stats):
+    _user_stats_cache.set(f'user_stats:{user_id}', stats, ttl=current_app.config.get('STATS_CACHE_TTL', 5))
+
+def get_user_application_stats(user_id):
+    """Get dashboard statistics for a student, served from cache when possible"""
+    stats = _user_stats_cache.get(f'user_stats:{user_id}')
+    if stats is not None:
+        return stats
+
+    counts = get_application_status_counts(user_id)
+    stats = _dashboard_stats(sum(counts.values()), counts['shortlisted'],
+                             counts['interviewed'], counts['selected'])
+    _cache_user_stats(user_id, stats)
+    return stats
+
+def _status_count(status):
+    return db.func.sum(case((Application.status == status, 1), else_=0)).over()
+
+def get_student_dashboard(user_id, limit=5):
+    """Get a student's newest applications, newest unread notifications and statistics in one query
+
+    Both lists are ranked with ROW_NUMBER and joined side by side on that position
+    against a 1..limit sequence, so row n holds the n-th application and the
+    n-th notification (either may be missing). The counts are window sums
+    over all of the user's applications, evaluated before the ranks are cut
+    off, so they ride along on every application row.
+    """
+    slots = union_all(*[select(literal(slot).label('slot')) for slot in range(1, limit + 1)]).subquery()
+    applications = select(
+        Application,
+        db.func.row_number().over(order_by=(Application.applied_at.desc(), Application.id.desc())).label('slot'),
+        db.func.count().over().label('total'),
+        _status_count('shortlisted').label('shortlisted'),
+        _status_count('interviewed').label('interviews'),
+        _status_count('selected').label('offers')
+    ).where(Application.user_id == user_id).subquery()
+    notifications = select(
+        Notification,
+        db.func.row_number().over(order_by=(Notification.created_at.desc(), Notification.id.desc())).label('slot')
+    ).where(Notification.user_id == user_id, Notification.is_read == False).subquery()
+
+    application_row = aliased(Application, applications)
+    notification_row = aliased(Notification, notifications)
+    rows = db.session.query(
+        application_row, notification_row,
+        applications.c.total, applications.c.shortlisted, applications.c.interviews, applications.c.offers
+    ).select_from(slots)\
+        .outerjoin(applications, applications.c.slot == slots.c.slot)\
+        .outerjoin(notifications, notifications.c.slot == slots.c.slot)\
+        .order_by(slots.c.slot).all()
+
+    recent_applications = [row[0] for row in rows if row[0] is not None]
+    unread_notifications = [row[1] for row in rows if row[1] is not None]
+    counts = rows[0][2:] if recent_applications else (0, 0, 0, 0)
+    stats = _dashboard_stats(*(int(count) for count in counts))
+    _cache_user_stats(user_id, stats)
+    check_unread_count(user_id, unread_notifications)
+    return recent_applications, unread_notifications, stats
+
+def invalidate_user_stats(user_id):
+    """Drop cached statistics for a user after their applications change"""
+    _user_stats_cache.delete(f'user_stats:{user_id}')
+
+def get_job_application_stats(company_id=None):
+    """Get per-job application counts with a per-status breakdown in one grouped query
+
+    Returns {company_id: {job_id: {'total': n, 'by_status': {status: n}}}}.
+    Jobs without applications are not included.
+    """
+    query = db.session.query(
+        Job.company_id,
+        Application.job_id,
+        Application.status,
+        db.func.count(Application.id)
+    ).join(Job, Application.job_id == Job.id)
+
+    if company_id is not None:
+        query = query.filter(Job.company_id == company_id)
+
+    rows = query.group_by(Job.company_id, Application.job_id, Application.status).all()
+
+    result = {}
+    for job_company_id, job_id, status, count in rows:
+        job_stats = result.setdefault(job_company_id, {}).setdefault(
+            job_id, {'total': 0, 'by_status': {s: 0 for s in APPLICATION_STATUSES}}
+        )
+        status = status or 'applied'
+        job_stats['total'] += count
+        job_stats['by_status'][status] = job_stats['by_status'].get(status, 0) + count
+    return result
+
+def get_company_job_stats(company_id):
+    """Get job_id -> application statistics for a single company"""
+    return get_job_application_stats(company_id).get(company_id, {})
+
+# Latest jobs
+
+# The newest open jobs are the same for every student, so they are kept per
+# process for STATS_CACHE_TTL seconds as column snapshots (see profiles.py)
+# and re-attached to each request's session without querying.
+_latest_jobs_cache = TTLCache(maxsize=16)
+
+def get_latest_jobs(limit=5):
+    """Get the newest active jobs of approved companies, with their company loaded"""
+    entries = _latest_jobs_cache.get(limit)
+    if entries is None:
+        jobs = Job.query.join(Job.company).options(contains_eager(Job.company))\
+            .filter(Job.is_active == True, Company.is_approved == True)\
+            .order_by(Job.created_at.desc()).limit(limit).all()
+        entries = [(snapshot(job), snapshot(job.company)) for job in jobs]
+        _latest_jobs_cache.set(limit, entries, ttl=current_app.config.get('STATS_CACHE_TTL', 5))
+
+    jobs = []
+    for job_values, company_values in entries:
+        job = restore(Job, job_values)
+        set_committed_value(job, 'company', restore(Company, company_values))
+        jobs.append(db.session.merge(job, load=False))
+    return jobs
@@ -0,0 +1,311 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import tempfile
+import mimetypes
+from datetime import datetime, timedelta
+from flask import Request, current_app, send_file, abort, request
+from werkzeug.security import safe_join
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import StudentProfile, StoredFile
+
+# Content-addressed upload storage
+#
+# Uploaded files are written straight to disk while the request body is
+# parsed, hashed as the chunks arrive, and then moved (not copied) to
+# STORAGE_FOLDER/objects/<ab>/<sha256>. Identical uploads share one object.
+# StudentProfile.resume_filename holds "<sha256>.<ext>"; stored_files keeps a
+# reference count per object that mapper events adjust in the same
+# transaction as the profile change. `flask storage-gc` repairs the counts
+# and deletes objects nothing has referenced for STORAGE_GC_GRACE_SECONDS.
+#
+# Names that aren't content hashes (uploads from before this storage) are
+# left alone and still live directly in UPLOAD_FOLDER.
+
+_STORAGE_NAME = re.compile(r'^([0-9a-f]{64})(?:\.([a-z0-9]{1,10}))?$')
+
+def storage_name(sha256, filename=None):
+    """Build the name stored in resume_filename for a content hash"""
+    ext = filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+    return f'{sha256}.{ext}' if ext else sha256
+
+def parse_storage_name(name):
+    """Get the content hash from a stored name, None for legacy file names"""
+    match = _STORAGE_NAME.match(name or '')
+    return match.group(1) if match else None
+
+def _tmp_dir():
+    path = os.path.join(current_app.config['STORAGE_FOLDER'], 'tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def object_path(sha256):
+    return os.path.join(current_app.config['STORAGE_FOLDER'], 'objects', sha256[:2], sha256)
+
+def resolve_path(name):
+    """Get the file path for a stored name (content hash or legacy upload name)"""
+    sha256 = parse_storage_name(name)
+    if sha256:
+        return object_path(sha256)
+    return safe_join(current_app.config['UPLOAD_FOLDER'], name)
+
+class HashingFile:
+    """Upload buffer on disk that hashes the bytes as they are written
+
+    The temporary file is removed on close unless store_upload() moved it into
+    the object store.
+    """
+
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.stored = False
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def close(self):
+        self._file.close()
+        if not self.stored:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+class UploadRequest(Request):
+    """Request that parses file parts into HashingFile buffers instead of spooled temp files"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingFile(_tmp_dir())
+
+def _spool(file):
+    """Get (sha256, size, temp_path) for an upload, hashing it now if the parser didn't"""
+    stream = file.stream
+    if isinstance(stream, HashingFile) and not stream.stored:
+        stream.flush()
+        stream.stored = True
+        return stream.sha256, stream.size, stream.path
+
+    chunk_size = current_app.config.get('STORAGE_CHUNK_SIZE', 64 * 1024)
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=_tmp_dir(), suffix='.part')
+    with os.fdopen(fd, 'wb') as out:
+        stream.seek(0)
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+            size += len(chunk)
+            out.write(chunk)
+    return digest.hexdigest(), size, path
+
+def store_upload(file):
+    """Store an uploaded file by content and return its storage name
+
+    The stored_files row is written on the current session; the caller commits
+    together with the profile change that references it.
+    """
+    sha256, size, temp_path = _spool(file)
+    now = datetime.utcnow()
+
+    seen = db.session.query(StoredFile).filter(StoredFile.sha256 == sha256)\
+        .update({'last_seen_at': now}, synchronize_session=False)
+    if not seen:
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredFile(sha256=sha256, size=size, content_type=file.mimetype,
+                                          ref_count=0, created_at=now, last_seen_at=now))
+        except IntegrityError:
+            # The same content was uploaded concurrently; its row is as good
+            pass
+
+    target = object_path(sha256)
+    if os.path.exists(target):
+        os.remove(temp_path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(temp_path, target)
+    return storage_name(sha256, file.filename)
+
+# Reference counting hooks
+
+_stored_files = StoredFile.__table__
+
+def _add_reference(connection, name, delta):
+    sha256 = parse_storage_name(name)
+    if sha256:
+        connection.execute(_stored_files.update()
+                           .where(_stored_files.c.sha256 == sha256)
+                           .values(ref_count=_stored_files.c.ref_count + delta))
+
+@event.listens_for(StudentProfile, 'after_insert')
+def _profile_inserted(mapper, connection, target):
+    _add_reference(connection, target.resume_filename, 1)
+
+@event.listens_for(StudentProfile, 'after_update')
+def _profile_updated(mapper, connection, target):
+    history = inspect(target).attrs.resume_filename.history
+    if not history.has_changes():
+        return
+    for name in history.deleted:
+        _add_reference(connection, name, -1)
+    for name in history.added:
+        _add_reference(connection, name, 1)
+
+@event.listens_for(StudentProfile, 'after_delete')
+def _profile_deleted(mapper, connection, target):
+    # The row held the value from before any unflushed change
+    history = inspect(target).attrs.resume_filename.history
+    _add_reference(connection, history.deleted[0] if history.deleted else target.resume_filename, -1)
+
+# Garbage collection
+
+def reconcile_ref_counts():
+    """Recount references from student_profiles; returns the number of rows corrected"""
+    counts = {}
+    for name, count in db.session.query(StudentProfile.resume_filename, db.func.count(StudentProfile.id))\
+            .filter(StudentProfile.resume_filename.isnot(None))\
+            .group_by(StudentProfile.resume_filename).all():
+        sha256 = parse_storage_name(name)
+        if sha256:
+            counts[sha256] = counts.get(sha256, 0) + count
+
+    corrected = 0
+    for stored in StoredFile.query.all():
+        expected = counts.get(stored.sha256, 0)
+        if stored.ref_count != expected:
+            stored.ref_count = expected
+            corrected += 1
+    db.session.commit()
+    return corrected
+
+def collect_garbage(grace_seconds=None, dry_run=False):
+    """Delete stored files that nothing references, plus leftover temporary files
+
+    Only files unreferenced and not uploaded again for grace_seconds are
+    removed, so an upload whose profile change hasn't committed yet is safe.
+    Returns a dict of counts.
+    """
+    if grace_seconds is None:
+        grace_seconds = current_app.config.get('STORAGE_GC_GRACE_SECONDS', 86400)
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    stats = {'corrected': 0, 'deleted': 0, 'bytes': 0, 'untracked': 0, 'temp': 0}
+    if not dry_run:
+        stats['corrected'] = reconcile_ref_counts()
+
+    orphans = db.session.query(StoredFile.sha256, StoredFile.size)\
+        .filter(StoredFile.ref_count <= 0, StoredFile.last_seen_at < cutoff).all()
+    for sha256, size in orphans:
+        if not dry_run:
+            # Re-check in the DELETE itself in case the file was referenced meanwhile
+            deleted = db.session.query(StoredFile).filter(
+                StoredFile.sha256 == sha256, StoredFile.ref_count <= 0, StoredFile.last_seen_at < cutoff
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            if not deleted:
+                continue
+            try:
+                os.remove(object_path(sha256))
+            except FileNotFoundError:
+                pass
+        stats['deleted'] += 1
+        stats['bytes'] += size or 0
+
+    # Objects left behind by uploads whose transaction rolled back
+    objects_dir = os.path.join(current_app.config['STORAGE_FOLDER'], 'objects')
+    tracked = {sha256 for (sha256,) in db.session.query(StoredFile.sha256).all()}
+    cutoff_ts = time.time() - grace_seconds
+    for directory, _, filenames in os.walk(objects_dir):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if filename not in tracked and os.path.getmtime(path) < cutoff_ts:
+                stats['untracked'] += 1
+                if not dry_run:
+                    os.remove(path)
+
+    tmp_dir = os.path.join(current_app.config['STORAGE_FOLDER'], 'tmp')
+    if os.path.isdir(tmp_dir):
+        for filename in os.listdir(tmp_dir):
+            path = os.path.join(tmp_dir, filename)
+            if os.path.getmtime(path) < cutoff_ts:
+                stats['temp'] += 1
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        logging.error(f"Error removing temporary upload {path}: {str(e)}")
+    return stats
+
+# Serving
+
+def _accel_redirect(path, mimetype, etag, max_age):
+    """Let nginx send the file through its internal X_ACCEL_REDIRECT_PREFIX location"""
+    root = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    relative = os.path.relpath(os.path.abspath(path), root)
+    if relative.startswith('..'):
+        return None
+    stat = os.stat(path)
+    response = current_app.response_class(mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = current_app.config['X_ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + \
+        relative.replace(os.sep, '/')
+    response.set_etag(etag)
+    response.last_modified = stat.st_mtime
+    if max_age:
+        response.cache_control.max_age = max_age
+    # Answer revalidations here; nginx handles ranges for the internal redirect
+    return response.make_conditional(request)
+
+def send_stored_file(name, download_name=None):
+    """Send a stored file with validators, conditional and range support
+
+    Content-hashed files get their hash as a strong ETag and a long max-age,
+    since their content can't change; a matching If-None-Match is answered
+    with 304 without touching the disk. With USE_X_SENDFILE or
+    X_ACCEL_REDIRECT_PREFIX set, the front-end server sends the bytes.
+    """
+    sha256 = parse_storage_name(name)
+    if sha256 and sha256 in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(sha256)
+        return response
+
+    path = resolve_path(name)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(download_name or name)[0] or 'application/octet-stream'
+    etag = sha256 or True
+    max_age = current_app.config.get('STORED_FILE_MAX_AGE') if sha256 else None
+
+    response = None
+    if current_app.config.get('X_ACCEL_REDIRECT_PREFIX'):
+        response = _accel_redirect(path, mimetype, sha256 or f'{os.path.getmtime(path)}-{os.path.getsize(path)}',
+                                   max_age)
+    if response is None:
+        # send_file honours USE_X_SENDFILE itself
+        response = send_file(path, mimetype=mimetype, download_name=download_name,
+                             as_attachment=bool(download_name), etag=etag, conditional=True, max_age=max_age)
+
+    # Uploads are only served to logged-in users, so shared caches must not keep them
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if sha256:
+        response.cache_control.immutable = True
+    return response
@@ -12,6 +12,7 @@ function initializeStudentModule() {
     setupTestInterface();
     setupJobApplications();
     setupNotifications();
+    setupLiveUpdates();
 }
 
 // Navigation highlighting
@@ -525,6 +526,115 @@ function markNotificationsAsRead() {
     });
 }
 
+// Live updates pushed by the server (notifications, application status)
+function setupLiveUpdates() {
+    if (!window.EventSource) {
+        return;
+    }
+    
+    const handlers = {
+        notification: function(notification) {
+            prependNotification('🔔', notification.title, notification.message);
+            showNotification(notification.title, notification.type);
+        },
+        application: function(application) {
+            document.querySelectorAll(`[data-application-id="${application.id}"] .status-badge`).forEach(badge => {
+                badge.className = `status-badge status-${application.status}`;
+                badge.textContent = application.status.toUpperCase();
+            });
+        },
+        resync: function() {
+            // Too many updates were missed while the connection was busy; reload instead
+            window.location.reload();
+        }
+    };
+    
+    let lastEventId = null;
+    let retryDelay = 30000;
+    let pollTimer = null;
+    
+    function handle(name, id, data) {
+        if (id) {
+            lastEventId = id;
+        }
+        handlers[name](data);
+    }
+    
+    // Turned away at capacity (or disconnected for good): poll for missed events and retry later
+    function poll() {
+        const query = lastEventId ? `?last_event_id=${lastEventId}` : '';
+        fetch(`/api/events${query}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    return;
+                }
+                data.events.forEach(item => handle(item.event, String(item.id), item.data));
+                lastEventId = String(data.last_event_id);
+            })
+            .catch(error => console.error('Error polling updates:', error));
+    }
+    
+    function connect() {
+        const query = lastEventId ? `?last_event_id=${lastEventId}` : '';
+        const source = new EventSource(`/api/stream${query}`);
+        
+        Object.keys(handlers).forEach(name => {
+            source.addEventListener(name, function(e) {
+                handle(name, e.lastEventId, JSON.parse(e.data));
+            });
+        });
+        
+        source.addEventListener('open', function() {
+            retryDelay = 30000;
+            clearInterval(pollTimer);
+            pollTimer = null;
+        });
+        
+        source.addEventListener('error', function() {
+            // EventSource retries dropped connections itself; only a refused one ends up closed
+            if (source.readyState !== EventSource.CLOSED) {
+                return;
+            }
+            source.close();
+            if (!pollTimer) {
+                poll();
+                pollTimer = setInterval(poll, 30000);
+            }
+            setTimeout(connect, retryDelay);
+            retryDelay = Math.min(retryDelay * 2, 300000);
+        });
+    }
+    
+    connect();
+}
+
+function prependNotification(icon, title, text) {
+    const container = document.querySelector('.notifications');
+    if (!container) {
+        return;
+    }
+    
+    const item = document.createElement('div');
+    item.className = 'notification-item unread';
+    item.innerHTML = `
+        <div class="notification-icon">${icon}</div>
+        <div class="notification-content">
+            <div class="notification-title"></div>
+            <div class="notification-text"></div>
+            <div class="notification-time">Just now</div>
+        </div>
+    `;
+    item.querySelector('.notification-title').textContent = title;
+    item.querySelector('.notification-text').textContent = text;
+    item.addEventListener('click', function() {
+        this.classList.remove('unread');
+    });
+    
+    const heading = container.querySelector('h3');
+    container.insertBefore(item, heading ? heading.nextSibling : container.firstChild);
+}
+
 // Utility functions
 function populateJobDetails(content) {
     content.innerHTML = `
@@ -1,12 +1,24 @@
 import os
 import csv
 import json
+import zlib
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
 from datetime import datetime
-from flask import current_app
-from flask_mail import Message
-from app import mail, db
-from models import User, StudentProfile, PlacementRecord, Company
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import User, StudentProfile, PlacementRecord, Company, Job, Application
+from stats import get_job_application_stats
+from placement_stats import get_global_stats, get_branch_stats, record_students_added
+from search import get_search_index
+from changefeed import record_changes, STUDENT
+from outbox import enqueue_email, wake_outbox_worker
+from storage import resolve_path
 import logging
 
 # File upload utilities
@@ -24,26 +36,20 @@ def get_file_size(filepath):
 
 # Email utilities
 def send_email(to, subject, template, **kwargs):
-    """Send email using Flask-Mail"""
+    """Queue an email for background delivery through the outbox"""
     try:
-        msg = Message(
-            subject=subject,
-            recipients=[to] if isinstance(to, str) else to,
-            html=template,
-            sender=current_app.config['MAIL_DEFAULT_SENDER']
-        )
-        mail.send(msg)
+        enqueue_email(to, subject, template)
+        db.session.commit()
+        wake_outbox_worker()
         return True
     except Exception as e:
-        logging.error(f"Email sending failed: {str(e)}")
+        db.session.rollback()
+        logging.error(f"Email queueing failed: {str(e)}")
         return False
 
-def send_notification_email(user, title, message):
-    """Send notification email to user"""
-    if not user.email:
-        return False
-    
-    html_template = f"""
+def render_notification_email(title, message):
+    """Render the HTML body used for notification emails"""
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -63,64 +69,172 @@ def send_notification_email(user, title, message):
     </body>
     </html>
     """
+
+def send_notification_email(user, title, message, commit=True):
+    """Send notification email to user
+
+    With commit=False the email is only added to the current session, so it is
+    delivered if and when the caller's transaction commits.
+    """
+    if not user.email:
+        return False
     
+    html_template = render_notification_email(title, message)
+    if not commit:
+        enqueue_email(user.email, title, html_template)
+        return True
     return send_email(user.email, title, html_template)
 
 # Report generation utilities
+REPORT_BATCH_SIZE = 1000
+
+# (header, key, placeholder): falsy values are written as the placeholder when one is set
+PLACEMENT_REPORT_COLUMNS = [
+    ('Student Name', 'student_name', None), ('Roll Number', 'roll_number', None), ('Branch', 'branch', None),
+    ('CGPA', 'cgpa', 'N/A'), ('Company', 'company', None), ('Package (LPA)', 'package_lpa', 'N/A'),
+    ('Placement Type', 'placement_type', None), ('Academic Year', 'academic_year', None)
+]
+
+STUDENT_REPORT_COLUMNS = [
+    ('Name', 'name', None), ('Roll Number', 'roll_number', None), ('Email', 'email', None),
+    ('Branch', 'branch', None), ('Graduation Year', 'graduation_year', None), ('CGPA', 'cgpa', 'N/A'),
+    ('10th %', 'tenth_percentage', 'N/A'), ('12th %', 'twelfth_percentage', 'N/A'),
+    ('Placement Status', 'placement_status', None), ('Skills', 'skills', 'N/A')
+]
+
+COMPANY_REPORT_COLUMNS = [
+    ('Company Name', 'company_name', None), ('Industry', 'industry', 'N/A'), ('Location', 'location', 'N/A'),
+    ('Total Jobs', 'total_jobs', None), ('Total Applications', 'total_applications', None),
+    ('Students Hired', 'students_hired', None), ('Status', 'status', None)
+]
+
+def placement_report_rows():
+    """Yield placement report rows, fetching from the database in batches"""
+    placements = db.session.query(
+        PlacementRecord,
+        StudentProfile,
+        Company
+    ).join(
+        StudentProfile, PlacementRecord.student_id == StudentProfile.user_id
+    ).join(
+        Company, PlacementRecord.company_id == Company.id
+    ).order_by(PlacementRecord.id).yield_per(REPORT_BATCH_SIZE)
+    
+    for placement, student, company in placements:
+        yield {
+            'student_name': student.full_name,
+            'roll_number': student.roll_number,
+            'branch': student.branch,
+            'cgpa': student.cgpa,
+            'company': company.name,
+            'package_lpa': placement.package_amount / 100000 if placement.package_amount else None,
+            'placement_type': placement.placement_type,
+            'academic_year': placement.academic_year
+        }
+
+def student_report_rows(branch=None):
+    """Yield student report rows, fetching from the database in batches"""
+    query = db.session.query(StudentProfile, User).join(User)
+    
+    if branch:
+        query = query.filter(StudentProfile.branch == branch)
+    
+    for student, user in query.order_by(StudentProfile.id).yield_per(REPORT_BATCH_SIZE):
+        yield {
+            'name': student.full_name,
+            'roll_number': student.roll_number,
+            'email': user.email,
+            'branch': student.branch,
+            'graduation_year': student.graduation_year,
+            'cgpa': student.cgpa,
+            'tenth_percentage': student.tenth_percentage,
+            'twelfth_percentage': student.twelfth_percentage,
+            'placement_status': student.placement_status,
+            'skills': student.skills or None
+        }
+
+def company_report_rows():
+    """Yield company report rows with job, application and hiring counts"""
+    # Aggregate counts up front instead of querying per company/job
+    application_stats = get_job_application_stats()
+    job_counts = dict(db.session.query(Job.company_id, db.func.count(Job.id))
+                      .group_by(Job.company_id).all())
+    hire_counts = dict(db.session.query(PlacementRecord.company_id, db.func.count(PlacementRecord.id))
+                       .group_by(PlacementRecord.company_id).all())
+    
+    for company in db.session.query(Company).order_by(Company.id).yield_per(REPORT_BATCH_SIZE):
+        yield {
+            'company_name': company.name,
+            'industry': company.industry,
+            'location': company.location,
+            'total_jobs': job_counts.get(company.id, 0),
+            'total_applications': sum(s['total'] for s in application_stats.get(company.id, {}).values()),
+            'students_hired': hire_counts.get(company.id, 0),
+            'status': 'Approved' if company.is_approved else 'Pending'
+        }
+
+REPORTS = {
+    'placement_statistics': (PLACEMENT_REPORT_COLUMNS, placement_report_rows),
+    'student_data': (STUDENT_REPORT_COLUMNS, student_report_rows),
+    'company_data': (COMPANY_REPORT_COLUMNS, company_report_rows)
+}
+
+def stream_csv(columns, rows, batch_size=REPORT_BATCH_SIZE):
+    """Yield CSV text in chunks of batch_size rows"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _, _ in columns])
+    
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([row[key] if placeholder is None else row[key] or placeholder
+                         for _, key, placeholder in columns])
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+def stream_json(rows, batch_size=REPORT_BATCH_SIZE):
+    """Yield the same text as json.dumps(list(rows), indent=2) in chunks"""
+    chunk = []
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        item = json.dumps(row, indent=2).replace('\n', '\n  ')
+        chunk.append(('[\n  ' if count == 1 else ',\n  ') + item)
+        if len(chunk) >= batch_size:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append('\n]' if count else '[]')
+    yield ''.join(chunk)
+
+def gzip_stream(chunks, level=6):
+    """Gzip-compress a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_report(report_type, format='csv', **kwargs):
+    """Yield a report as text chunks; memory use is bounded by the batch size"""
+    if report_type not in REPORTS:
+        raise ValueError(f"Unknown report type: {report_type}")
+    
+    columns, row_source = REPORTS[report_type]
+    rows = row_source(**kwargs)
+    
+    if format == 'csv':
+        return stream_csv(columns, rows)
+    elif format == 'json':
+        return stream_json(rows)
+    raise ValueError(f"Unsupported report format: {format}")
+
 def generate_placement_report(format='csv'):
     """Generate placement statistics report"""
     try:
-        # Get placement data
-        placements = db.session.query(
-            PlacementRecord,
-            StudentProfile,
-            Company
-        ).join(
-            StudentProfile, PlacementRecord.student_id == StudentProfile.user_id
-        ).join(
-            Company, PlacementRecord.company_id == Company.id
-        ).all()
-        
-        if format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'Student Name', 'Roll Number', 'Branch', 'CGPA',
-                'Company', 'Package (LPA)', 'Placement Type', 'Academic Year'
-            ])
-            
-            # Write data
-            for placement, student, company in placements:
-                writer.writerow([
-                    student.full_name,
-                    student.roll_number,
-                    student.branch,
-                    student.cgpa or 'N/A',
-                    company.name,
-                    placement.package_amount / 100000 if placement.package_amount else 'N/A',
-                    placement.placement_type,
-                    placement.academic_year
-                ])
-            
-            return output.getvalue()
-        
-        elif format == 'json':
-            data = []
-            for placement, student, company in placements:
-                data.append({
-                    'student_name': student.full_name,
-                    'roll_number': student.roll_number,
-                    'branch': student.branch,
-                    'cgpa': student.cgpa,
-                    'company': company.name,
-                    'package_lpa': placement.package_amount / 100000 if placement.package_amount else None,
-                    'placement_type': placement.placement_type,
-                    'academic_year': placement.academic_year
-                })
-            return json.dumps(data, indent=2)
-    
+        return ''.join(stream_report('placement_statistics', format))
     except Exception as e:
         logging.error(f"Report generation failed: {str(e)}")
         return None
@@ -128,40 +242,7 @@ def generate_placement_report(format='csv'):
 def generate_student_report(branch=None, format='csv'):
     """Generate student statistics report"""
     try:
-        query = db.session.query(StudentProfile, User).join(User)
-        
-        if branch:
-            query = query.filter(StudentProfile.branch == branch)
-        
-        students = query.all()
-        
-        if format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'Name', 'Roll Number', 'Email', 'Branch', 'Graduation Year',
-                'CGPA', '10th %', '12th %', 'Placement Status', 'Skills'
-            ])
-            
-            # Write data
-            for student, user in students:
-                writer.writerow([
-                    student.full_name,
-                    student.roll_number,
-                    user.email,
-                    student.branch,
-                    student.graduation_year,
-                    student.cgpa or 'N/A',
-                    student.tenth_percentage or 'N/A',
-                    student.twelfth_percentage or 'N/A',
-                    student.placement_status,
-                    student.skills or 'N/A'
-                ])
-            
-            return output.getvalue()
-    
+        return ''.join(stream_report('student_data', format, branch=branch))
     except Exception as e:
         logging.error(f"Student report generation failed: {str(e)}")
         return None
@@ -169,41 +250,117 @@ def generate_student_report(branch=None, format='csv'):
 def generate_company_report(format='csv'):
     """Generate company statistics report"""
     try:
-        # Get company data with job and application counts
-        companies = db.session.query(Company).all()
-        
-        if format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'Company Name', 'Industry', 'Location', 'Total Jobs',
-                'Total Applications', 'Students Hired', 'Status'
-            ])
-            
-            # Write data
-            for company in companies:
-                total_jobs = company.jobs.count()
-                total_applications = sum(job.application_count for job in company.jobs)
-                students_hired = PlacementRecord.query.filter_by(company_id=company.id).count()
-                
-                writer.writerow([
-                    company.name,
-                    company.industry or 'N/A',
-                    company.location or 'N/A',
-                    total_jobs,
-                    total_applications,
-                    students_hired,
-                    'Approved' if company.is_approved else 'Pending'
-                ])
-            
-            return output.getvalue()
-    
+        return ''.join(stream_report('company_data', format))
     except Exception as e:
         logging.error(f"Company report generation failed: {str(e)}")
         return None
 
+# Resume archive export
+RESUME_INDEX_COLUMNS = [
+    ('Application ID', 'application_id', None), ('Status', 'status', None), ('Applied At', 'applied_at', 'N/A'),
+    ('Name', 'name', 'N/A'), ('Roll Number', 'roll_number', 'N/A'), ('Email', 'email', 'N/A'),
+    ('Branch', 'branch', 'N/A'), ('Graduation Year', 'graduation_year', 'N/A'), ('CGPA', 'cgpa', 'N/A'),
+    ('Resume', 'resume', 'N/A')
+]
+
+def resume_archive_rows(job_id, statuses):
+    """Get one row per application to a job in the given statuses, with its resume's path and size
+
+    Rows are plain dicts loaded up front so the archive can be streamed
+    without holding a database connection for the whole download.
+    """
+    query = db.session.query(
+        Application.id, Application.status, Application.applied_at, User.email,
+        StudentProfile.first_name, StudentProfile.last_name, StudentProfile.roll_number,
+        StudentProfile.branch, StudentProfile.graduation_year, StudentProfile.cgpa,
+        StudentProfile.resume_filename
+    ).join(User, Application.user_id == User.id)\
+     .outerjoin(StudentProfile, StudentProfile.user_id == Application.user_id)\
+     .filter(Application.job_id == job_id, Application.status.in_(statuses))\
+     .order_by(Application.id)
+    
+    rows = []
+    for row in query.yield_per(REPORT_BATCH_SIZE):
+        name = f"{row.first_name or ''} {row.last_name or ''}".strip()
+        path, size, resume = None, None, None
+        if row.resume_filename:
+            path = resolve_path(row.resume_filename)
+            if path and os.path.isfile(path):
+                size = os.path.getsize(path)
+                ext = os.path.splitext(row.resume_filename)[1].lower()
+                resume = f"resumes/{row.id}_{secure_filename(name) or 'student'}{ext}"
+            else:
+                path = None
+        rows.append({
+            'application_id': row.id,
+            'status': row.status,
+            'applied_at': row.applied_at.isoformat(' ', 'seconds') if row.applied_at else None,
+            'name': name or None,
+            'roll_number': row.roll_number,
+            'email': row.email,
+            'branch': row.branch,
+            'graduation_year': row.graduation_year,
+            'cgpa': row.cgpa,
+            'resume': resume,
+            'path': path,
+            'size': size
+        })
+    return rows
+
+class _ZipSink:
+    """Write-only, unseekable file for ZipFile that hands written bytes back to the generator"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_resume_zip(rows, chunk_size=64 * 1024):
+    """Yield a ZIP archive of index.csv plus each row's resume, reading files in chunks
+
+    The archive is written to an unseekable sink (sizes and CRCs go in data
+    descriptors after each file), so neither the archive nor a whole resume
+    is ever held in memory.
+    """
+    return (chunk for chunk in _resume_zip_chunks(rows, chunk_size) if chunk)
+
+def _resume_zip_chunks(rows, chunk_size):
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        index = ''.join(stream_csv(RESUME_INDEX_COLUMNS, rows))
+        archive.writestr('index.csv', index, compress_type=zipfile.ZIP_DEFLATED)
+        yield sink.drain()
+        
+        for row in rows:
+            if not row['resume']:
+                continue
+            try:
+                source = open(row['path'], 'rb')
+            except OSError as e:
+                logging.error(f"Resume export skipped {row['path']}: {str(e)}")
+                continue
+            with source:
+                info = zipfile.ZipInfo(row['resume'], date_time=time.localtime(os.fstat(source.fileno()).st_mtime)[:6])
+                # PDFs and DOCX files are already compressed
+                info.compress_type = zipfile.ZIP_STORED
+                info.file_size = row['size']
+                with archive.open(info, 'w') as target:
+                    for chunk in iter(lambda: source.read(chunk_size), b''):
+                        target.write(chunk)
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
 # Data validation utilities
 def validate_student_data(data):
     """Validate student profile data"""
@@ -276,67 +433,153 @@ def validate_job_data(data):
     return errors
 
 # Data import utilities
-def import_student_data_from_csv(file_content):
-    """Import student data from CSV file"""
+IMPORT_CHUNK_SIZE = 500
+DEFAULT_STUDENT_PASSWORD = 'changeme123'
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _existing_values(column, values):
+    """Get the subset of values already present in a column, querying in chunks"""
+    found = set()
+    for chunk in _chunks(list(values), IMPORT_CHUNK_SIZE):
+        found.update(value for (value,) in db.session.query(column).filter(column.in_(chunk)).all())
+    return found
+
+def hash_passwords(passwords, max_workers=None):
+    """Hash each password with its own salt, in a process pool when there is more than one"""
+    if len(passwords) <= 1 or max_workers == 1:
+        return [generate_password_hash(password) for password in passwords]
+    # Spawned rather than forked: forking a threaded server worker can copy locks held by other threads
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=16))
+
+def import_student_data_from_csv(file_content, chunk_size=IMPORT_CHUNK_SIZE, max_workers=None):
+    """Import student data from CSV file
+
+    Existing emails, usernames and roll numbers are fetched up front, every
+    student gets the default password hashed with its own salt in a process
+    pool, and users/profiles are inserted with bulk statements in chunks.
+    """
+    started = time.perf_counter()
     try:
         reader = csv.DictReader(StringIO(file_content))
-        imported_count = 0
+        rows = list(enumerate(reader, start=2))
         errors = []
         
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                # Validate data
-                validation_errors = validate_student_data(row)
-                if validation_errors:
-                    errors.append(f"Row {row_num}: {', '.join(validation_errors)}")
-                    continue
-                
-                # Check if user already exists
-                existing_user = User.query.filter_by(email=row.get('email')).first()
-                if existing_user:
-                    errors.append(f"Row {row_num}: Email {row.get('email')} already exists")
+        # Validate rows and reject duplicates within the file
+        valid_rows = []
+        seen_emails, seen_rolls = set(), set()
+        for row_num, row in rows:
+            validation_errors = validate_student_data(row)
+            if not row.get('email'):
+                validation_errors.append("Email is required")
+            if validation_errors:
+                errors.append(f"Row {row_num}: {', '.join(validation_errors)}")
+                continue
+            
+            email, roll_number = row['email'].strip(), row['roll_number'].strip()
+            if email in seen_emails:
+                errors.append(f"Row {row_num}: Email {email} is duplicated in the file")
+                continue
+            if roll_number in seen_rolls:
+                errors.append(f"Row {row_num}: Roll number {roll_number} is duplicated in the file")
+                continue
+            seen_emails.add(email)
+            seen_rolls.add(roll_number)
+            valid_rows.append((row_num, email, roll_number, row))
+        
+        # Check against existing records in a handful of queries
+        existing_emails = _existing_values(User.email, seen_emails)
+        existing_usernames = _existing_values(User.username, seen_rolls)
+        existing_rolls = _existing_values(StudentProfile.roll_number, seen_rolls)
+        
+        to_import = []
+        for row_num, email, roll_number, row in valid_rows:
+            if email in existing_emails:
+                errors.append(f"Row {row_num}: Email {email} already exists")
+            elif roll_number in existing_usernames or roll_number in existing_rolls:
+                errors.append(f"Row {row_num}: Roll number {roll_number} already exists")
+            else:
+                to_import.append((row_num, email, roll_number, row))
+        
+        hash_started = time.perf_counter()
+        password_hashes = hash_passwords(
+            [DEFAULT_STUDENT_PASSWORD] * len(to_import),
+            max_workers=max_workers
+        )
+        hash_seconds = time.perf_counter() - hash_started
+        
+        imported_count = 0
+        branch_counts = {}
+        for chunk in _chunks(list(zip(to_import, password_hashes)), chunk_size):
+            users, profiles = [], []
+            for (row_num, email, roll_number, row), password_hash in chunk:
+                try:
+                    profiles.append({
+                        'email': email,
+                        'roll_number': roll_number,
+                        'first_name': row.get('first_name'),
+                        'last_name': row.get('last_name'),
+                        'branch': row.get('branch'),
+                        'graduation_year': int(row.get('graduation_year')),
+                        'cgpa': float(row.get('cgpa')) if row.get('cgpa') else None,
+                        'tenth_percentage': float(row.get('tenth_percentage')) if row.get('tenth_percentage') else None,
+                        'twelfth_percentage': float(row.get('twelfth_percentage')) if row.get('twelfth_percentage') else None,
+                        'phone': row.get('phone'),
+                        'skills': row.get('skills')
+                    })
+                except Exception as e:
+                    errors.append(f"Row {row_num}: {str(e)}")
                     continue
-                
-                # Create user and student profile
-                user = User(
-                    email=row.get('email'),
-                    username=row.get('roll_number'),
-                    role='student',
-                    is_active=True,
-                    is_verified=True
-                )
-                user.set_password('changeme123')  # Default password
-                db.session.add(user)
-                db.session.flush()
-                
-                student = StudentProfile(
-                    user_id=user.id,
-                    roll_number=row.get('roll_number'),
-                    first_name=row.get('first_name'),
-                    last_name=row.get('last_name'),
-                    branch=row.get('branch'),
-                    graduation_year=int(row.get('graduation_year')),
-                    cgpa=float(row.get('cgpa')) if row.get('cgpa') else None,
-                    tenth_percentage=float(row.get('tenth_percentage')) if row.get('tenth_percentage') else None,
-                    twelfth_percentage=float(row.get('twelfth_percentage')) if row.get('twelfth_percentage') else None,
-                    phone=row.get('phone'),
-                    skills=row.get('skills')
-                )
-                db.session.add(student)
-                imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+                users.append({
+                    'email': email,
+                    'username': roll_number,
+                    'password_hash': password_hash,
+                    'role': 'student',
+                    'is_active': True,
+                    'is_verified': True
+                })
+            
+            if not users:
+                continue
+            
+            db.session.execute(insert(User), users)
+            user_ids = dict(db.session.query(User.email, User.id)
+                            .filter(User.email.in_([u['email'] for u in users])).all())
+            for profile in profiles:
+                profile['user_id'] = user_ids[profile.pop('email')]
+                branch_counts[profile['branch']] = branch_counts.get(profile['branch'], 0) + 1
+            db.session.execute(insert(StudentProfile), profiles)
+            imported_count += len(users)
+            
+            # Bulk inserts skip the mapper events that keep the search index in sync
+            search_index = get_search_index()
+            connection = db.session.connection()
+            students = StudentProfile.query.filter(StudentProfile.user_id.in_(user_ids.values())).all()
+            for student in students:
+                search_index.index_student(connection, student)
+            record_changes(connection, STUDENT, [student.id for student in students])
         
         if imported_count > 0:
+            # Bulk inserts bypass the mapper events that maintain the counters
+            record_students_added(db.session.connection(), branch_counts)
             db.session.commit()
         else:
             db.session.rollback()
         
+        elapsed = time.perf_counter() - started
         return {
             'success': imported_count > 0,
             'imported_count': imported_count,
-            'errors': errors
+            'errors': errors,
+            'metrics': {
+                'rows': len(rows),
+                'elapsed_seconds': round(elapsed, 3),
+                'hash_seconds': round(hash_seconds, 3),
+                'rows_per_second': round(len(rows) / elapsed, 1) if elapsed > 0 else None
+            }
         }
     
     except Exception as e:
@@ -351,23 +594,12 @@ def import_student_data_from_csv(file_content):
 # Statistics utilities
 def get_placement_statistics():
     """Get comprehensive placement statistics"""
-    total_students = User.query.filter_by(role='student', is_active=True).count()
-    placed_students = PlacementRecord.query.count()
+    counters = get_global_stats()
+    total_students = counters.get('students', 0)
+    placed_students = counters.get('placed', 0)
     
     # Branch-wise statistics
-    branch_stats = db.session.query(
-        StudentProfile.branch,
-        db.func.count(StudentProfile.id).label('total'),
-        db.func.count(PlacementRecord.id).label('placed')
-    ).outerjoin(PlacementRecord, StudentProfile.user_id == PlacementRecord.student_id)\
-     .group_by(StudentProfile.branch).all()
-    
-    # Package statistics
-    package_stats = db.session.query(
-        db.func.avg(PlacementRecord.package_amount).label('avg_package'),
-        db.func.max(PlacementRecord.package_amount).label('max_package'),
-        db.func.min(PlacementRecord.package_amount).label('min_package')
-    ).first()
+    branch_stats = get_branch_stats()
     
     return {
         'total_students': total_students,
@@ -375,16 +607,16 @@ def get_placement_statistics():
         'placement_percentage': (placed_students / total_students * 100) if total_students > 0 else 0,
         'branch_stats': [
             {
-                'branch': stat.branch,
-                'total': stat.total,
-                'placed': stat.placed or 0,
-                'percentage': (stat.placed or 0) / stat.total * 100 if stat.total > 0 else 0
+                'branch': stat['branch'],
+                'total': stat['total'],
+                'placed': stat['placed'],
+                'percentage': stat['placed'] / stat['total'] * 100 if stat['total'] > 0 else 0
             }
             for stat in branch_stats
         ],
-        'avg_package': package_stats.avg_package / 100000 if package_stats.avg_package else 0,
-        'max_package': package_stats.max_package / 100000 if package_stats.max_package else 0,
-        'min_package': package_stats.min_package / 100000 if package_stats.min_package else 0
+        'avg_package': counters['package_avg'] / 100000,
+        'max_package': counters.get('package_max', 0) / 100000,
+        'min_package': counters.get('package_min', 0) / 100000
     }
 
 def generate_report(report_type, **kwargs):
@@ -0,0 +1,5 @@
+import os
+from app import create_app
+
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))